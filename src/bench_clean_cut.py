@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the cut-aware section cleaner on comment-heavy dumps.
+
+For each comment count, generates a synthetic raw dump with synth_corpus
+(comments are the tail that clean_section_text throws away), splits it into
+sections and measures, on the same sections:
+
+    legacy    the previous clean_section_text: split and normalize every
+              line, then look for the timestamp or view link
+    cut       clean_md.clean_section_text: find_cut on the raw text, then
+              clean only the retained prefix
+
+and, on the whole file, the buffered and --stream engines end to end. Every
+section is checked to clean identically with both cleaners.
+
+Usage:
+    python src/bench_clean_cut.py
+    python src/bench_clean_cut.py --comments 0,20,100 --questions 5000 --output bench_results/clean_cut.json
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import clean_md
+from clean_md import REMOVE_LINE_RE, TIMESTAMP_RE, TOPIC_LINE_RE, VIEW_LINK_RE
+from synth_corpus import write_dump
+
+
+def legacy_clean_section_text(text: str, remove_topic: bool) -> str:
+    """clean_section_text before the cut-aware rewrite: normalize every line, then cut."""
+    out = []
+    prev_blank = False
+    for ln in text.splitlines():
+        if REMOVE_LINE_RE.match(ln):
+            continue
+        if remove_topic and TOPIC_LINE_RE.match(ln):
+            continue
+        if not ln.strip():
+            if not prev_blank:
+                out.append('')
+            prev_blank = True
+        else:
+            out.append(ln.rstrip())
+            prev_blank = False
+    for idx, ln in enumerate(out):
+        if TIMESTAMP_RE.match(ln) or VIEW_LINK_RE.match(ln):
+            out = out[:idx]
+            break
+    while out and out[0] == '':
+        out.pop(0)
+    while out and out[-1] == '':
+        out.pop()
+    return '\n'.join(out)
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    """Best wall time of repeat runs of fn."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Compare the cut-aware section cleaner with the previous one.")
+    p.add_argument("--comments", default="0,20,100",
+                   help="comma-separated comments per question (default: %(default)s)")
+    p.add_argument("--questions", type=int, default=5000,
+                   help="questions per dump (default: %(default)s)")
+    p.add_argument("--remove-topic", action="store_true", help="also remove topic lines")
+    p.add_argument("--repeat", type=int, default=3, help="timed repetitions (default: %(default)s)")
+    p.add_argument("--output", type=Path, help="write the results as JSON")
+    args = p.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results: List[Dict[str, object]] = []
+    identical = True
+    print(f"{'comments':>8} {'MB':>7} {'tail %':>7} {'legacy s':>9} {'cut s':>8} {'speedup':>8} "
+          f"{'buffered s':>11} {'stream s':>9} {'same':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmpdir = Path(tmp)
+        for comments in (int(c) for c in args.comments.split(',') if c.strip()):
+            raw = tmpdir / f"dump-{comments}.md"
+            out = tmpdir / f"clean-{comments}.md"
+            write_dump(raw, questions=args.questions, comments=comments)
+            text = raw.read_text(encoding="utf-8")
+            bodies = [body for key, body in clean_md.split_into_sections(text) if key != "__preamble__"]
+            kept = sum(clean_md.find_cut(b) or len(b) for b in bodies)
+            tail = 1 - kept / max(1, sum(len(b) for b in bodies))
+
+            same = all(clean_md.clean_section_text(b, args.remove_topic)
+                       == legacy_clean_section_text(b, args.remove_topic) for b in bodies)
+            identical = identical and same
+            row = {
+                "comments": comments,
+                "mb": raw.stat().st_size / 1024 / 1024,
+                "tail_fraction": tail,
+                "legacy_seconds": timed(lambda: [legacy_clean_section_text(b, args.remove_topic)
+                                                 for b in bodies], args.repeat),
+                "cut_seconds": timed(lambda: [clean_md.clean_section_text(b, args.remove_topic)
+                                              for b in bodies], args.repeat),
+                "buffered_seconds": timed(lambda: clean_md.process_single_file(
+                    raw, out, args.remove_topic), args.repeat),
+                "stream_seconds": timed(lambda: clean_md.process_single_file(
+                    raw, out, args.remove_topic, stream=True), args.repeat),
+                "identical": same,
+            }
+            results.append(row)
+            print(f"{comments:>8} {row['mb']:>7.1f} {tail * 100:>6.1f}% {row['legacy_seconds']:>9.3f} "
+                  f"{row['cut_seconds']:>8.3f} {row['legacy_seconds'] / row['cut_seconds']:>7.2f}x "
+                  f"{row['buffered_seconds']:>11.3f} {row['stream_seconds']:>9.3f} "
+                  f"{'yes' if same else 'NO':>5}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()},
+                                           "results": results}, indent=2), encoding="utf-8")
+        print(f"✓ Results written to: {args.output}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
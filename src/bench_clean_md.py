@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Peak-memory benchmark for the clean_md streaming engine.
+
+Generates synthetic ExamTopics dumps of increasing size, cleans each one in a
+fresh subprocess and reports the child's peak RSS, so a flat curve confirms
+that --stream memory does not grow with input size.
+
+Usage:
+    python src/bench_clean_md.py
+    python src/bench_clean_md.py --sizes 1M,64M,1G,4G
+    python src/bench_clean_md.py --sizes 1M,16M,128M --buffered
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from sizes import UNITS, parse_size
+from synth_corpus import write_dump
+
+CLEAN_MD = Path(__file__).resolve().parent / "clean_md.py"
+
+
+def generate_dump(path: Path, target_bytes: int, comments_per_question: int = 20) -> int:
+    """
+    Write a synthetic raw dump of roughly target_bytes to path.
+
+    Args:
+        path: Output file path
+        target_bytes: Approximate size of the generated file
+        comments_per_question: Number of comments per question
+
+    Returns:
+        Number of questions written
+    """
+    return write_dump(path, target_bytes=target_bytes, comments=comments_per_question)
+
+
+def run_clean(input_path: Path, output_path: Path, stream: bool) -> tuple:
+    """
+    Run clean_md.py in a subprocess and return (seconds, peak_rss_bytes).
+
+    Peak RSS comes from os.wait4 so each run is measured independently.
+    """
+    cmd = [sys.executable, str(CLEAN_MD), str(input_path), "-o", str(output_path)]
+    if stream:
+        cmd.append("--stream")
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"clean_md.py exited with {proc.returncode} on {input_path}")
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+    return elapsed, peak
+
+
+def main(argv: List[str] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark clean_md peak memory across input sizes.")
+    p.add_argument("--sizes", default="1M,16M,128M",
+                   help="comma-separated input sizes, e.g. 1M,64M,1G,4G (default: %(default)s)")
+    p.add_argument("--buffered", action="store_true",
+                   help="also run the buffered (sorting) mode for comparison")
+    p.add_argument("--workdir", type=Path, default=None,
+                   help="directory for generated dumps (default: system temp dir)")
+    args = p.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    modes = [True, False] if args.buffered else [True]
+
+    print(f"{'input':>10} {'questions':>10} {'mode':>9} {'seconds':>9} {'MB/s':>8} {'peak RSS':>10}")
+    with tempfile.TemporaryDirectory(dir=args.workdir) as tmp:
+        tmpdir = Path(tmp)
+        for size in sizes:
+            raw = tmpdir / f"dump-{size}.md"
+            out = tmpdir / f"clean-{size}.md"
+            count = generate_dump(raw, size)
+            actual = raw.stat().st_size
+            for stream in modes:
+                elapsed, peak = run_clean(raw, out, stream)
+                print(f"{actual / UNITS['M']:>8.1f}MB {count:>10} "
+                      f"{'stream' if stream else 'buffered':>9} {elapsed:>9.2f} "
+                      f"{actual / UNITS['M'] / elapsed:>8.1f} {peak / UNITS['M']:>8.1f}MB")
+            raw.unlink()
+            out.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
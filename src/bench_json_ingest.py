@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark direct JSON ingest against the markdown path.
+
+Builds the same synthetic questions twice: as raw markdown dumps, exactly
+as WriteData writes them (with comments, as -c does), and as QuestionData
+records in NDJSON and in a JSON page file ({"pageProps": {"questions": [...]}}).
+Then times:
+
+    chain   clean_md -> exam_gen -> dum_gen over the markdown dumps
+    fused   pipeline.run_pipeline over the markdown dumps
+    ndjson  json_ingest over the NDJSON exports
+    page    json_ingest over the page files
+
+and checks that every JSON run writes byte-identical silver, exam and
+answer files to the chain.
+
+Usage:
+    python src/bench_json_ingest.py
+    python src/bench_json_ingest.py --files 4 --questions 20000 --comments 40 --output bench_results/json.json
+"""
+import argparse
+import filecmp
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import json_ingest
+import pipeline
+from bench_pipeline import run_chain
+from synth_corpus import DEFAULT_EXAMS, iter_question_data, write_dump
+
+
+def write_exports(folder: Path, name: str, questions: int, seed: int, comments: int) -> None:
+    """Write one exam as <name>.md, <name>.ndjson and <name>.json with the same questions."""
+    exams = DEFAULT_EXAMS[:1]
+    write_dump(folder / "md" / f"{name}.md", questions=questions, seed=seed, comments=comments,
+               exams=exams)
+    (folder / "ndjson").mkdir(parents=True, exist_ok=True)
+    (folder / "page").mkdir(parents=True, exist_ok=True)
+    with open(folder / "ndjson" / f"{name}.ndjson", 'w', encoding='utf-8') as nd, \
+            open(folder / "page" / f"{name}.json", 'w', encoding='utf-8') as page:
+        page.write('{"pageProps": {"questions": [')
+        for i, record in enumerate(iter_question_data(questions, seed, comments, exams)):
+            line = json.dumps(record, ensure_ascii=False)
+            nd.write(line)
+            nd.write('\n')
+            page.write(',\n' if i else '\n')
+            page.write(line)
+        page.write('\n]}}\n')
+
+
+def timed(fn: Callable[[], object], repeat: int, memory: bool) -> Dict[str, float]:
+    """Best wall time of repeat runs; with memory, the peak traced memory of one more run."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    result = {"seconds": best}
+    if memory:
+        tracemalloc.start()
+        fn()
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    return result
+
+
+def same_outputs(a: Path, b: Path) -> bool:
+    """True if the silver, exam and answers folders under a and b hold identical files."""
+    for sub in ("silver", "exam", "answers"):
+        names = sorted(p.name for p in (a / sub).iterdir())
+        if names != sorted(p.name for p in (b / sub).iterdir()):
+            return False
+        _, mismatch, errors = filecmp.cmpfiles(a / sub, b / sub, names, shallow=False)
+        if mismatch or errors:
+            return False
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Compare direct JSON ingest with the markdown path.")
+    p.add_argument("--files", type=int, default=4, help="number of exams (default: %(default)s)")
+    p.add_argument("--questions", type=int, default=5000,
+                   help="questions per exam (default: %(default)s)")
+    p.add_argument("--comments", type=int, default=20,
+                   help="discussion comments per question (default: %(default)s)")
+    p.add_argument("--chunk-size", type=int, default=json_ingest.CHUNK_SIZE,
+                   help="JSON read size in characters (default: %(default)s)")
+    p.add_argument("--repeat", type=int, default=3, help="timed repetitions (default: %(default)s)")
+    p.add_argument("--memory", action="store_true",
+                   help="also report peak traced memory, from an extra untimed run")
+    p.add_argument("--output", type=Path, help="write the results as JSON")
+    args = p.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        data = root / "data"
+        for i in range(args.files):
+            write_exports(data, f"exam-{i:03d}", args.questions, i, args.comments)
+        sizes = {kind: sum(f.stat().st_size for f in (data / kind).iterdir()) / 1024 / 1024
+                 for kind in ("md", "ndjson", "page")}
+        print(f"corpus: {args.files} exam(s) x {args.questions} question(s), {args.comments} comment(s) each; "
+              + ", ".join(f"{kind} {mb:.1f} MB" for kind, mb in sizes.items()))
+
+        def outputs(case: str):
+            out = root / case
+            return out / "silver", out / "exam", out / "answers"
+
+        cases = {
+            "chain": lambda: run_chain(data / "md", root / "chain", False),
+            "fused": lambda: pipeline.run_pipeline(data / "md", *outputs("fused")),
+            "ndjson": lambda: json_ingest.ingest(data / "ndjson", *outputs("ndjson"),
+                                                 chunk_size=args.chunk_size),
+            "page": lambda: json_ingest.ingest(data / "page", *outputs("page"),
+                                               chunk_size=args.chunk_size),
+        }
+        results = {}
+        for case, fn in cases.items():
+            results[case] = timed(fn, args.repeat, args.memory)
+            source = sizes["md"] if case in ("chain", "fused") else sizes[case]
+            results[case]["mb_per_s"] = source / results[case]["seconds"]
+        identical = {case: same_outputs(root / "chain", root / case) for case in ("fused", "ndjson", "page")}
+
+    print(f"{'case':>8} {'seconds':>9} {'input MB/s':>11} {'vs chain':>9}" + (f" {'peak MB':>8}" if args.memory else ""))
+    for case, res in results.items():
+        line = (f"{case:>8} {res['seconds']:>9.2f} {res['mb_per_s']:>11.1f} "
+                f"{results['chain']['seconds'] / res['seconds']:>8.2f}x")
+        if args.memory:
+            line += f" {res['peak_mb']:>8.1f}"
+        print(line)
+    print("identical outputs: " + ", ".join(f"{case} {'yes' if ok else 'NO'}" for case, ok in identical.items()))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()},
+                                           "results": results, "identical": identical}, indent=2),
+                               encoding="utf-8")
+        print(f"✓ Results written to: {args.output}")
+    return 0 if all(identical.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark classify_links' Aho-Corasick matcher against nested loops.
+
+Generates a synthetic provider: --slugs exam slugs with Microsoft-style
+overlaps (az-104 / az-1040, terraform-associate / terraform-associate-003
+style suffixes) and --links discussion links in the ExamTopics URL layout,
+a few percent of them for exams outside the catalog. Then classifies the
+same links with:
+
+    contains   the process_all filter: for every slug, strings.Contains on
+               the lower-cased link (a link lands in every matching bucket)
+    naive      nested loop over slugs with classify_links' token-boundary,
+               longest-match rule (the reference for "aho")
+    aho        classify_links.SlugMatcher, one token scan per link
+
+aho must assign every link exactly like naive; the report also counts the
+links contains puts under a wrong or extra exam. naive is quadratic in
+practice, so it runs on the first --naive-links links only.
+
+Usage:
+    python src/bench_links.py
+    python src/bench_links.py --slugs 50,500,5000 --links 100000 --output bench_results/links.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from classify_links import SlugMatcher, naive_match, tokens
+
+PREFIXES = ("az", "dp", "ai", "pl", "ms", "sc", "md", "mb")
+SUFFIXES = ("associate", "professional", "specialty", "engineer", "developer")
+
+
+def synth_provider(n_slugs: int, n_links: int, seed: int) -> Tuple[List[str], List[Tuple[str, Optional[str]]]]:
+    """
+    Return (slugs, [(link, slug the link belongs to or None)]).
+
+    About a third of the slugs have a longer sibling that starts with them
+    (az-104 / az-1040, x-associate / x-associate-003).
+    """
+    rng = random.Random(seed)
+    slugs: List[str] = []
+    seen = set()
+    while len(slugs) < n_slugs:
+        if rng.random() < 0.5:
+            slug = f"{rng.choice(PREFIXES)}-{rng.randint(100, 999)}"
+        else:
+            slug = f"{rng.choice(PREFIXES)}{rng.randint(1, 99)}-{rng.choice(SUFFIXES)}"
+        for s in (slug, f"{slug}0" if slug[-1].isdigit() else f"{slug}-00{rng.randint(1, 9)}"):
+            if s not in seen and len(slugs) < n_slugs and (s == slug or rng.random() < 0.6):
+                seen.add(s)
+                slugs.append(s)
+    outside = [f"zz-{i}" for i in range(max(1, n_slugs // 20))]
+    links = []
+    for i in range(n_links):
+        slug = rng.choice(outside) if rng.random() < 0.03 else rng.choice(slugs)
+        topic, question = rng.randint(1, 6), rng.randint(1, 400)
+        links.append((f"https://www.examtopics.com/discussions/microsoft/view/{100000 + i}-exam-"
+                      f"{slug}-topic-{topic}-question-{question}-discussion/",
+                      slug if slug in seen else None))
+    return slugs, links
+
+
+def contains_buckets(links: List[str], slugs: List[str]) -> List[List[str]]:
+    """Every slug each link contains as a substring, as process_all's FilterLinksBySlug."""
+    lowered = [s.lower() for s in slugs]
+    return [[s for s in lowered if s in link.lower()] for link in links]
+
+
+def timed(fn: Callable[[], object], count: int, repeat: int) -> Tuple[object, Dict[str, float]]:
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, {"seconds": best, "links_per_s": count / best}
+
+
+def bench(n_slugs: int, n_links: int, naive_links: int, repeat: int, seed: int) -> Dict[str, object]:
+    slugs, truth = synth_provider(n_slugs, n_links, seed)
+    links = [link for link, _ in truth]
+    slug_tokens = [(tokens(s), s) for s in slugs]
+
+    contains, res_contains = timed(lambda: contains_buckets(links, slugs), len(links), repeat)
+    sample = links[:naive_links]
+    naive, res_naive = timed(lambda: [naive_match(link, slug_tokens) for link in sample], len(sample), repeat)
+
+    def aho():
+        matcher = SlugMatcher(slugs)
+        return [matcher.match(link) for link in links]
+    fast, res_aho = timed(aho, len(links), repeat)
+
+    if fast[:len(sample)] != naive:
+        raise AssertionError("aho and naive disagree")
+    wrong = sum(1 for got, (_, want) in zip(fast, truth) if got != want)
+    contains_wrong = sum(1 for got, (_, want) in zip(contains, truth) if got != ([want] if want else []))
+    return {
+        "slugs": len(slugs), "links": len(links), "naive_links": len(sample),
+        "contains": res_contains, "naive": res_naive, "aho": res_aho,
+        "aho_misassigned": wrong, "contains_misassigned": contains_wrong,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark the Aho-Corasick link classifier against nested loops.")
+    p.add_argument("--slugs", default="20,200,2000",
+                   help="comma-separated catalog sizes (default: %(default)s)")
+    p.add_argument("--links", type=int, default=50000, help="links per run (default: %(default)s)")
+    p.add_argument("--naive-links", type=int, default=5000,
+                   help="links the naive loop runs on (default: %(default)s)")
+    p.add_argument("--repeat", type=int, default=3, help="timed repetitions (default: %(default)s)")
+    p.add_argument("--seed", type=int, default=0, help="random seed (default: %(default)s)")
+    p.add_argument("--output", type=Path, help="write the results as JSON")
+    args = p.parse_args(argv)
+
+    run = []
+    print(f"{'slugs':>6} {'case':>9} {'seconds':>9} {'links/s':>11} {'misassigned':>12}")
+    for text in args.slugs.split(','):
+        res = bench(int(text), args.links, args.naive_links, args.repeat, args.seed)
+        run.append(res)
+        for case in ("contains", "naive", "aho"):
+            wrong = {"contains": res["contains_misassigned"], "aho": res["aho_misassigned"]}.get(case, "")
+            print(f"{res['slugs']:>6} {case:>9} {res[case]['seconds']:>9.3f} "
+                  f"{res[case]['links_per_s']:>11,.0f} {wrong:>12}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(run, indent=2), encoding="utf-8")
+        print(f"✓ Results written to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the fused pipeline against the four-stage script chain.
+
+Builds a synthetic raw corpus (several exams with comments, as WriteData
+emits with -c) and times:
+
+    chain: clean_md -> exam_gen -> dum_gen [-> convert_md_to_html]
+    fused: pipeline.run_pipeline (one read per raw file)
+
+HTML is included only with --html and when the markdown package is installed.
+
+Usage:
+    python src/bench_pipeline.py
+    python src/bench_pipeline.py --files 20 --size 8M --html
+"""
+import argparse
+import contextlib
+import io
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import clean_md
+import dum_gen
+import exam_gen
+import pipeline
+from sizes import parse_size
+from synth_corpus import write_dump
+
+
+def run_chain(raw_dir: Path, out: Path, html: bool) -> Dict[str, float]:
+    """Run the four scripts one after another, each reading the previous output."""
+    timings = {"clean": 0.0, "exam": 0.0, "answers": 0.0, "html": 0.0}
+    silver_dir, exam_dir, answers_dir = out / "silver", out / "exam", out / "answers"
+    with contextlib.redirect_stdout(io.StringIO()):
+        for raw in sorted(raw_dir.glob("*.md")):
+            silver = silver_dir / raw.name
+            t = time.perf_counter()
+            clean_md.process_single_file(raw, silver, False)
+            timings["clean"] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            exam_gen.process_exam_file(str(silver), str(exam_dir))
+            timings["exam"] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            dum_gen.process_exam_with_answers(str(silver), str(answers_dir))
+            timings["answers"] += time.perf_counter() - t
+
+            if html:
+                import convert_md_to_html
+                t = time.perf_counter()
+                convert_md_to_html.convert_md_to_html(str(answers_dir / f"{raw.stem}-answers.md"))
+                timings["html"] += time.perf_counter() - t
+    return timings
+
+
+def main(argv: List[str] = None) -> int:
+    p = argparse.ArgumentParser(description="Compare the fused pipeline with the four-stage chain.")
+    p.add_argument("--files", type=int, default=8, help="number of raw exam dumps (default: %(default)s)")
+    p.add_argument("--size", default="4M", help="size of each raw dump (default: %(default)s)")
+    p.add_argument("--comments", type=int, default=20, help="comment lines per question")
+    p.add_argument("--html", action="store_true", help="include HTML rendering (needs markdown)")
+    args = p.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    html = args.html
+    if html:
+        try:
+            import markdown  # noqa: F401
+        except ImportError:
+            print("markdown is not installed; benchmarking without HTML")
+            html = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        raw_dir = root / "raw"
+        raw_dir.mkdir()
+        total_bytes = 0
+        for i in range(args.files):
+            path = raw_dir / f"exam-{i:03d}.md"
+            write_dump(path, target_bytes=parse_size(args.size), seed=i, comments=args.comments)
+            total_bytes += path.stat().st_size
+        print(f"corpus: {args.files} file(s), {total_bytes / 1024 / 1024:.1f} MB raw")
+
+        t = time.perf_counter()
+        timings = run_chain(raw_dir, root / "chain", html)
+        chain_t = time.perf_counter() - t
+
+        t = time.perf_counter()
+        pipeline.run_pipeline(raw_dir, root / "fused" / "silver", root / "fused" / "exam",
+                              root / "fused" / "answers", html=html)
+        fused_t = time.perf_counter() - t
+
+    stages = " + ".join(f"{k} {v:.2f}s" for k, v in timings.items() if v)
+    print(f"chain: {chain_t:7.2f}s  ({stages})")
+    print(f"fused: {fused_t:7.2f}s")
+    print(f"speedup: {chain_t / fused_t:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Parse-time benchmark: per-tool regex parsing vs the shared question IR.
+
+The legacy side (parse_oracles) reproduces what exam_gen and dum_gen used to
+do independently on the same silver file (each splitting on headers and
+running its own regex chain per section). The shared side parses once with question_ir and renders
+both documents from the same records; its parse phase is also timed alone.
+Peak memory is measured with tracemalloc.
+
+Usage:
+    python src/bench_question_ir.py
+    python src/bench_question_ir.py --questions 50000 --repeat 3
+"""
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+import clean_md
+import dum_gen
+import exam_gen
+from exam_gen import QUESTION_SEPARATOR
+from parse_oracles import legacy_answers, legacy_exam, silver_text
+from question_ir import parse_questions
+
+
+def run_legacy(content: str) -> int:
+    """Each tool splits and parses the buffer on its own and builds its document."""
+    exam = QUESTION_SEPARATOR.join(legacy_exam(content))
+    answers = []
+    for parsed in legacy_answers(content):
+        if parsed['question'] and parsed['correct_answers']:
+            output = f"## {parsed['title']}\n\n{parsed['question']}\n\n**Correct Answer(s):**\n\n"
+            for answer in parsed['correct_answers']:
+                output += f"- {answer}\n"
+            answers.append(output)
+    return len(exam) + len(QUESTION_SEPARATOR.join(answers))
+
+
+def run_legacy_parse(content: str) -> int:
+    """Parse phase only of both tools: header split, answer split and field regexes."""
+    count = 0
+    for _ in legacy_answers(content):
+        count += 1
+    header_re = re.compile(r'(?mi)^##\s*question(?:\s+(\d+))?')
+    matches = list(header_re.finditer(content))
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        lines = content[m.start():end].strip().splitlines()
+        body = '\n'.join(lines[1:]).rstrip()
+        re.split(r'\n\*\*Answer:', body, maxsplit=1)
+        count += 1
+    return count
+
+
+def run_shared_parse(content: str) -> int:
+    """Parse phase only: split and extract fields once."""
+    return len(parse_questions(content))
+
+
+def run_shared(content: str) -> int:
+    """Parse once, then render both documents from the same records."""
+    questions = parse_questions(content)
+    exam = exam_gen.render_exam("bench", content, questions)
+    answers, _ = dum_gen.render_answers("bench", questions)
+    return len(exam) + len(answers)
+
+
+def measure(fn: Callable[[str], int], content: str, repeat: int) -> Tuple[float, int]:
+    """Return (best wall seconds, peak traced bytes) for fn(content)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main(argv: List[str] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark per-tool parsing against the shared question IR.")
+    p.add_argument("--questions", type=int, default=20000, help="number of questions")
+    p.add_argument("--repeat", type=int, default=3, help="timed repetitions (best is reported)")
+    args = p.parse_args(argv)
+
+    clean_md.logger.setLevel("WARNING")
+    content = silver_text(args.questions)
+    print(f"silver input: {len(content) / 1024 / 1024:.1f} MB")
+
+    rows = [
+        ("legacy parse only", run_legacy_parse),
+        ("shared parse only", run_shared_parse),
+        ("legacy parse + render", run_legacy),
+        ("shared parse + render", run_shared),
+    ]
+    results = [(label, *measure(fn, content, args.repeat)) for label, fn in rows]
+    
+    print(f"{'path':>22} {'seconds':>9} {'peak MB':>9}")
+    for label, seconds, peak in results:
+        print(f"{label:>22} {seconds:>9.3f} {peak / 1024 / 1024:>9.1f}")
+    print(f"parse speedup: {results[0][1] / results[1][1]:.2f}x, "
+          f"end-to-end speedup: {results[2][1] / results[3][1]:.2f}x")
+    print("note: the shared answer key carries full question stems, so its render output is larger")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the full-text search index: build throughput and query latency.
+
+For each corpus size, generates synthetic raw dumps with synth_corpus, cleans
+them with clean_md into several silver files and measures:
+
+    build        fresh index of the whole corpus (questions/s, MB/s)
+    no-op        re-run on the unchanged corpus (hash checks only)
+    one file     re-run after one file changed
+    queries      latency percentiles of single-word, multi-word, prefix,
+                 exam-filtered and selective queries
+
+The generator draws from a vocabulary of about 60 words, so a common-word
+query matches most of the corpus and BM25 has to score every match: those
+kinds are the worst case and grow with the corpus. The selective kind pairs
+a word with one of the generated numbers, like a real keyword search for a
+specific question, and should stay in the low milliseconds at any size.
+
+Usage:
+    python src/bench_search.py
+    python src/bench_search.py --questions 1000000 --files 20 --output bench_results/search.json
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import clean_md
+import search_index
+from synth_corpus import WORDS, write_dump
+
+
+def make_queries(rng: random.Random, exams: List[str], count: int) -> Dict[str, List[dict]]:
+    """Build count queries of each kind from the synthetic vocabulary."""
+    return {
+        "one word": [{"query": rng.choice(WORDS)} for _ in range(count)],
+        "three words": [{"query": ' '.join(rng.sample(WORDS, 3))} for _ in range(count)],
+        "prefix": [{"query": rng.choice(WORDS)[:3] + '*'} for _ in range(count)],
+        "exam filter": [{"query": ' '.join(rng.sample(WORDS, 2)), "exam": rng.choice(exams)}
+                        for _ in range(count)],
+        "selective": [{"query": f"{rng.randint(2, 500)} {rng.choice(WORDS)} users"}
+                      for _ in range(count)],
+    }
+
+
+def latency(index: search_index.SearchIndex, queries: List[dict], limit: int) -> Dict[str, float]:
+    """Run each query once and return latency percentiles in milliseconds."""
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q["query"], limit, q.get("exam"))
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {"p50_ms": statistics.median(times),
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "max_ms": times[-1]}
+
+
+def bench_size(questions: int, files: int, queries: int, limit: int, workdir: Path) -> Dict:
+    """
+    Build an index over a corpus of the given size and query it.
+
+    Args:
+        questions: Total questions in the corpus
+        files: Number of silver files (one exam each)
+        queries: Queries per kind
+        limit: Hits per query
+        workdir: Scratch folder
+
+    Returns:
+        Mapping of measurement name to its results
+    """
+    silver = workdir / f"silver-{questions}"
+    per_file = max(1, questions // files)
+    for i in range(files):
+        raw = workdir / "raw.md"
+        write_dump(raw, questions=per_file, seed=i)
+        clean_md.process_single_file(raw, silver / f"exam-{i:03d}.md", False)
+        raw.unlink()
+    silver_bytes = sum(f.stat().st_size for f in silver.glob("*.md"))
+
+    db = workdir / f"search-{questions}.sqlite"
+    index = search_index.SearchIndex(str(db))
+    results = {}
+
+    start = time.perf_counter()
+    search_index.build_index([silver], index)
+    elapsed = time.perf_counter() - start
+    total = index.totals()["questions"]
+    results["build"] = {"seconds": elapsed, "questions": total,
+                        "questions_per_s": total / elapsed,
+                        "mb_per_s": silver_bytes / 1024 / 1024 / elapsed,
+                        "index_mb": db.stat().st_size / 1024 / 1024}
+
+    start = time.perf_counter()
+    search_index.build_index([silver], index)
+    results["no-op"] = {"seconds": time.perf_counter() - start}
+
+    changed = silver / "exam-000.md"
+    changed.write_text(changed.read_text(encoding="utf-8")
+                       + "\n## question 999999\n\nA changed question about quokka storage.\n",
+                       encoding="utf-8")
+    start = time.perf_counter()
+    search_index.build_index([silver], index)
+    results["one file"] = {"seconds": time.perf_counter() - start}
+
+    rng = random.Random(0)
+    exams = [f"exam-{i:03d}" for i in range(files)]
+    for kind, qs in make_queries(rng, exams, queries).items():
+        results[f"query {kind}"] = latency(index, qs, limit)
+
+    index.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark search index build throughput and query latency.")
+    p.add_argument("--questions", default="10000,100000",
+                   help="comma-separated corpus sizes, e.g. 100000,1000000 (default: %(default)s)")
+    p.add_argument("--files", type=int, default=8, help="silver files per corpus (default: %(default)s)")
+    p.add_argument("--queries", type=int, default=50, help="queries per kind (default: %(default)s)")
+    p.add_argument("--limit", type=int, default=10, help="hits per query (default: %(default)s)")
+    p.add_argument("--output", type=Path, help="write the results as JSON")
+    args = p.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    sizes = [int(s) for s in args.questions.split(',') if s.strip()]
+
+    run = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            res = bench_size(n, args.files, args.queries, args.limit, Path(tmp))
+            run[str(n)] = res
+            b = res["build"]
+            print(f"{n:>9} questions: build {b['seconds']:.2f}s ({b['questions_per_s']:,.0f} q/s, "
+                  f"{b['mb_per_s']:.1f} MB/s, index {b['index_mb']:.1f} MB), "
+                  f"no-op {res['no-op']['seconds']:.3f}s, one file {res['one file']['seconds']:.2f}s")
+            for name, r in res.items():
+                if name.startswith("query"):
+                    print(f"{'':>11}{name:<20} p50 {r['p50_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms  "
+                          f"max {r['max_ms']:7.2f} ms")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(run, indent=2), encoding="utf-8")
+        print(f"✓ Results written to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
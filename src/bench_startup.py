@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark cold start of the cli.py commands against a time budget.
+
+The scheduler runs the tools thousands of times on small files, so the time
+to start the interpreter and import a command's modules matters more than
+throughput. Every case below is a fresh interpreter process:
+
+    python        "python -c pass", the floor no command can go below
+    help          "cli.py --help"
+    <cmd> --help  start-up and imports of one command, no work
+    <cmd> small   one command on a 20-question synthetic file
+
+Each case runs --runs times after one warm-up run. The median wall time of
+the start-up cases (python, help, --help) is compared against --budget, that
+of the small runs against --run-budget; html's includes importing markdown
+and its extensions, about 50 ms on its own. A separate "-X importtime" run
+of every small case checks that optional and heavy modules (markdown,
+pyarrow, multiprocessing) are only imported by the commands that need them.
+
+Usage:
+    python src/bench_startup.py
+    python src/bench_startup.py --runs 50 --budget 120 --run-budget 250 \
+        --output bench_results/startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from cli import COMMANDS
+from synth_corpus import write_dump
+
+CLI = Path(__file__).resolve().parent / "cli.py"
+
+# Median wall time allowed per case, in milliseconds
+DEFAULT_BUDGET_MS = 150.0
+DEFAULT_RUN_BUDGET_MS = 300.0
+
+# Module -> commands allowed to import it on a small single-file run
+LAZY_MODULES: Dict[str, Set[str]] = {
+    "markdown": {"html"},
+    "pyarrow": set(),
+    "numpy": set(),
+    "multiprocessing": set(),
+}
+
+
+def small_cases(workdir: Path) -> Dict[str, List[str]]:
+    """Prepare a small corpus in workdir and return the command line of each small run."""
+    raw = workdir / "raw" / "small.md"
+    silver = workdir / "silver" / "small.md"
+    raw.parent.mkdir(parents=True, exist_ok=True)
+    write_dump(raw, questions=20, seed=0)
+    cases = {
+        "clean": ["clean", str(raw), "-o", str(silver)],
+        "exam": ["exam", str(silver), "-o", str(workdir / "exam")],
+        "answers": ["answers", str(silver), "-o", str(workdir / "answers")],
+        "html": ["html", str(workdir / "answers" / "small-answers.md")],
+        "strip-links": ["strip-links", str(raw), "-o", str(workdir / "stripped.md")],
+    }
+    # The later stages read the earlier stages' outputs
+    for name in ("clean", "answers"):
+        run_cli(cases[name])
+    return cases
+
+
+def run_cli(args: List[str], python_args: List[str] = ()) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *python_args, str(CLI), *args],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+
+def time_case(cmd: List[str], runs: int) -> Dict[str, float]:
+    """Run cmd once to warm up, then runs times; return wall-time statistics in milliseconds."""
+    times = []
+    for i in range(runs + 1):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(f"exit code {proc.returncode}: {' '.join(cmd)}")
+        if i:
+            times.append(elapsed)
+    return {"median_ms": statistics.median(times), "min_ms": min(times), "max_ms": max(times)}
+
+
+def imported_modules(args: List[str]) -> Set[str]:
+    """Top-level packages imported by one cli.py run, from -X importtime."""
+    proc = run_cli(args, ["-X", "importtime"])
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and line.count('|') == 2:
+            name = line.rsplit('|', 1)[1].strip()
+            modules.add(name.split('.')[0])
+    return modules
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark cli.py cold start against a time budget.")
+    p.add_argument("--runs", type=int, default=20, help="timed runs per case (default: %(default)s)")
+    p.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, metavar="MS",
+                   help="median cold start allowed per command (default: %(default)g ms)")
+    p.add_argument("--run-budget", type=float, default=DEFAULT_RUN_BUDGET_MS, metavar="MS",
+                   help="median time allowed per small run (default: %(default)g ms)")
+    p.add_argument("--output", type=Path, help="write the results as JSON")
+    args = p.parse_args(argv)
+
+    python = [sys.executable]
+    results: Dict[str, Dict[str, float]] = {}
+    failures: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = {"python": python + ["-c", "pass"], "help": python + [str(CLI), "--help"]}
+        cases.update((f"{name} --help", python + [str(CLI), name, "--help"]) for name in COMMANDS)
+        small = small_cases(Path(tmp))
+        cases.update((f"{name} small", python + [str(CLI), *cmd]) for name, cmd in small.items())
+
+        print(f"{'case':>22} {'median':>9} {'min':>9} {'max':>9}")
+        for case, cmd in cases.items():
+            try:
+                res = time_case(cmd, args.runs)
+            except RuntimeError as e:
+                failures.append(f"{case}: {e}")
+                continue
+            results[case] = res
+            budget = args.run_budget if case.endswith(" small") else args.budget
+            over = res["median_ms"] > budget
+            print(f"{case:>22} {res['median_ms']:>7.1f}ms {res['min_ms']:>7.1f}ms "
+                  f"{res['max_ms']:>7.1f}ms{'  over budget' if over else ''}")
+            if over:
+                failures.append(f"{case}: median {res['median_ms']:.1f} ms > {budget:g} ms")
+
+        for name, cmd in small.items():
+            modules = imported_modules(cmd)
+            for module, allowed in LAZY_MODULES.items():
+                if module in modules and name not in allowed:
+                    failures.append(f"{name} small: imports {module}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"budget_ms": args.budget, "run_budget_ms": args.run_budget,
+                                           "results": results}, indent=2), encoding="utf-8")
+        print(f"✓ Results written to: {args.output}")
+
+    if failures:
+        print(f"✗ {len(failures)} failure(s):")
+        for msg in failures:
+            print(f"  {msg}")
+        return 1
+    print(f"✓ Every command starts within {args.budget:g} ms and runs a small file "
+          f"within {args.run_budget:g} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
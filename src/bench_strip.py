@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark remove_url's link stripper against a plain copy of the same file.
+
+For each dump size, generates a synthetic raw dump with synth_corpus and
+measures, on the same file:
+
+    copy      shutil.copyfile, the bandwidth ceiling for any rewrite
+    scan      strip_file --dry-run, one regex pass over the mapping
+    strip     strip_file to a new file (mmap, one pass, fsync, rename)
+    legacy    the previous implementation: decode, findall, sub, encode,
+              write (skipped above --legacy-max, it holds several copies
+              of the dump in memory)
+
+The dump is written just before the runs, so all of them read from the page
+cache; the copy row shows what the disk and cache sustain on this machine.
+
+Usage:
+    python src/bench_strip.py
+    python src/bench_strip.py --size 256M,2G --output bench_results/strip.json
+"""
+import argparse
+import json
+import logging
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from remove_url import strip_file
+from sizes import parse_size
+from synth_corpus import write_dump
+
+LEGACY_RE = re.compile(r"\*\*Timestamp:[\s\S]*?/\)")
+
+
+def legacy_strip(input_path: Path, output_path: Path) -> int:
+    """remove_url before the mmap rewrite: two regex passes over decoded text."""
+    content = input_path.read_text(encoding="utf-8")
+    removed = len(LEGACY_RE.findall(content))
+    if removed:
+        content = LEGACY_RE.sub('', content)
+    tmp = output_path.with_suffix(".tmp")
+    tmp.write_text(content, encoding="utf-8")
+    shutil.move(str(tmp), str(output_path))
+    return removed
+
+
+def timed(fn: Callable[[], object], size: int, repeat: int) -> Dict[str, float]:
+    """Best of repeat runs of fn, with throughput over size bytes."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best, "mb_per_s": size / 1024 / 1024 / best}
+
+
+def bench_size(size: int, repeat: int, legacy_max: int, workdir: Path) -> Dict[str, Dict[str, float]]:
+    dump = workdir / "dump.md"
+    write_dump(dump, target_bytes=size, seed=0)
+    actual = dump.stat().st_size
+    out = workdir / "out.md"
+    results = {
+        "copy": timed(lambda: shutil.copyfile(dump, out), actual, repeat),
+        "scan": timed(lambda: strip_file(dump, dry_run=True), actual, repeat),
+        "strip": timed(lambda: strip_file(dump, out), actual, repeat),
+    }
+    if actual <= legacy_max:
+        results["legacy"] = timed(lambda: legacy_strip(dump, out), actual, repeat)
+    for path in workdir.iterdir():
+        path.unlink()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark the mmap link stripper against a plain copy.")
+    p.add_argument("--size", default="64M,512M",
+                   help="comma-separated dump sizes, e.g. 256M,2G (default: %(default)s)")
+    p.add_argument("--repeat", type=int, default=3, help="timed repetitions (default: %(default)s)")
+    p.add_argument("--legacy-max", type=parse_size, default=parse_size("1G"), metavar="SIZE",
+                   help="largest dump to run the legacy implementation on (default: 1G)")
+    p.add_argument("--output", type=Path, help="write the results as JSON")
+    args = p.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    run = {}
+    print(f"{'size':>8} {'case':>8} {'seconds':>9} {'MB/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for text in args.size.split(','):
+            size = parse_size(text.strip())
+            res = bench_size(size, args.repeat, args.legacy_max, Path(tmp))
+            run[text.strip()] = res
+            for case, r in res.items():
+                print(f"{text.strip():>8} {case:>8} {r['seconds']:>9.3f} {r['mb_per_s']:>9.1f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(run, indent=2), encoding="utf-8")
+        print(f"✓ Results written to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
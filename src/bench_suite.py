@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark harness for the Python processing stages.
+
+Generates synthetic corpora with synth_corpus at each requested size and
+times and memory-profiles every stage separately:
+
+    split_into_sections         clean_md, raw dump -> sections
+    clean_section_text          clean_md, every raw section
+    parse_question_with_answer  dum_gen, every silver section
+    process_exam_file           exam_gen, silver file -> -exam.md
+    html                        convert_md_to_html, answer key -> page
+                                (skipped when markdown is not installed)
+
+Results are written as JSON. Save one run as the baseline and compare later
+runs against it to catch regressions.
+
+Usage:
+    python src/bench_suite.py --save-baseline bench_results/baseline.json
+    python src/bench_suite.py --baseline bench_results/baseline.json
+    python src/bench_suite.py --questions 100,10000,1000000 --output bench_results/latest.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import clean_md
+import dum_gen
+import exam_gen
+from question_ir import parse_questions
+from synth_corpus import write_dump
+
+RESULTS_FORMAT = 1
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    Time fn (best of repeat runs) and record its tracemalloc peak in a separate run.
+
+    Returns:
+        Dict with "seconds" and "peak_bytes"
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def bench_size(questions: int, comments: int, repeat: int, workdir: Path) -> Dict[str, Dict[str, float]]:
+    """
+    Run every stage on a corpus of the given size.
+
+    Args:
+        questions: Number of generated questions
+        comments: Comments per question
+        repeat: Timed repetitions per stage
+        workdir: Scratch folder for generated files
+
+    Returns:
+        Mapping of stage name to its measurement
+    """
+    raw_path = workdir / f"raw-{questions}.md"
+    silver_path = workdir / f"silver-{questions}.md"
+    write_dump(raw_path, questions=questions, comments=comments)
+    raw = raw_path.read_text(encoding="utf-8")
+    clean_md.process_single_file(raw_path, silver_path, False)
+    silver = silver_path.read_text(encoding="utf-8")
+
+    raw_sections = [body for qnum, body in clean_md.split_into_sections(raw) if qnum != "__preamble__"]
+    silver_sections = [q.text() for q in parse_questions(silver, with_fields=False)]
+    answers, _ = dum_gen.render_answers(silver_path.stem, parse_questions(silver))
+
+    def run_exam():
+        with contextlib.redirect_stdout(io.StringIO()):
+            exam_gen.process_exam_file(str(silver_path), str(workdir / "exam"))
+
+    stages: Dict[str, Callable[[], object]] = {
+        "split_into_sections": lambda: clean_md.split_into_sections(raw),
+        "clean_section_text": lambda: [clean_md.clean_section_text(s, False) for s in raw_sections],
+        "parse_question_with_answer": lambda: [dum_gen.parse_question_with_answer(s)
+                                               for s in silver_sections],
+        "process_exam_file": run_exam,
+    }
+    try:
+        import markdown
+        from convert_md_to_html import markdown_to_html_page
+        stages["html"] = lambda: markdown_to_html_page(markdown, answers, "bench")
+    except ImportError:
+        pass
+
+    results = {}
+    for name, fn in stages.items():
+        results[name] = measure(fn, repeat)
+        results[name]["input_bytes"] = len(raw.encode("utf-8"))
+
+    raw_path.unlink()
+    silver_path.unlink()
+    return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compare two result sets.
+
+    Args:
+        current: Results of this run
+        baseline: Previously saved results
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        Human-readable regression messages; empty if none
+    """
+    regressions = []
+    for key, cur in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if base[metric] and cur[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {base[metric]:.4g} -> {cur[metric]:.4g} "
+                                   f"(+{(cur[metric] / base[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Time and memory-profile each Python processing stage.")
+    p.add_argument("--questions", default="100,1000,10000",
+                   help="comma-separated corpus sizes in questions (default: %(default)s)")
+    p.add_argument("--comments", type=int, default=10, help="comments per question (default: %(default)s)")
+    p.add_argument("--repeat", type=int, default=3, help="timed repetitions per stage (default: %(default)s)")
+    p.add_argument("--output", type=Path, help="write this run's results as JSON")
+    p.add_argument("--save-baseline", type=Path, help="write this run's results as the new baseline")
+    p.add_argument("--baseline", type=Path, help="compare against a saved baseline")
+    p.add_argument("--tolerance", type=float, default=0.2,
+                   help="allowed relative regression before failing (default: %(default)s)")
+    args = p.parse_args(argv)
+
+    clean_md.logger.setLevel(logging.WARNING)
+    sizes = [int(s) for s in args.questions.split(',') if s.strip()]
+
+    run = {
+        "version": RESULTS_FORMAT,
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "comments": args.comments,
+        },
+        "results": {},
+    }
+
+    print(f"{'stage':>28} {'questions':>10} {'seconds':>10} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            for stage, res in bench_size(n, args.comments, args.repeat, Path(tmp)).items():
+                run["results"][f"{stage}@{n}"] = res
+                print(f"{stage:>28} {n:>10} {res['seconds']:>10.4f} {res['peak_bytes'] / 1024 / 1024:>9.2f}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(run, indent=2, sort_keys=True), encoding="utf-8")
+            print(f"✓ Results written to: {path}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(run, baseline, args.tolerance)
+        if regressions:
+            print(f"✗ {len(regressions)} regression(s) against {args.baseline}:")
+            for msg in regressions:
+                print(f"  {msg}")
+            return 1
+        print(f"✓ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
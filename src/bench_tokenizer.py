@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Adversarial benchmark: legacy per-section regexes vs the line tokenizer.
+
+The legacy side is dum_gen.parse_question_with_answer and exam_gen's prompt
+cleanup as they were before question_ir (see parse_oracles). Their
+(?mi)^\\s*Suggested Answer:.*$ pass restarts at every line of a whitespace
+run and rescans the rest of the run whenever no suggested answer follows it,
+so one question padded with blank lines costs quadratic time. Each case below
+grows a single question section and times both sides; legacy runs stop once
+one exceeds --max-seconds.
+
+Cases (parse_oracles.CASES):
+    blank-lines       n empty lines inside the question text
+    space-lines       n whitespace-only lines (spaces and tabs)
+    padded-comments   comment block padded with n empty lines
+    option-flood      n option lines (linear on both sides, for reference)
+
+Usage:
+    python src/bench_tokenizer.py
+    python src/bench_tokenizer.py --sizes 1000,4000,16000,64000 --max-seconds 20
+"""
+import argparse
+import sys
+import time
+from typing import Callable, List
+
+import dum_gen
+import exam_gen
+from parse_oracles import CASES, legacy_answers, legacy_exam
+from question_ir import parse_questions
+
+def run_legacy(content: str) -> None:
+    list(legacy_answers(content))
+    list(legacy_exam(content))
+
+
+def run_tokenizer(content: str) -> None:
+    dum_gen.render_answers("bench", parse_questions(content))
+    exam_gen.render_exam("bench", content, parse_questions(content, with_fields=False))
+
+
+def timed(fn: Callable[[str], None], content: str) -> float:
+    start = time.perf_counter()
+    fn(content)
+    return time.perf_counter() - start
+
+
+def main(argv: List[str] = None) -> int:
+    p = argparse.ArgumentParser(description="Worst-case parse time: legacy regexes vs the line tokenizer.")
+    p.add_argument("--sizes", default="1000,2000,4000,8000,16000,32000",
+                   help="comma-separated case sizes in lines (default: %(default)s)")
+    p.add_argument("--cases", default=",".join(CASES),
+                   help="comma-separated cases to run (default: all)")
+    p.add_argument("--max-seconds", type=float, default=10.0,
+                   help="stop legacy runs for a case after one takes this long (default: %(default)s)")
+    args = p.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    print(f"{'case':>16} {'lines':>8} {'KB':>8} {'legacy s':>10} {'tokenizer s':>12} {'speedup':>9}")
+    for name in (c.strip() for c in args.cases.split(',') if c.strip()):
+        build = CASES[name]
+        legacy_done = False
+        for n in sizes:
+            content = build(n)
+            new_t = timed(run_tokenizer, content)
+            legacy = "skipped"
+            speedup = ""
+            if not legacy_done:
+                old_t = timed(run_legacy, content)
+                legacy = f"{old_t:.4f}"
+                speedup = f"{old_t / new_t:.1f}x"
+                legacy_done = old_t > args.max_seconds
+            print(f"{name:>16} {n:>8} {len(content) / 1024:>8.0f} {legacy:>10} {new_t:>12.4f} {speedup:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
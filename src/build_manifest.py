@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Content-hash build manifest for incremental batch runs.
+
+Records, for every output produced from a raw input, the input's SHA-256,
+size and mtime together with the tool version and the options used. A later
+run can then skip inputs whose content and options are unchanged, and prune
+outputs whose input has disappeared.
+
+The manifest is a JSON file stored next to the outputs, e.g.
+data/silver/.clean_md_manifest.json:
+
+    {
+      "version": 1,
+      "tool": "clean_md",
+      "tool_version": "1",
+      "entries": {
+        "aws/sap-c02.md": {"sha256": "...", "size": 123, "mtime_ns": 456,
+                           "options": {"remove_topic": false}}
+      }
+    }
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_FORMAT = 1
+
+# Read size for hashing inputs
+HASH_CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Hash a file's content without loading it into memory.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_key(path: Path) -> str:
+    """
+    Store key for an input file: its resolved absolute path.
+
+    The same file gets the same key whatever the working directory, so the
+    stores of dedup, search_index, export_questions and catalog never index
+    it twice, and a folder's keys share its own key as prefix.
+    """
+    return path.resolve().as_posix()
+
+
+class BuildManifest:
+    """
+    Persistent record of which inputs produced which outputs, and how.
+
+    Args:
+        path: Location of the JSON manifest file
+        tool: Name of the tool owning the manifest
+        tool_version: Version string; bumping it invalidates every entry
+        options: Options that affect output content (e.g. remove_topic)
+    """
+
+    def __init__(self, path: Path, tool: str, tool_version: str, options: Dict[str, Any]):
+        self.path = path
+        self.tool = tool
+        self.tool_version = tool_version
+        self.options = dict(options)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            return
+        if (data.get("version") != MANIFEST_FORMAT or data.get("tool") != self.tool
+                or data.get("tool_version") != self.tool_version):
+            logger.info(f"Manifest {self.path} is from another version; rebuilding all")
+            return
+        self.entries = data.get("entries", {})
+
+    def check(self, key: str, input_path: Path, output_path: Path) -> Tuple[bool, Optional[str]]:
+        """
+        Decide whether an input can be skipped.
+
+        Args:
+            key: Manifest key, usually the input path relative to the input root
+            input_path: Raw input file
+            output_path: Output file the input maps to
+
+        Returns:
+            Tuple of (fresh, digest). digest is the input's SHA-256 when it had
+            to be computed, or None when size and mtime already matched.
+
+        Notes:
+            - Matching size and mtime_ns is trusted without reading the file
+            - Otherwise the content hash decides, so touched-but-unchanged
+              files are still hits
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry.get("options") != self.options or not output_path.exists():
+            self.misses += 1
+            return False, None
+
+        st = input_path.stat()
+        if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            self.hits += 1
+            return True, None
+
+        digest = file_sha256(input_path)
+        if digest == entry.get("sha256"):
+            # Content unchanged; refresh the stat fields so the next run is cheap
+            entry["size"] = st.st_size
+            entry["mtime_ns"] = st.st_mtime_ns
+            self.hits += 1
+            return True, digest
+
+        self.misses += 1
+        return False, digest
+
+    def record(self, key: str, input_path: Path, digest: Optional[str] = None) -> None:
+        """
+        Record a successfully built input.
+
+        Args:
+            key: Manifest key
+            input_path: Raw input file
+            digest: Precomputed SHA-256, hashed from disk if None
+        """
+        st = input_path.stat()
+        self.entries[key] = {
+            "sha256": digest or file_sha256(input_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "options": self.options,
+        }
+
+    def prune(self, live_keys: Iterable[str], output_root: Path) -> List[Path]:
+        """
+        Remove outputs whose input no longer exists.
+
+        Args:
+            live_keys: Keys of all inputs present in this run
+            output_root: Folder the keys are relative to on the output side
+
+        Returns:
+            List of output paths that were deleted
+        """
+        live = set(live_keys)
+        removed = []
+        for key in [k for k in self.entries if k not in live]:
+            output_path = output_root / key
+            if output_path.exists():
+                output_path.unlink()
+                removed.append(output_path)
+            del self.entries[key]
+        return removed
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_FORMAT,
+            "tool": self.tool,
+            "tool_version": self.tool_version,
+            "entries": self.entries,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
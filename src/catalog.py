@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+Certification catalog: every exam list, certification CSV and link file in one store.
+
+The downloader's batch mode (cmd/process_all) takes one provider at a time,
+either as an exam list (-exams) or as a certification CSV (-csv). This tool
+ingests all three source shapes into one SQLite store keyed by provider and
+slug, and emits a <provider>_cert.csv per provider in the exact format
+process_all -csv reads:
+
+    <provider>_exams.txt   one "slug" or "slug:code" per line, "#" comments
+    <provider>_cert.csv    Platform,Certification Title,Certification Code,
+                           Certification Slug,Certification link
+    <provider>-link.txt    one exam URL per line, as for process_link.py
+                           (https://www.examtopics.com/exams/<provider>/<slug>/);
+                           other URLs, such as discussion links, are skipped
+
+- The provider of a list comes from its file name; CSV rows and links carry it
+- An exam listed by several sources appears once; a certification CSV wins
+  over an exam list, which wins over a link file, because each carries more
+  curated data than the next (titles, then codes)
+- Re-runs skip sources whose SHA-256 is unchanged and replace the rows of
+  changed ones; sources deleted from a folder input are dropped, and only
+  CSVs whose content changed are rewritten
+
+Usage:
+    python src/catalog.py build input/ --out data/catalog
+    python src/catalog.py build input/ results/link/ --db data/catalog.sqlite
+    python src/catalog.py lookup amazon saa-c03
+"""
+import argparse
+import csv
+import io
+import logging
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from build_manifest import file_key, file_sha256
+from process_link import CSV_HEADER, exam_code, exam_title
+
+CATALOG_FORMAT = 2
+
+DEFAULT_DB = "data/catalog.sqlite"
+
+# Source kinds by file name, in order of precedence (lower rank wins)
+SOURCE_KINDS = (
+    ("csv", re.compile(r'^(?P<provider>[\w.-]+?)_cert\.csv$', re.I)),
+    ("list", re.compile(r'^(?P<provider>[\w.-]+?)_exams\.txt$', re.I)),
+    ("links", re.compile(r'^(?P<provider>[\w.-]+?)-link\.txt$', re.I)),
+)
+RANK = {kind: rank for rank, (kind, _) in enumerate(SOURCE_KINDS)}
+
+EXAM_URL_RE = re.compile(r'^https?://(?:www\.)?examtopics\.com/exams/([^/\s]+)/([^/\s]+)/?$', re.I)
+EXAM_URL = "https://www.examtopics.com/exams/{provider}/{slug}/"
+
+# Entry columns after provider and slug, in CSV order
+Entry = Tuple[str, str, str, str]  # platform, title, code, link
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL,
+    rank INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    source_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    provider TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    title TEXT NOT NULL,
+    code TEXT NOT NULL,
+    link TEXT NOT NULL,
+    PRIMARY KEY (provider, slug, source_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source_id);
+"""
+
+# One row per (provider, slug): the entry of the best-ranked source, first line first
+CATALOG_SQL = """
+SELECT provider, slug, platform, title, code, link FROM (
+    SELECT e.*, s.rank, s.path, ROW_NUMBER() OVER (
+        PARTITION BY e.provider, e.slug ORDER BY s.rank, s.path, e.line) AS pick
+    FROM entries e JOIN sources s ON s.id = e.source_id
+    {where}
+) WHERE pick = 1 ORDER BY provider, {order}
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def source_kind(path: Path) -> Optional[Tuple[str, str]]:
+    """Return (kind, provider) of a catalog source file, or None for other files."""
+    for kind, pattern in SOURCE_KINDS:
+        m = pattern.match(path.name)
+        if m:
+            return kind, m.group("provider").lower()
+    return None
+
+
+def platform_name(provider: str) -> str:
+    return provider.capitalize()
+
+
+def parse_exam_list(text: str, provider: str) -> Iterator[Tuple[int, str, Entry]]:
+    """
+    Parse an exam list as process_all -exams does: "slug" or "slug:code" per line.
+
+    Yields:
+        (line number, slug, entry)
+    """
+    platform = platform_name(provider)
+    for lineno, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        slug, _, code = line.partition(':')
+        slug, code = slug.strip(), code.strip()
+        if not slug:
+            continue
+        code = code or slug
+        yield lineno, slug, (platform, f"{platform} {code}", code,
+                             EXAM_URL.format(provider=provider, slug=slug))
+
+
+def parse_cert_csv(text: str, provider: str) -> Iterator[Tuple[int, str, Entry]]:
+    """
+    Parse a certification CSV; rows without code or slug are skipped, as by process_all.
+
+    Yields:
+        (line number, slug, entry)
+    """
+    rows = csv.reader(io.StringIO(text))
+    next(rows, None)  # header
+    for lineno, row in enumerate(rows, 2):
+        if len(row) < 4:
+            continue
+        platform, title, code, slug = (field.strip() for field in row[:4])
+        if not code or not slug:
+            continue
+        link = row[4].strip() if len(row) > 4 and row[4].strip() else EXAM_URL.format(
+            provider=provider, slug=slug)
+        yield lineno, slug, (platform or platform_name(provider), title or f"{platform} {code}",
+                             code, link)
+
+
+def parse_link_file(text: str) -> Iterator[Tuple[int, str, str, Entry]]:
+    """
+    Parse exam links the way process_link.py does.
+
+    Yields:
+        (line number, provider, slug, entry); the provider comes from each URL
+    """
+    for lineno, line in enumerate(text.splitlines(), 1):
+        m = EXAM_URL_RE.match(line.strip())
+        if not m:
+            continue
+        provider, slug = m.group(1).lower(), m.group(2)
+        platform = platform_name(provider)
+        yield lineno, provider, slug, (platform, exam_title(platform, slug), exam_code(slug),
+                                       line.strip())
+
+
+def parse_source(path: Path, kind: str, provider: str) -> List[Tuple]:
+    """Rows (line, provider, slug, platform, title, code, link) of one source file."""
+    text = path.read_text(encoding='utf-8-sig')
+    if kind == "links":
+        return [(lineno, prov, slug.lower()) + entry for lineno, prov, slug, entry in parse_link_file(text)]
+    parse = parse_cert_csv if kind == "csv" else parse_exam_list
+    return [(lineno, provider, slug.lower()) + entry for lineno, slug, entry in parse(text, provider)]
+
+
+class CatalogStore:
+    """
+    SQLite store of catalog entries, indexed by provider and slug.
+
+    Args:
+        path: SQLite database file (created if missing), or ":memory:"
+
+    Notes:
+        - Each source keeps its own rows; the catalog view picks one entry
+          per (provider, slug) by source precedence (see CATALOG_SQL)
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        expected = {"format": str(CATALOG_FORMAT)}
+        stored = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if not stored:
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", expected.items())
+            self.conn.commit()
+        elif stored != expected:
+            raise ValueError(f"{path} was written with different settings {stored}; "
+                             f"delete it to build again")
+
+    def source_state(self, key: str) -> Optional[Tuple[int, str]]:
+        """Return (source_id, sha256) of an ingested source, or None."""
+        return self.conn.execute("SELECT id, sha256 FROM sources WHERE path = ?", (key,)).fetchone()
+
+    def sources(self, prefix: str = "") -> Dict[str, int]:
+        """Map the key of every ingested source under prefix to its source_id."""
+        like = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return dict(self.conn.execute("SELECT path, id FROM sources WHERE path LIKE ? ESCAPE '\\'",
+                                      (like,)))
+
+    def providers_of(self, source_id: int) -> List[str]:
+        return [p for p, in self.conn.execute(
+            "SELECT DISTINCT provider FROM entries WHERE source_id = ?", (source_id,))]
+
+    def drop_source(self, source_id: int) -> List[str]:
+        """Delete a source and its entries; return the providers it listed."""
+        providers = self.providers_of(source_id)
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE source_id = ?", (source_id,))
+            self.conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+        return providers
+
+    def replace_source(self, key: str, digest: str, rank: int, rows: List[Tuple]) -> List[str]:
+        """
+        Replace the entries of one source in a single transaction.
+
+        Args:
+            key: Source key from build_manifest.file_key()
+            digest: SHA-256 of the file content
+            rank: Precedence of the source kind (RANK)
+            rows: Output of parse_source(); repeated slugs keep their first line
+
+        Returns:
+            Providers listed before or after the update
+        """
+        with self.conn:
+            self.conn.execute("INSERT INTO sources (path, sha256, rank) VALUES (?, ?, ?) "
+                              "ON CONFLICT (path) DO UPDATE SET sha256 = excluded.sha256, "
+                              "rank = excluded.rank", (key, digest, rank))
+            source_id, = self.conn.execute("SELECT id FROM sources WHERE path = ?", (key,)).fetchone()
+            providers = set(self.providers_of(source_id))
+            self.conn.execute("DELETE FROM entries WHERE source_id = ?", (source_id,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO entries (source_id, line, provider, slug, platform, title, code, link) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", ((source_id,) + row for row in rows))
+        return sorted(providers | {row[1] for row in rows})
+
+    def providers(self) -> List[str]:
+        return [p for p, in self.conn.execute("SELECT DISTINCT provider FROM entries ORDER BY provider")]
+
+    def catalog(self, provider: Optional[str] = None, slugs: Optional[List[str]] = None,
+                order: str = "slug") -> List[Tuple]:
+        """
+        Catalog entries, one per (provider, slug).
+
+        Args:
+            provider: Only this provider
+            slugs: Only these slugs (needs provider)
+            order: "slug", or "source" for the order the winning sources list them in
+
+        Returns:
+            Rows of (provider, slug, platform, title, code, link)
+        """
+        clauses, params = [], []
+        if provider is not None:
+            clauses.append("e.provider = ?")
+            params.append(provider.lower())
+        if slugs:
+            clauses.append(f"e.slug IN ({','.join('?' * len(slugs))})")
+            params.extend(s.lower() for s in slugs)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order_by = "slug" if order == "slug" else "rank, path, line"
+        return self.conn.execute(CATALOG_SQL.format(where=where, order=order_by), params).fetchall()
+
+    def totals(self) -> Dict[str, int]:
+        sources, = self.conn.execute("SELECT COUNT(*) FROM sources").fetchone()
+        entries, exams, providers = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT provider || '/' || slug), COUNT(DISTINCT provider) "
+            "FROM entries").fetchone()
+        return {"sources": sources, "entries": entries, "exams": exams, "providers": providers}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def render_cert_csv(rows: List[Tuple]) -> str:
+    """CSV text in the format process_all -csv reads (csv module dialect, CRLF rows)."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER)
+    writer.writerows((platform, title, code, slug, link)
+                     for _, slug, platform, title, code, link in rows)
+    return out.getvalue()
+
+
+def write_csvs(store: CatalogStore, out_dir: Path, providers: List[str], order: str) -> int:
+    """Write <provider>_cert.csv for the given providers if its content changed; return files written."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for provider in providers:
+        path = out_dir / f"{provider}_cert.csv"
+        rows = store.catalog(provider, order=order)
+        if not rows:
+            if path.exists():
+                path.unlink()
+                logger.info(f"✓ {path}: no exams left, removed")
+            continue
+        content = render_cert_csv(rows)
+        try:
+            if path.read_bytes() == content.encode('utf-8'):
+                continue
+        except OSError:
+            pass
+        path.write_bytes(content.encode('utf-8'))
+        written += 1
+        logger.info(f"✓ {path}: {len(rows)} exam(s)")
+    return written
+
+
+def build_catalog(inputs: List[Path], store: CatalogStore) -> Tuple[int, int, List[str]]:
+    """
+    Ingest source files and folders into the store.
+
+    Args:
+        inputs: Source files, or folders searched recursively for them
+        store: Open CatalogStore
+
+    Returns:
+        Tuple of (success_count, total_count, providers whose entries may have changed)
+    """
+    changed: set = set()
+    files: List[Tuple[Path, str, str]] = []
+    for path in inputs:
+        if path.is_dir():
+            found = []
+            for f in sorted(path.rglob("*")):
+                kind = source_kind(f) if f.is_file() else None
+                if kind:
+                    found.append((f,) + kind)
+            files.extend(found)
+            live = {file_key(f) for f, _, _ in found}
+            root = file_key(path)
+            prefix = root.rstrip('/') + '/'
+            for key, source_id in store.sources(prefix).items():
+                if key not in live:
+                    changed.update(store.drop_source(source_id))
+                    logger.info(f"✓ {key}: removed, deleted from the catalog")
+        elif path.is_file():
+            kind = source_kind(path)
+            if kind:
+                files.append((path,) + kind)
+            else:
+                logger.error(f"Not a catalog source (expected *_exams.txt, *_cert.csv or *-link.txt): {path}")
+        else:
+            logger.error(f"Input path does not exist: {path}")
+
+    success_count = 0
+    for path, kind, provider in files:
+        try:
+            key = file_key(path)
+            digest = file_sha256(path)
+            state = store.source_state(key)
+            if state and state[1] == digest:
+                logger.debug(f"✓ {key}: unchanged")
+            else:
+                rows = parse_source(path, kind, provider)
+                changed.update(store.replace_source(key, digest, RANK[kind], rows))
+                logger.info(f"✓ {key}: {len(rows)} {kind} entr{'y' if len(rows) == 1 else 'ies'}")
+            success_count += 1
+        except Exception as e:
+            logger.error(f"Error processing {path}: {e}")
+    return success_count, len(files), sorted(changed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Build the certification catalog and emit process_all -csv files per provider.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Ingest every exam list, certification CSV and link file:
+    %(prog)s build input/ results/link/ --out data/catalog
+
+  Then, per provider:
+    ./process_all -p amazon -csv data/catalog/amazon_cert.csv
+
+  Look exams up:
+    %(prog)s lookup amazon saa-c03 dop-c02
+    %(prog)s lookup google
+        """
+    )
+    p.add_argument("--db", default=DEFAULT_DB, help="SQLite catalog store (default: %(default)s)")
+    p.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="ingest sources and write the per-provider CSVs")
+    b.add_argument("inputs", type=Path, nargs="+", help="source files, or folders containing them")
+    b.add_argument("--out", type=Path, default=Path("data/catalog"),
+                   help="folder for <provider>_cert.csv files (default: %(default)s)")
+    b.add_argument("--order", choices=("source", "slug"), default="source",
+                   help="CSV row order: as listed in the sources, or by slug (default: %(default)s)")
+    b.add_argument("--all", action="store_true",
+                   help="rewrite every provider's CSV, not only those whose sources changed")
+
+    q = sub.add_parser("lookup", help="print catalog entries as CSV")
+    q.add_argument("provider", help="provider, e.g. amazon")
+    q.add_argument("slugs", nargs="*", help="exam slugs (default: every exam of the provider)")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        if args.db != ":memory:":
+            Path(args.db).parent.mkdir(parents=True, exist_ok=True)
+        store = CatalogStore(args.db)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Cannot open catalog {args.db}: {e}")
+        return 1
+
+    try:
+        if args.command == "lookup":
+            rows = store.catalog(args.provider, args.slugs)
+            sys.stdout.write(render_cert_csv(rows).replace('\r\n', '\n'))
+            missing = set(s.lower() for s in args.slugs) - {row[1] for row in rows}
+            for slug in sorted(missing):
+                logger.error(f"Not in the catalog: {args.provider}/{slug}")
+            return 1 if missing or not rows else 0
+
+        start = time.perf_counter()
+        success_count, total_count, changed = build_catalog(args.inputs, store)
+        providers = store.providers() if args.all else changed
+        # A provider whose output file is missing is written even if unchanged
+        providers = sorted(set(providers) | {p for p in store.providers()
+                                             if not (args.out / f"{p}_cert.csv").exists()})
+        written = write_csvs(store, args.out, providers, args.order)
+        totals = store.totals()
+        logger.info(f"Catalog: {totals['exams']} exam(s) of {totals['providers']} provider(s) from "
+                    f"{totals['sources']} source(s) in {time.perf_counter() - start:.2f}s; "
+                    f"{written} CSV file(s) written to {args.out}")
+        return 0 if total_count and success_count == total_count else 1
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
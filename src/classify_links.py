@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Split a provider-wide discussion link dump into per-exam link files.
+
+cmd/process_all can fetch every discussion page of a provider once and then
+filter the links per exam with strings.Contains, which costs links x slugs
+substring scans and puts a link under every slug it contains (az-104 also
+claims the az-1040 links). This stage reads one saved-links file, such as
+examples/google_devops_links.txt, and the provider's slugs from the catalog,
+and assigns every link to at most one exam in a single pass:
+
+- Links and slugs are split into lower-case alphanumeric tokens, so a slug
+  only matches whole tokens: "az-104" never matches inside "az-1040"
+- An Aho-Corasick automaton over the slugs' token sequences finds every
+  slug in a link in one scan of its tokens, whatever the number of slugs
+- When several slugs match (terraform-associate and terraform-associate-003),
+  the longest wins, then the leftmost
+- Repeated links are written once, in input order
+
+Per-exam files are written in the layout process_all -links-dir uses:
+<links-dir>/<code>-link.txt.
+
+Usage:
+    python src/classify_links.py examples/google_devops_links.txt input/google_exams.txt
+    python src/classify_links.py links.txt --db data/catalog.sqlite -p microsoft \
+        --links-dir data/microsoft/links
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog import DEFAULT_DB, CatalogStore, parse_source, source_kind
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokens(text: str) -> Tuple[str, ...]:
+    return tuple(TOKEN_RE.findall(text.lower()))
+
+
+class SlugMatcher:
+    """
+    Aho-Corasick automaton over slug token sequences.
+
+    Args:
+        slugs: Exam slugs; slugs with the same tokens share one entry (the first)
+
+    Notes:
+        - States are dicts from token to next state; fail links point to the
+          longest proper suffix that is also a trie prefix, and each state's
+          outputs include those of its fail chain, so a scan never backtracks
+    """
+
+    def __init__(self, slugs: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        # State -> (token length, slug) of the longest slug ending there, or None
+        self.out: List[Optional[Tuple[int, str]]] = [None]
+        for slug in slugs:
+            toks = tokens(slug)
+            if not toks:
+                continue
+            state = 0
+            for tok in toks:
+                nxt = self.goto[state].get(tok)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][tok] = nxt
+                    self.goto.append({})
+                    self.out.append(None)
+                state = nxt
+            if self.out[state] is None:
+                self.out[state] = (len(toks), slug)
+        self.fail = [0] * len(self.goto)
+        self._link()
+
+    def _link(self) -> None:
+        """Compute fail links breadth first and fold outputs along them."""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for tok, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f and tok not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(tok, 0)
+                # The fail state is shallower, so it already has its folded output;
+                # a state keeps its own slug, which is longer than any suffix
+                if self.out[nxt] is None:
+                    self.out[nxt] = self.out[self.fail[nxt]]
+                queue.append(nxt)
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the longest (then leftmost) slug in text, or None."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        best = None
+        best_len = 0
+        for tok in TOKEN_RE.findall(text.lower()):
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            hit = out[state]
+            # Strictly longer only: among equal lengths the leftmost was seen first
+            if hit is not None and hit[0] > best_len:
+                best_len, best = hit
+        return best
+
+
+def naive_match(text: str, slug_tokens: List[Tuple[Tuple[str, ...], str]]) -> Optional[str]:
+    """Reference nested loop with the same result as SlugMatcher.match()."""
+    toks = tokens(text)
+    best = None
+    best_len = best_pos = 0
+    for stoks, slug in slug_tokens:
+        n = len(stoks)
+        for pos in range(len(toks) - n + 1):
+            if toks[pos:pos + n] == stoks:
+                if n > best_len or (n == best_len and pos < best_pos):
+                    best, best_len, best_pos = slug, n, pos
+                break
+    return best
+
+
+def load_exams(source: str, provider: Optional[str]) -> Tuple[str, "OrderedDict[str, str]"]:
+    """
+    Read the provider's exams from a catalog source file or the catalog store.
+
+    Args:
+        source: *_exams.txt, *_cert.csv or *-link.txt file, or a catalog SQLite store
+        provider: Provider name; required for a store, overrides a file's
+
+    Returns:
+        Tuple of (provider, slug -> code in catalog order)
+    """
+    path = Path(source)
+    kind = source_kind(path)
+    if kind:
+        provider = (provider or kind[1]).lower()
+        rows = [row for row in parse_source(path, kind[0], kind[1]) if row[1] == provider]
+        exams = OrderedDict()
+        for _, _, slug, _, _, code, _ in rows:
+            exams.setdefault(slug, code)
+        return provider, exams
+    if not provider:
+        raise ValueError(f"-p/--provider is required with a catalog store: {source}")
+    store = CatalogStore(source)
+    try:
+        rows = store.catalog(provider, order="source")
+    finally:
+        store.close()
+    return provider.lower(), OrderedDict((slug, code) for _, slug, _, _, code, _ in rows)
+
+
+def classify(lines: Iterable[str], matcher: SlugMatcher) -> Tuple["OrderedDict[str, List[str]]", List[str], int]:
+    """
+    Bucket links by slug in one pass.
+
+    Returns:
+        Tuple of (slug -> links, unmatched links, duplicate count)
+    """
+    buckets: "OrderedDict[str, List[str]]" = OrderedDict()
+    unmatched: List[str] = []
+    seen = set()
+    duplicates = 0
+    for line in lines:
+        link = line.strip()
+        if not link:
+            continue
+        if link in seen:
+            duplicates += 1
+            continue
+        seen.add(link)
+        slug = matcher.match(link)
+        if slug is None:
+            unmatched.append(link)
+        else:
+            buckets.setdefault(slug, []).append(link)
+    return buckets, unmatched, duplicates
+
+
+def write_links(path: Path, links: List[str]) -> bool:
+    """Write one link per line through a temporary file; return False if unchanged."""
+    content = ''.join(f"{link}\n" for link in links).encode('utf-8')
+    try:
+        if path.read_bytes() == content:
+            return False
+    except OSError:
+        pass
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    os.replace(tmp_name, path)
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Split a provider-wide link dump into <code>-link.txt files, one per exam.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Slugs from an exam list or certification CSV:
+    %(prog)s examples/google_devops_links.txt input/google_exams.txt
+
+  Slugs from the catalog store (see catalog.py):
+    %(prog)s data/microsoft/all-links.txt --db data/catalog.sqlite -p microsoft
+
+  Then scrape with the saved links:
+    ./process_all -p google -exams input/google_exams.txt -links-dir data/google/links
+        """
+    )
+    p.add_argument("links", type=Path, help="provider-wide saved-links file, one URL per line")
+    p.add_argument("exams", nargs="?", help="exam list, certification CSV or link file with the slugs")
+    p.add_argument("--db", help=f"catalog store to read the slugs from (e.g. {DEFAULT_DB})")
+    p.add_argument("-p", "--provider", help="provider (default: from the exams file name)")
+    p.add_argument("--links-dir", type=Path,
+                   help="output folder for <code>-link.txt (default: data/<provider>/links)")
+    p.add_argument("--unmatched", type=Path, help="also write the links no slug matched to this file")
+    p.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if bool(args.exams) == bool(args.db):
+        p.error("give either an exams file or --db")
+    try:
+        provider, exams = load_exams(args.exams or args.db, args.provider)
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot load exams: {e}")
+        return 1
+    if not exams:
+        logger.error(f"No exams for provider '{provider}'")
+        return 1
+
+    start = time.perf_counter()
+    matcher = SlugMatcher(exams)
+    try:
+        with open(args.links, 'r', encoding='utf-8') as f:
+            buckets, unmatched, duplicates = classify(f, matcher)
+    except OSError as e:
+        logger.error(f"Cannot read links: {e}")
+        return 1
+
+    links_dir = args.links_dir or Path("data") / provider / "links"
+    links_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for slug, links in buckets.items():
+        path = links_dir / f"{exams[slug]}-link.txt"
+        if write_links(path, links):
+            written += 1
+            logger.info(f"✓ {path}: {len(links)} link(s)")
+        else:
+            logger.debug(f"✓ {path}: unchanged")
+    if args.unmatched:
+        args.unmatched.parent.mkdir(parents=True, exist_ok=True)
+        write_links(args.unmatched, unmatched)
+
+    matched = sum(len(links) for links in buckets.values())
+    logger.info(f"✓ {matched} link(s) into {len(buckets)}/{len(exams)} exam(s), {len(unmatched)} unmatched, "
+                f"{duplicates} duplicate(s) skipped in {time.perf_counter() - start:.2f}s; "
+                f"{written} file(s) written to {links_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
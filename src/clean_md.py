@@ -5,9 +5,18 @@ ExamTopics Markdown Cleaner
 A robust cleaner for ExamTopics .md files that:
 - Normalizes section headers to "## question <N>" format
 - Removes duplicate "Question #: <N>" and optionally "Topic #: <N>" lines
-- Sorts question sections by numeric question ID
+- Sorts question sections by numeric question ID, or by (exam, topic, question)
+  parsed from raw titles (--sort exam)
+- Sorts huge dumps with bounded memory by spilling sorted runs to temporary
+  files and merging them (--memory-budget)
 - Collapses repeated blank lines
 - Removes timestamps and ExamTopics view links
+- Optionally streams sections line by line with bounded memory (--stream)
+- Optionally cleans folders across a process pool (--jobs N)
+- Skips unchanged inputs in folder mode using a content-hash manifest (--force rebuilds)
+- Optionally upserts a re-downloaded dump into the existing silver file, rewriting
+  only from the first added or changed question on (--merge)
+- Optionally records stage timers, counters and peak memory (--metrics, see instrument.py)
 
 Usage:
     Single file:
@@ -16,17 +25,46 @@ Usage:
     Batch process folder:
         python src/clean_md.py data/raw/aws/ -o data/silver/aws/
         python src/clean_md.py data/raw/azure/ -o data/silver/azure/ --remove-topic
+        python src/clean_md.py data/raw/ -o data/silver/ --jobs 32
+
+    Streaming (bounded memory, keeps input order):
+        python src/clean_md.py data/raw/all.md -o data/silver/all.md --stream
+
+    External sort (exam, topic, question order, at most ~512 MB of sections in RAM):
+        python src/clean_md.py data/raw/all.md -o data/silver/all.md --sort exam --memory-budget 512M
+
+    Merge a fresh download into the existing silver file:
+        python src/clean_md.py data/raw/aws/sap-c02.md -o data/silver/aws/sap-c02.md --merge
+
+    Metrics and profiles of the slowest files:
+        python src/clean_md.py data/raw/ -o data/silver/ --metrics data/metrics/clean_md.prom --profile data/profiles
 """
 import argparse
+import hashlib
+import heapq
+import json
 import logging
 import re
 import sys
+import time
+from bisect import bisect_right
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+import instrument
+from build_manifest import BuildManifest
+from question_ir import RAW_HEADER_RE, parse_questions
+from sizes import parse_size
 
 # Match headers that contain the word "question" followed by a question number anywhere on the header line.
 # Accept formats like "question 1", "question #1", or "question: 1" embedded in long headers.
-HEADER_RE = re.compile(r'(?mi)^##.*?question[^\d]*(\d+)\b')
+HEADER_RE = RAW_HEADER_RE
+
+# Exam code and topic in raw titles like "## Exam 010-150 topic 1 question 1 discussion".
+# Both parts are optional so normalized "## question 1" headers still match.
+TITLE_KEY_RE = re.compile(r'(?i)^##\s*(?:exam\s+(.*?)\s+)?(?:topic\s*#?\s*(\d+)\s+)?question\b')
 
 # Pattern to match redundant question number lines
 REMOVE_LINE_RE = re.compile(
@@ -43,9 +81,40 @@ TIMESTAMP_RE = re.compile(r'(?i)^\s*\*\*Timestamp:')
 # Pattern to match ExamTopics view links
 VIEW_LINK_RE = re.compile(r'(?i)^\s*\[View on ExamTopics\]')
 
+# Either cut marker anywhere in a section; find_cut checks it starts a line
+CUT_MARKER_RE = re.compile(r'(?i)\*\*Timestamp:|\[View on ExamTopics\]')
+
+# Bump when cleaning rules change so cached outputs are rebuilt
+CLEANER_VERSION = "1"
+
+# Incremental build manifest stored in the output folder
+MANIFEST_NAME = ".clean_md_manifest.json"
+
+# Sort orders for process_single_file: question number only, or (exam, topic, question)
+SORT_MODES = ("number", "exam")
+
+# Default RAM for buffered sections before the external sort spills a run to disk
+DEFAULT_MEMORY_BUDGET = 256 * 1024 ** 2
+
+# Rough per-section bookkeeping cost (tuple, key, list slot) added to each block's size
+SECTION_OVERHEAD = 200
+
+# Maximum number of runs merged at once; more runs are merged in several passes
+MERGE_FAN_IN = 64
+
+# Sidecar index of a silver file for --merge: <output>.md.index.json next to it
+MERGE_INDEX_SUFFIX = ".index.json"
+MERGE_INDEX_FORMAT = 1
+
+# Section headers as this tool writes them (see normalize_header)
+SILVER_SECTION_RE = re.compile(rb'(?m)^## question (\d+)$')
+
 # Type alias for sections
 Section = Tuple[Union[str, int], str]
 
+# Composite sort key: (exam code, topic, question number)
+SortKey = Tuple[str, int, int]
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -90,16 +159,23 @@ def clean_section_text(text: str, remove_topic: bool) -> str:
         - Collapses multiple blank lines to single blank
         - Removes timestamp and ExamTopics view links
         - Strips leading and trailing blank lines
+        - The cut is found in the raw text first (find_cut), so the discarded
+          tail (the comments of a WriteData dump) is never split or matched
+          line by line
     """
-    lines = text.splitlines()
+    cut = find_cut(text)
+    head = text if cut is None else text[:cut]
     out = []
     prev_blank = False
+    removed = topic = 0
     
-    for ln in lines:
+    for ln in head.splitlines():
         # Skip duplicate Question #: 169 lines
         if REMOVE_LINE_RE.match(ln):
+            removed += 1
             continue
         if remove_topic and TOPIC_LINE_RE.match(ln):
+            topic += 1
             continue
             
         # Collapse multiple blank lines to a single blank
@@ -111,15 +187,14 @@ def clean_section_text(text: str, remove_topic: bool) -> str:
             out.append(ln.rstrip())
             prev_blank = False
     
-    # Find first occurrence of timestamp or view link and truncate from there
-    cut_index = None
-    for idx, ln in enumerate(out):
-        if TIMESTAMP_RE.match(ln) or VIEW_LINK_RE.match(ln):
-            cut_index = idx
-            break
-    
-    if cut_index is not None:
-        out = out[:cut_index]
+    if instrument.active() is not None:
+        instrument.count("lines_dropped", removed, "remove_line")
+        instrument.count("lines_dropped", topic, "topic_line")
+        if cut is not None:
+            # Same count as iter_clean_sections: every non-blank line from the cut on
+            instrument.count("lines_dropped",
+                             sum(1 for ln in text[cut:].splitlines() if ln.strip()),
+                             "timestamp_cut")
     
     # Strip leading/trailing blanks
     while out and out[0] == '':
@@ -130,6 +205,40 @@ def clean_section_text(text: str, remove_topic: bool) -> str:
     return '\n'.join(out)
 
 
+def find_cut(text: str) -> Optional[int]:
+    """
+    Find where the first timestamp or view-link line of a section starts.
+
+    Searches the raw text for the markers instead of walking its lines: a
+    hit only counts when nothing but whitespace precedes it on its line,
+    with lines split exactly as str.splitlines splits them, so the result is
+    the first line that TIMESTAMP_RE or VIEW_LINK_RE matches.
+
+    Args:
+        text: Raw section text
+
+    Returns:
+        Offset of the start of that line, or None if there is none
+
+    Examples:
+        >>> find_cut("Body\\n\\n**Timestamp: 2024**\\nComment")
+        6
+        >>> find_cut("Quote: **Timestamp: 2024**") is None
+        True
+    """
+    for m in CUT_MARKER_RE.finditer(text):
+        pos = m.start()
+        line_start = text.rfind('\n', 0, pos) + 1
+        lead = text[line_start:pos]
+        if lead and not lead.isspace():
+            # Other line boundaries (\r, \x0c, \u2028, ...) may sit in between
+            lead = (lead + '|').splitlines()[-1][:-1]
+            if lead.strip():
+                continue
+        return pos - len(lead)
+    return None
+
+
 def split_into_sections(text: str) -> List[Section]:
     """
     Split markdown text into sections based on question headers.
@@ -144,37 +253,668 @@ def split_into_sections(text: str) -> List[Section]:
         - Recognizes headers matching pattern: ## question <N>
         - First section may be preamble (non-question content)
         - Each section includes normalized header and body
+        - Section boundaries come from question_ir.parse_questions
     """
-    matches = list(HEADER_RE.finditer(text))
-    if not matches:
+    questions = parse_questions(text, HEADER_RE, with_fields=False)
+    if not questions:
         return [("__preamble__", text)]
         
     sections = []
     
     # Extract preamble if exists
-    first = matches[0]
-    preamble = text[:first.start()].rstrip()
+    preamble = text[:questions[0].start].rstrip()
     if preamble:
         sections.append(("__preamble__", preamble))
     
-    # Extract each question section
+    # Each section body is the text after the header line, sliced by offset
+    for q in questions:
+        sections.append((q.number, text[q.body_start:q.end].rstrip()))
+        
+    return sections
+
+
+def title_key(header: str, qnum: int) -> SortKey:
+    """
+    Build the (exam, topic, question) sort key of a raw section header.
+
+    Args:
+        header: Header line, e.g. "## Exam 010-150 topic 1 question 1 discussion"
+        qnum: Question number already parsed from the header
+
+    Returns:
+        Tuple of (lowercased exam code, topic, question number); a missing exam
+        sorts as "" and a missing topic as 0
+
+    Examples:
+        >>> title_key("## Exam 010-150 topic 1 question 12 discussion", 12)
+        ('010-150', 1, 12)
+        >>> title_key("## question 7", 7)
+        ('', 0, 7)
+    """
+    m = TITLE_KEY_RE.match(header)
+    if not m:
+        return ("", 0, qnum)
+    exam, topic = m.groups()
+    return ((exam or "").lower(), int(topic) if topic else 0, qnum)
+
+
+def iter_clean_sections(lines: Iterable[str], remove_topic: bool,
+                        keyed: bool = False) -> Iterator[Section]:
+    """
+    Stream cleaned sections from an iterable of lines without buffering the file.
+
+    Args:
+        lines: Lines of a markdown file (e.g. an open file handle)
+        remove_topic: If True, also remove "Topic #: <n>" lines
+        keyed: If True, yield the title_key of each raw header instead of the
+            bare question number
+
+    Yields:
+        ("__preamble__", text) for content before the first question header,
+        then (question_num, block) for each question in input order, where
+        block starts with the normalized header
+
+    Notes:
+        - Applies the same rules as clean_section_text, one line at a time
+        - Lines after the timestamp or view link are skipped without being kept,
+          so memory is bounded by the largest cleaned section, not the file
+        - Headers are matched per line; a header without a number on its own
+          line is treated as body text
+    """
+    preamble: Optional[List[str]] = []
+    qnum: Optional[int] = None
+    key: Union[int, SortKey, None] = None
+    out: List[str] = []
+    prev_blank = False
+    cut = False
+    # lines_dropped counts, flushed to instrument once at the end
+    removed = topic = cut_lines = 0
+
+    for raw in lines:
+        ln = raw.rstrip('\r\n')
+        m = HEADER_RE.match(ln)
+        if m:
+            if qnum is None:
+                text = '\n'.join(preamble).rstrip()
+                if text:
+                    yield ("__preamble__", text)
+                preamble = None
+            else:
+                yield key, _finish_block(qnum, out)
+            qnum = int(m.group(1))
+            key = title_key(ln, qnum) if keyed else qnum
+            out = []
+            prev_blank = False
+            cut = False
+            continue
+
+        if qnum is None:
+            preamble.append(ln)
+            continue
+        if cut:
+            if ln.strip():
+                cut_lines += 1
+            continue
+        if REMOVE_LINE_RE.match(ln):
+            removed += 1
+            continue
+        if remove_topic and TOPIC_LINE_RE.match(ln):
+            topic += 1
+            continue
+        if TIMESTAMP_RE.match(ln) or VIEW_LINK_RE.match(ln):
+            cut = True
+            cut_lines += 1
+            continue
+
+        # Collapse multiple blank lines to a single blank
+        if not ln.strip():
+            if not prev_blank:
+                out.append('')
+            prev_blank = True
+        else:
+            out.append(ln.rstrip())
+            prev_blank = False
+
+    if qnum is None:
+        # No question headers at all: the whole input is preamble
+        if preamble:
+            yield ("__preamble__", '\n'.join(preamble))
+    else:
+        yield key, _finish_block(qnum, out)
+    instrument.count("lines_dropped", removed, "remove_line")
+    instrument.count("lines_dropped", topic, "topic_line")
+    instrument.count("lines_dropped", cut_lines, "timestamp_cut")
+
+
+def _finish_block(qnum: int, out: List[str]) -> str:
+    """Strip blank edges from cleaned body lines and prepend the normalized header."""
+    start = 0
+    end = len(out)
+    while start < end and out[start] == '':
+        start += 1
+    while end > start and out[end - 1] == '':
+        end -= 1
+    block = normalize_header(qnum)
+    if end > start:
+        block += '\n\n' + '\n'.join(out[start:end])
+    return block
+
+
+def write_sections(sections: Iterable[Section], fh: TextIO) -> int:
+    """
+    Write cleaned sections to an open file handle as they arrive.
+
+    Args:
+        sections: Sections as yielded by iter_clean_sections
+        fh: Text file handle opened for writing
+
+    Returns:
+        Number of question sections written
+
+    Notes:
+        - Produces the same layout as process_single_file: blocks separated
+          by one blank line and a single trailing newline
+        - A preamble-only input is written stripped, as in the buffered path
+    """
+    count = 0
+    first = True
+    preamble_only = None
+    for qnum, text in sections:
+        if qnum == "__preamble__":
+            preamble_only = text
+            continue
+        if preamble_only is not None:
+            fh.write(preamble_only.rstrip())
+            fh.write('\n\n')
+            preamble_only = None
+        elif not first:
+            fh.write('\n\n')
+        fh.write(text.rstrip())
+        first = False
+        count += 1
+
+    if preamble_only is not None:
+        fh.write(preamble_only.strip())
+    fh.write('\n')
+    return count
+
+
+def stream_single_file(input_path: Path, output_path: Path, remove_topic: bool) -> bool:
+    """
+    Clean a single markdown file line by line, writing blocks incrementally.
+
+    Args:
+        input_path: Path to input .md file
+        output_path: Path to output .md file
+        remove_topic: If True, remove "Topic #: <n>" lines
+
+    Returns:
+        True if processing succeeded, False otherwise
+
+    Notes:
+        - Peak memory stays flat as the input grows
+        - Sections keep their input order; use the buffered mode to sort
+    """
+    try:
+        logger.info(f"Streaming: {input_path}")
+
+        if not input_path.exists():
+            logger.error(f"Input file not found: {input_path}")
+            return False
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Reading, cleaning and writing are interleaved: one "clean" stage
+        with instrument.stage("clean"), open(input_path, 'r', encoding='utf-8') as src, \
+                open(output_path, 'w', encoding='utf-8') as dst:
+            count = write_sections(iter_clean_sections(src, remove_topic), dst)
+        instrument.count("sections", count)
+        instrument.count_bytes(input_path, output_path)
+        logger.info(f"✓ Streamed {count} question(s) to: {output_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error processing {input_path}: {e}")
+        return False
+
+
+def _spill_run(run: List[Tuple[object, str]], tmpdir: Path, index: int) -> Path:
+    """Sort one run of (key, block) pairs and write it as JSON lines; return its path."""
+    run.sort(key=itemgetter(0))
+    path = tmpdir / f"run-{index:06d}.jsonl"
+    with open(path, 'w', encoding='utf-8') as fh:
+        for record in run:
+            fh.write(json.dumps(record, ensure_ascii=False))
+            fh.write('\n')
+    return path
+
+
+def _read_run(path: Path) -> Iterator[Tuple[object, str]]:
+    """Yield the (key, block) pairs of a spilled run in order."""
+    with open(path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            key, block = json.loads(line)
+            yield key, block
+
+
+def _merge_runs(runs: List[Path], tmpdir: Path) -> Iterator[Tuple[object, str]]:
+    """
+    K-way merge sorted runs with heapq.merge.
+
+    Args:
+        runs: Spilled run files, in input order
+        tmpdir: Folder for intermediate runs
+
+    Returns:
+        Iterator over all (key, block) pairs in key order
+
+    Notes:
+        - At most MERGE_FAN_IN files are open at once; longer run lists are
+          first merged in groups into intermediate runs
+        - Ties keep input order because heapq.merge prefers earlier runs, so
+          the result matches a stable in-memory sort
+    """
+    index = len(runs)
+    while len(runs) > MERGE_FAN_IN:
+        merged = []
+        for i in range(0, len(runs), MERGE_FAN_IN):
+            group = runs[i:i + MERGE_FAN_IN]
+            path = tmpdir / f"run-{index:06d}.jsonl"
+            index += 1
+            with open(path, 'w', encoding='utf-8') as fh:
+                for record in heapq.merge(*map(_read_run, group), key=itemgetter(0)):
+                    fh.write(json.dumps(record, ensure_ascii=False))
+                    fh.write('\n')
+            for run in group:
+                run.unlink()
+            merged.append(path)
+        runs = merged
+    return heapq.merge(*map(_read_run, runs), key=itemgetter(0))
+
+
+def external_sort_file(input_path: Path, output_path: Path, remove_topic: bool,
+                       sort_by: str = "exam",
+                       memory_budget: int = DEFAULT_MEMORY_BUDGET) -> bool:
+    """
+    Clean and sort a single markdown file with bounded memory.
+
+    Args:
+        input_path: Path to input .md file
+        output_path: Path to output .md file
+        remove_topic: If True, remove "Topic #: <n>" lines
+        sort_by: "number" to sort by question number, "exam" to sort by
+            (exam, topic, question) parsed from the raw titles
+        memory_budget: Approximate bytes of cleaned sections held in RAM
+            before a sorted run is spilled to a temporary file
+
+    Returns:
+        True if processing succeeded, False otherwise
+
+    Notes:
+        - Sections are cleaned by iter_clean_sections as the file is read
+        - Inputs that fit the budget are sorted in memory without touching disk
+        - Runs are written to the system temp dir (set TMPDIR to move them)
+          and removed afterwards
+        - Sorting is stable, so --sort number matches the buffered output
+    """
+    import tempfile  # only sorting needs it; kept off the start-up path
+
+    try:
+        logger.info(f"Sorting: {input_path} (by {sort_by})")
+
+        if not input_path.exists():
+            logger.error(f"Input file not found: {input_path}")
+            return False
+
+        with open(input_path, 'r', encoding='utf-8') as src, \
+                tempfile.TemporaryDirectory(prefix="clean_md-") as tmp:
+            tmpdir = Path(tmp)
+            preamble: List[Section] = []
+            run: List[Tuple[object, str]] = []
+            runs: List[Path] = []
+            used = 0
+            # Spilled runs are sorted inside "clean"; the merge is timed as "write"
+            with instrument.stage("clean"):
+                for key, block in iter_clean_sections(src, remove_topic, keyed=True):
+                    if key == "__preamble__":
+                        preamble.append((key, block))
+                        continue
+                    run.append((key[2] if sort_by == "number" else key, block))
+                    used += len(block) + SECTION_OVERHEAD
+                    if used >= memory_budget:
+                        runs.append(_spill_run(run, tmpdir, len(runs)))
+                        run = []
+                        used = 0
+
+            with instrument.stage("sort"):
+                if runs:
+                    if run:
+                        runs.append(_spill_run(run, tmpdir, len(runs)))
+                        run = []
+                    logger.debug(f"Merging {len(runs)} sorted run(s)")
+                    ordered = _merge_runs(runs, tmpdir)
+                else:
+                    run.sort(key=itemgetter(0))
+                    ordered = iter(run)
+
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with instrument.stage("write"), open(output_path, 'w', encoding='utf-8') as dst:
+                count = write_sections(chain(preamble, ordered), dst)
+        instrument.count("sections", count)
+        instrument.count_bytes(input_path, output_path)
+        instrument.count("runs_spilled", len(runs))
+
+        logger.info(f"✓ Sorted {count} question(s) from {len(runs) or 1} run(s) to: {output_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error processing {input_path}: {e}")
+        return False
+
+
+def merge_index_path(silver_path: Path) -> Path:
+    """Sidecar index of a silver file, e.g. sap-c02.md.index.json."""
+    return silver_path.with_name(silver_path.name + MERGE_INDEX_SUFFIX)
+
+
+def iter_raw_sections(text: str) -> Iterator[Tuple[int, int, int]]:
+    """
+    Locate the question sections of a raw dump without a regex scan of the text.
+
+    Args:
+        text: Complete markdown file content
+
+    Yields:
+        (question_num, start, end) per section, with the same boundaries as
+        split_into_sections; content before the first one is the preamble
+
+    Notes:
+        - Candidates are the line starts that begin with "##", found with
+          str.find; HEADER_RE is only tried there. A candidate inside the
+          previous header match is skipped, as HEADER_RE.finditer would
+    """
+    prev = None
+    m = HEADER_RE.match(text)
+    if m:
+        prev = m
+    pos = text.find('\n##', prev.end() - 1 if prev else 0)
+    while pos != -1:
+        m = HEADER_RE.match(text, pos + 1)
+        if m:
+            if prev is not None:
+                yield int(prev.group(1)), prev.start(), m.start()
+            prev = m
+            pos = text.find('\n##', m.end() - 1)
+        else:
+            pos = text.find('\n##', pos + 1)
+    if prev is not None:
+        yield int(prev.group(1)), prev.start(), len(text)
+
+
+def clean_raw_section(text: str, qnum: int, start: int, end: int, remove_topic: bool) -> str:
+    """Cleaned block of the raw section text[start:end], as process_single_file writes it."""
+    nl = text.find('\n', start, end)
+    body_clean = clean_section_text(text[nl + 1 if nl != -1 else end:end].rstrip(), remove_topic)
+    block = normalize_header(qnum)
+    if body_clean:
+        block += '\n\n' + body_clean
+    return block.rstrip()
+
+
+def scan_silver(data: bytes) -> List[list]:
+    """
+    Locate the question sections of a silver file written by this tool.
+
+    Args:
+        data: Raw bytes of the silver file
+
+    Returns:
+        [qnum, start, end, sha256, None] per section in file order, where
+        data[start:end] is the block from its header to its last non-blank
+        character, as write_sections wrote it; the last field is the hash of
+        the raw section it was cleaned from, unknown here
+    """
+    matches = list(SILVER_SECTION_RE.finditer(data))
+    sections = []
     for i, m in enumerate(matches):
         start = m.start()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-        qnum = int(m.group(1))
-        
-        # Extract section raw (including header)
-        section_raw = text[start:end].splitlines()
-        
-        # Reconstruct body (lines after header)
-        body_lines = section_raw[1:] if len(section_raw) > 1 else []
-        body = '\n'.join(body_lines).rstrip()
-        sections.append((qnum, body))
-        
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(data)
+        while end > start and data[end - 1] in b' \t\r\n':
+            end -= 1
+        sections.append([int(m.group(1)), start, end,
+                         hashlib.sha256(data[start:end]).hexdigest(), None])
     return sections
 
 
-def process_single_file(input_path: Path, output_path: Path, remove_topic: bool) -> bool:
+def write_merge_index(silver_path: Path, sections: List[list], remove_topic: Optional[bool]) -> None:
+    """
+    Write the sidecar index of silver_path, stamped with the file's current size and mtime.
+
+    Args:
+        silver_path: Silver file the sections describe
+        sections: Sections as returned by scan_silver
+        remove_topic: Option the raw hashes in sections were cleaned with, or
+            None if there are none
+    """
+    stat = silver_path.stat()
+    sidecar = merge_index_path(silver_path)
+    tmp = sidecar.with_name(sidecar.name + ".tmp")
+    tmp.write_text(json.dumps({"version": MERGE_INDEX_FORMAT, "cleaner_version": CLEANER_VERSION,
+                               "remove_topic": remove_topic, "size": stat.st_size,
+                               "mtime_ns": stat.st_mtime_ns, "sections": sections},
+                              separators=(',', ':')), encoding="utf-8")
+    tmp.replace(sidecar)
+
+
+def read_merge_index(silver_path: Path, remove_topic: bool) -> List[list]:
+    """
+    Sections of a silver file, from its sidecar index when that is current.
+
+    Args:
+        silver_path: Existing silver file
+        remove_topic: Option of this run; raw hashes recorded with another
+            option or cleaner version are dropped
+
+    Returns:
+        Sections as returned by scan_silver
+
+    Notes:
+        - The sidecar is trusted only while the file's size and mtime match
+          the ones it was written with; otherwise the file is scanned once
+          and a fresh sidecar is written
+    """
+    stat = silver_path.stat()
+    try:
+        data = json.loads(merge_index_path(silver_path).read_text(encoding="utf-8"))
+        if (data.get("version") == MERGE_INDEX_FORMAT and data.get("size") == stat.st_size
+                and data.get("mtime_ns") == stat.st_mtime_ns):
+            sections = data["sections"]
+            if (data.get("cleaner_version") != CLEANER_VERSION
+                    or data.get("remove_topic") != remove_topic):
+                for section in sections:
+                    section[4] = None
+            return sections
+    except (OSError, ValueError):
+        pass
+    sections = scan_silver(silver_path.read_bytes())
+    write_merge_index(silver_path, sections, None)
+    return sections
+
+
+def merge_single_file(input_path: Path, output_path: Path, remove_topic: bool) -> bool:
+    """
+    Upsert the questions of a raw dump into an existing silver file.
+
+    Args:
+        input_path: Path to the new raw .md dump
+        output_path: Silver file to update; cleaned in full if it does not exist
+        remove_topic: If True, remove "Topic #: <n>" lines
+
+    Returns:
+        True if processing succeeded, False otherwise
+
+    Notes:
+        - Only the raw dump is parsed; the silver file's sections come from
+          its sidecar index (see read_merge_index)
+        - A raw section whose SHA-256 was recorded for a silver section of
+          the same number is unchanged without being cleaned; only the
+          others are cleaned, so cleaning cost follows the delta
+        - A cleaned question is unchanged when a silver section has the same
+          number and SHA-256. Otherwise it replaces, in place, the next
+          unmatched silver section with its number, or is inserted in
+          question-number order (appended if the file is not in that order)
+          when there is none. Silver questions missing from the dump are kept
+        - The file is rewritten from the first added or changed question on,
+          so a refresh that only adds higher numbers just appends
+    """
+    try:
+        if not output_path.exists():
+            logger.info(f"No existing output to merge into, cleaning in full: {output_path}")
+            if not process_single_file(input_path, output_path, remove_topic):
+                return False
+            # Silver sections are the raw ones stably sorted by number: pair them
+            sections = scan_silver(output_path.read_bytes())
+            text = input_path.read_text(encoding="utf-8")
+            raw = sorted(iter_raw_sections(text), key=itemgetter(0))
+            if [r[0] for r in raw] == [section[0] for section in sections]:
+                for section, (_, start, end) in zip(sections, raw):
+                    section[4] = hashlib.sha256(text[start:end].encode('utf-8')).hexdigest()
+                write_merge_index(output_path, sections, remove_topic)
+            else:
+                write_merge_index(output_path, sections, None)
+            return True
+
+        logger.info(f"Merging: {input_path} -> {output_path}")
+
+        if not input_path.exists():
+            logger.error(f"Input file not found: {input_path}")
+            return False
+
+        with instrument.stage("read"):
+            existing = read_merge_index(output_path, remove_topic)
+            text = input_path.read_text(encoding="utf-8")
+
+        with instrument.stage("merge"):
+            # Unmatched silver sections by number, by raw hash and by cleaned hash
+            by_number: dict = {}
+            by_raw: dict = {}
+            by_clean: dict = {}
+            for i, (qnum, _, _, digest, raw_digest) in enumerate(existing):
+                by_number.setdefault(qnum, []).append(i)
+                by_clean.setdefault((qnum, digest), []).append(i)
+                if raw_digest is not None:
+                    by_raw.setdefault((qnum, raw_digest), []).append(i)
+            matched = set()
+
+            def take(slots: Optional[List[int]]) -> Optional[int]:
+                while slots:
+                    i = slots.pop(0)
+                    if i not in matched:
+                        matched.add(i)
+                        return i
+                return None
+
+            unchanged = cleaned = 0
+            rehashed = False
+            unmatched = []
+            for qnum, start, end in iter_raw_sections(text):
+                raw_digest = hashlib.sha256(text[start:end].encode('utf-8')).hexdigest()
+                if take(by_raw.get((qnum, raw_digest))) is not None:
+                    unchanged += 1
+                    continue
+                block = clean_raw_section(text, qnum, start, end, remove_topic).encode('utf-8')
+                cleaned += 1
+                i = take(by_clean.get((qnum, hashlib.sha256(block).hexdigest())))
+                if i is not None:
+                    existing[i][4] = raw_digest
+                    rehashed = True
+                    unchanged += 1
+                else:
+                    unmatched.append((qnum, block, raw_digest))
+            # Left-over silver sections of a number take that number's changed
+            # questions in order; the rest of the questions are new
+            replaced = {}
+            added = []
+            for qnum, block, raw_digest in unmatched:
+                i = take(by_number.get(qnum))
+                if i is not None:
+                    replaced[i] = (block, raw_digest)
+                else:
+                    added.append((qnum, block, raw_digest))
+            kept = len(existing) - len(replaced) - unchanged
+
+            # New questions go after the silver ones with the same number
+            numbers = [section[0] for section in existing]
+            in_order = all(a <= b for a, b in zip(numbers, numbers[1:]))
+            inserts: dict = {}
+            for qnum, block, raw_digest in sorted(added, key=itemgetter(0)) if in_order else added:
+                at = bisect_right(numbers, qnum) if in_order else len(existing)
+                inserts.setdefault(at, []).append((qnum, block, raw_digest))
+            first = min(chain(replaced, inserts), default=None)
+
+        written = 0
+        if first is None:
+            if rehashed:
+                write_merge_index(output_path, existing, remove_topic)
+            logger.info(f"✓ Up to date: {output_path} ({unchanged} unchanged, {kept} kept, "
+                        f"{cleaned} cleaned)")
+        else:
+            with instrument.stage("write"), open(output_path, 'r+b') as fh:
+                lead = b''
+                if first < len(existing):
+                    offset = existing[first][1]
+                    fh.seek(offset)
+                    old = fh.read()
+                elif existing:
+                    # Appending only: continue after the last block
+                    offset = existing[-1][2]
+                    lead = b'\n\n'
+                else:
+                    # No questions yet: continue after the preamble, if any
+                    offset = len(fh.read().rstrip())
+                    lead = b'\n\n' if offset else b''
+                sections = existing[:first]
+                blocks = []
+                pos = offset + len(lead)
+                for i in range(first, len(existing) + 1):
+                    pending = list(inserts.get(i, ()))
+                    if i < len(existing):
+                        qnum, start, end, _, raw_digest = existing[i]
+                        block, raw_digest = replaced.get(
+                            i, (old[start - offset:end - offset], raw_digest))
+                        pending.append((qnum, block, raw_digest))
+                    for qnum, block, raw_digest in pending:
+                        if blocks:
+                            pos += 2
+                        sections.append([qnum, pos, pos + len(block),
+                                         hashlib.sha256(block).hexdigest(), raw_digest])
+                        blocks.append(block)
+                        pos += len(block)
+                tail = lead + b'\n\n'.join(blocks) + b'\n'
+                fh.seek(offset)
+                fh.write(tail)
+                fh.truncate()
+            write_merge_index(output_path, sections, remove_topic)
+            written = len(tail)
+            logger.info(f"✓ Merged into {output_path}: {len(added)} added, {len(replaced)} changed, "
+                        f"{unchanged} unchanged, {kept} kept; cleaned {cleaned} question(s), "
+                        f"rewrote {written} byte(s) from offset {offset}")
+        instrument.count("merged", len(added), "added")
+        instrument.count("merged", len(replaced), "changed")
+        instrument.count("merged", unchanged, "unchanged")
+        instrument.count("merged", kept, "kept")
+        instrument.count("sections", cleaned)
+        instrument.count("bytes_in", instrument.file_size(input_path))
+        instrument.count("bytes_out", written)
+        return True
+
+    except Exception as e:
+        logger.error(f"Error processing {input_path}: {e}")
+        return False
+
+
+def process_single_file(input_path: Path, output_path: Path, remove_topic: bool,
+                        stream: bool = False, sort_by: str = "number",
+                        memory_budget: Optional[int] = None, merge: bool = False) -> bool:
     """
     Process a single markdown file: clean, normalize, and sort questions.
     
@@ -182,6 +922,11 @@ def process_single_file(input_path: Path, output_path: Path, remove_topic: bool)
         input_path: Path to input .md file
         output_path: Path to output .md file
         remove_topic: If True, remove "Topic #: <n>" lines
+        stream: If True, delegate to stream_single_file (input order, bounded memory)
+        sort_by: "number" (default) or "exam" for (exam, topic, question) order
+        memory_budget: If set, or when sorting by exam, delegate to
+            external_sort_file with this budget (DEFAULT_MEMORY_BUDGET if None)
+        merge: If True, delegate to merge_single_file (upsert into the existing output)
         
     Returns:
         True if processing succeeded, False otherwise
@@ -190,6 +935,14 @@ def process_single_file(input_path: Path, output_path: Path, remove_topic: bool)
         FileNotFoundError: If input file doesn't exist
         PermissionError: If unable to write output file
     """
+    if merge:
+        return merge_single_file(input_path, output_path, remove_topic)
+    if stream:
+        return stream_single_file(input_path, output_path, remove_topic)
+    if sort_by != "number" or memory_budget is not None:
+        return external_sort_file(input_path, output_path, remove_topic, sort_by,
+                                  memory_budget or DEFAULT_MEMORY_BUDGET)
+    
     try:
         logger.info(f"Processing: {input_path}")
         
@@ -197,14 +950,18 @@ def process_single_file(input_path: Path, output_path: Path, remove_topic: bool)
             logger.error(f"Input file not found: {input_path}")
             return False
             
-        text = input_path.read_text(encoding="utf-8")
-        sections = split_into_sections(text)
+        with instrument.stage("read"):
+            text = input_path.read_text(encoding="utf-8")
+        with instrument.stage("split"):
+            sections = split_into_sections(text)
 
         # If split returned only preamble in a single tuple, write it back
         if len(sections) == 1 and sections[0][0] == "__preamble__":
             out_text = sections[0][1].strip() + "\n"
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(out_text, encoding="utf-8")
+            with instrument.stage("write"):
+                output_path.write_text(out_text, encoding="utf-8")
+            instrument.count_bytes(input_path, output_path)
             logger.info(f"Written (preamble only): {output_path}")
             return True
 
@@ -215,29 +972,35 @@ def process_single_file(input_path: Path, output_path: Path, remove_topic: bool)
 
         # Sections is list of (qnum, body)
         cleaned = []
-        for qnum, body in sections:
-            body_clean = clean_section_text(body, remove_topic=remove_topic)
-            block = normalize_header(qnum)
-            if body_clean:
-                block += '\n\n' + body_clean
-            cleaned.append((qnum, block))
+        with instrument.stage("clean"):
+            for qnum, body in sections:
+                body_clean = clean_section_text(body, remove_topic=remove_topic)
+                block = normalize_header(qnum)
+                if body_clean:
+                    block += '\n\n' + body_clean
+                cleaned.append((qnum, block))
 
         # Sort by question number
-        cleaned.sort(key=lambda x: x[0])
+        with instrument.stage("sort"):
+            cleaned.sort(key=lambda x: x[0])
 
-        parts = []
-        if preamble:
-            parts.append(preamble.rstrip())
-            parts.append('')
-        for _, blk in cleaned:
-            parts.append(blk.rstrip())
-            parts.append('')  # Blank line between sections
+        with instrument.stage("render"):
+            parts = []
+            if preamble:
+                parts.append(preamble.rstrip())
+                parts.append('')
+            for _, blk in cleaned:
+                parts.append(blk.rstrip())
+                parts.append('')  # Blank line between sections
 
-        out_text = '\n'.join(parts).rstrip() + '\n'
+            out_text = '\n'.join(parts).rstrip() + '\n'
 
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(out_text, encoding="utf-8")
+        with instrument.stage("write"):
+            output_path.write_text(out_text, encoding="utf-8")
+        instrument.count("sections", len(cleaned))
+        instrument.count_bytes(input_path, output_path)
         logger.info(f"✓ Cleaned file written to: {output_path}")
         return True
         
@@ -246,7 +1009,10 @@ def process_single_file(input_path: Path, output_path: Path, remove_topic: bool)
         return False
 
 
-def process_folder(input_folder: Path, output_folder: Path, remove_topic: bool) -> Tuple[int, int]:
+def process_folder(input_folder: Path, output_folder: Path, remove_topic: bool,
+                   stream: bool = False, jobs: int = 1,
+                   use_cache: bool = True, sort_by: str = "number",
+                   memory_budget: Optional[int] = None, merge: bool = False) -> Tuple[int, int]:
     """
     Batch process all .md files in a folder.
     
@@ -254,14 +1020,24 @@ def process_folder(input_folder: Path, output_folder: Path, remove_topic: bool)
         input_folder: Path to folder containing input .md files
         output_folder: Path to folder for output files
         remove_topic: If True, remove "Topic #: <n>" lines
+        stream: If True, clean each file with the streaming engine
+        jobs: Number of worker processes; 1 processes files sequentially
+        use_cache: If True, skip inputs unchanged since the last run and prune
+            outputs whose input was deleted (see build_manifest)
+        sort_by: "number" or "exam"; see process_single_file
+        memory_budget: Per-file budget for the external sort; see process_single_file
+        merge: If True, upsert each input into its existing output; see merge_single_file
         
     Returns:
-        Tuple of (success_count, total_count)
+        Tuple of (success_count, total_count); cache hits count as successes
         
     Notes:
         - Recursively processes all .md files in input folder
         - Preserves subdirectory structure in output folder
         - Skips non-.md files
+        - With jobs > 1, files are dispatched largest first across a process pool
+        - The manifest lives at <output_folder>/.clean_md_manifest.json and is
+          keyed by input hash, CLEANER_VERSION and the cleaning options
     """
     if not input_folder.exists():
         logger.error(f"Input folder not found: {input_folder}")
@@ -280,14 +1056,54 @@ def process_folder(input_folder: Path, output_folder: Path, remove_topic: bool)
     
     logger.info(f"Found {len(md_files)} markdown file(s) to process")
     
-    success_count = 0
-    for input_path in md_files:
-        # Calculate relative path to preserve directory structure
-        relative_path = input_path.relative_to(input_folder)
-        output_path = output_folder / relative_path
-        
-        if process_single_file(input_path, output_path, remove_topic):
-            success_count += 1
+    manifest = None
+    digests = {}
+    pending = md_files
+    if use_cache:
+        manifest = BuildManifest(output_folder / MANIFEST_NAME, "clean_md", CLEANER_VERSION,
+                                 {"remove_topic": remove_topic, "stream": stream,
+                                  "sort": sort_by, "merge": merge})
+        pending = []
+        for input_path in md_files:
+            key = input_path.relative_to(input_folder).as_posix()
+            fresh, digest = manifest.check(key, input_path, output_folder / key)
+            if not fresh:
+                pending.append(input_path)
+                digests[input_path] = digest
+        logger.info(f"Cache: {manifest.hits} hit(s), {manifest.misses} miss(es)")
+    
+    if jobs > 1 and len(pending) > 1:
+        succeeded = _process_files_parallel(pending, input_folder, output_folder,
+                                            remove_topic, stream, jobs,
+                                            sort_by, memory_budget, merge)
+    else:
+        succeeded = []
+        for input_path in pending:
+            # Calculate relative path to preserve directory structure
+            relative_path = input_path.relative_to(input_folder)
+            output_path = output_folder / relative_path
+            
+            with instrument.file(str(input_path)):
+                ok = process_single_file(input_path, output_path, remove_topic, stream=stream,
+                                         sort_by=sort_by, memory_budget=memory_budget,
+                                         merge=merge)
+            if ok:
+                succeeded.append(input_path)
+    
+    success_count = len(succeeded) + (len(md_files) - len(pending))
+    
+    if manifest is not None:
+        for input_path in succeeded:
+            key = input_path.relative_to(input_folder).as_posix()
+            manifest.record(key, input_path, digests.get(input_path))
+        removed = manifest.prune((p.relative_to(input_folder).as_posix() for p in md_files),
+                                 output_folder)
+        for output_path in removed:
+            merge_index_path(output_path).unlink(missing_ok=True)
+            logger.info(f"Pruned stale output: {output_path}")
+        manifest.save()
+        logger.info(f"Cache: {manifest.hits} hit(s), {manifest.misses} miss(es), "
+                    f"{len(removed)} pruned")
     
     logger.info(f"\n{'='*60}")
     logger.info(f"Processing complete: {success_count}/{len(md_files)} files succeeded")
@@ -296,12 +1112,109 @@ def process_folder(input_folder: Path, output_folder: Path, remove_topic: bool)
     return success_count, len(md_files)
 
 
-def main():
+def _init_worker(level: int) -> None:
+    """Silence per-file progress in pool workers; errors are still logged."""
+    logger.setLevel(max(level, logging.WARNING))
+
+
+def _process_files_parallel(md_files: List[Path], input_folder: Path, output_folder: Path,
+                            remove_topic: bool, stream: bool, jobs: int,
+                            sort_by: str = "number",
+                            memory_budget: Optional[int] = None,
+                            merge: bool = False) -> List[Path]:
+    """
+    Clean files across a process pool and report aggregated progress.
+    
+    Args:
+        md_files: Input .md files found under input_folder
+        input_folder: Root folder used to compute relative output paths
+        output_folder: Root folder for output files
+        remove_topic: If True, remove "Topic #: <n>" lines
+        stream: If True, clean each file with the streaming engine
+        jobs: Number of worker processes
+        sort_by: "number" or "exam"; see process_single_file
+        memory_budget: Per-file budget for the external sort; see process_single_file
+        merge: If True, upsert each input into its existing output
+        
+    Returns:
+        Input paths that were processed successfully
+        
+    Notes:
+        - Files are submitted largest first (longest-processing-time first),
+          so one huge dump starts early instead of running alone at the end
+        - Progress is printed by the parent at most once per second
+        - With --metrics, each worker returns its timers and counters with
+          the result and the parent merges them
+    """
+    sized = sorted(((p.stat().st_size, p) for p in md_files), key=lambda x: x[0], reverse=True)
+    total_bytes = sum(size for size, _ in sized)
+    total = len(sized)
+    
+    logger.info(f"Cleaning with {jobs} worker(s), largest files first")
+    
+    succeeded: List[Path] = []
+    failed: List[Path] = []
+    done = 0
+    done_bytes = 0
+    last_report = 0.0
+    
+    # Imported here: multiprocessing adds tens of milliseconds to every start-up
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    metrics = instrument.active()
+    settings = metrics.settings() if metrics is not None else None
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(logger.getEffectiveLevel(),)) as pool:
+        futures = {}
+        for size, input_path in sized:
+            output_path = output_folder / input_path.relative_to(input_folder)
+            future = pool.submit(instrument.call_with_metrics, settings, str(input_path),
+                                 process_single_file, input_path, output_path,
+                                 remove_topic, stream, sort_by, memory_budget, merge)
+            futures[future] = (size, input_path)
+        
+        for future in as_completed(futures):
+            size, input_path = futures[future]
+            try:
+                ok, snapshot = future.result()
+                if snapshot is not None:
+                    metrics.merge(snapshot)
+            except Exception as e:
+                logger.error(f"Worker failed on {input_path}: {e}")
+                ok = False
+            if ok:
+                succeeded.append(input_path)
+            else:
+                failed.append(input_path)
+            done += 1
+            done_bytes += size
+            
+            now = time.monotonic()
+            if now - last_report >= 1.0 or done == total:
+                last_report = now
+                pct = 100.0 * done_bytes / total_bytes if total_bytes else 100.0
+                logger.info(f"[{done}/{total}] {pct:5.1f}% of bytes | "
+                            f"ok: {len(succeeded)} | failed: {len(failed)}")
+    
+    for input_path in failed:
+        logger.error(f"✗ Failed: {input_path}")
+    
+    return succeeded
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Main entry point for the ExamTopics markdown cleaner.
     
     Parses command-line arguments and processes either a single file or
     an entire folder of markdown files.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    
+    Returns:
+        Exit code: 0 if every file was processed
     """
     p = argparse.ArgumentParser(
         description="Clean and sort ExamTopics markdown question files.",
@@ -314,6 +1227,19 @@ Examples:
   Batch process folder:
     %(prog)s data/raw/aws/ -o data/silver/aws/
     %(prog)s data/raw/azure/ -o data/silver/azure/ --remove-topic
+    %(prog)s data/raw/ -o data/silver/ --jobs 32
+    
+  Streaming (bounded memory, keeps input order):
+    %(prog)s data/raw/all.md -o data/silver/all.md --stream
+
+  External sort by exam, topic and question:
+    %(prog)s data/raw/all.md -o data/silver/all.md --sort exam --memory-budget 512M
+
+  Merge a fresh download into the existing silver file (added/changed/unchanged report):
+    %(prog)s data/raw/aws/sap-c02.md -o data/silver/aws/sap-c02.md --merge
+
+  Metrics (JSON, or Prometheus textfile for *.prom) and profiles of the slowest files:
+    %(prog)s data/raw/ -o data/silver/ --metrics data/metrics/clean_md.prom --profile data/profiles
         """
     )
     p.add_argument("input", type=Path, help="input .md file or folder")
@@ -321,14 +1247,43 @@ Examples:
                    help="output .md file or folder")
     p.add_argument("--remove-topic", action="store_true", 
                    help="also remove 'Topic #: <n>' lines")
+    p.add_argument("--stream", action="store_true",
+                   help="stream line by line with bounded memory (keeps input order)")
+    p.add_argument("--sort", choices=SORT_MODES, default="number",
+                   help="order by question number, or by exam, topic and question "
+                        "parsed from the raw titles (default: number)")
+    p.add_argument("--memory-budget", type=parse_size, default=None, metavar="SIZE",
+                   help="RAM for sections before sorted runs spill to temp files, "
+                        "e.g. 512M or 2G (default: 256M with --sort exam, "
+                        "otherwise sort fully in memory)")
+    p.add_argument("--merge", action="store_true",
+                   help="upsert into the existing output: add new questions, replace changed "
+                        "ones, keep the rest, and rewrite only from the first change on")
+    p.add_argument("-j", "--jobs", type=int, default=1,
+                   help="number of worker processes for folder input (default: 1)")
+    p.add_argument("--force", action="store_true",
+                   help="rebuild every file in folder mode, ignoring the cache manifest")
     p.add_argument("-v", "--verbose", action="store_true",
                    help="enable verbose logging")
-    args = p.parse_args()
+    instrument.add_arguments(p)
+    args = p.parse_args(argv)
+    if args.stream and (args.sort != "number" or args.memory_budget is not None):
+        p.error("--stream keeps input order; it cannot be combined with --sort exam "
+                "or --memory-budget")
+    if args.merge and (args.stream or args.sort != "number" or args.memory_budget is not None):
+        p.error("--merge keeps the question-number order of the existing output; it cannot be "
+                "combined with --stream, --sort exam or --memory-budget")
     
     # Configure logging level
     if args.verbose:
         logger.setLevel(logging.DEBUG)
     
+    with instrument.session(args, "clean_md"):
+        return _run(args)
+
+
+def _run(args: argparse.Namespace) -> int:
+    """Clean the file or folder given on the command line; return the exit code."""
     input_path = args.input
     output_path = args.output
     
@@ -339,8 +1294,11 @@ Examples:
             # If output is a directory, use same filename
             output_path = output_path / input_path.name
         
-        success = process_single_file(input_path, output_path, args.remove_topic)
-        sys.exit(0 if success else 1)
+        with instrument.file(str(input_path)):
+            success = process_single_file(input_path, output_path, args.remove_topic,
+                                          stream=args.stream, sort_by=args.sort,
+                                          memory_budget=args.memory_budget, merge=args.merge)
+        return 0 if success else 1
         
     elif input_path.is_dir():
         # Folder processing
@@ -348,15 +1306,20 @@ Examples:
             output_path.mkdir(parents=True, exist_ok=True)
         elif not output_path.is_dir():
             logger.error(f"Output path exists but is not a directory: {output_path}")
-            sys.exit(1)
+            return 1
         
-        success_count, total_count = process_folder(input_path, output_path, args.remove_topic)
-        sys.exit(0 if success_count == total_count else 1)
+        success_count, total_count = process_folder(input_path, output_path, args.remove_topic,
+                                                    stream=args.stream, jobs=args.jobs,
+                                                    use_cache=not args.force,
+                                                    sort_by=args.sort,
+                                                    memory_budget=args.memory_budget,
+                                                    merge=args.merge)
+        return 0 if success_count == total_count else 1
         
     else:
         logger.error(f"Input path does not exist: {input_path}")
-        sys.exit(1)
+        return 1
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
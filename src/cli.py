@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Single entry point for the Python tools.
+
+Every command is one module of this folder with a main(argv) function. The
+module is imported only when its command runs, so "cli.py exam" never loads
+markdown, sqlite3 or multiprocessing, and this file itself imports nothing
+beyond the interpreter's startup modules. bench_startup.py checks the cold
+start of every command against a time budget.
+
+Usage:
+    python src/cli.py clean data/raw/aws/ -o data/silver/aws/
+    python src/cli.py exam data/silver/aws/dop-c02.md -o data/exam/aws
+    python src/cli.py answers data/silver/aws/dop-c02.md -o data/answers/aws
+    python src/cli.py html data/answers/aws/sap-c02-answers.md
+    python src/cli.py strip-links data/raw/azure/dp-700.md
+    python src/cli.py <command> --help
+"""
+import importlib
+import os
+import sys
+
+# No typing import: it alone would cost more than the rest of the dispatcher
+
+# Command name -> (module, one-line summary)
+COMMANDS = {
+    "clean": ("clean_md", "clean and sort raw ExamTopics dumps into silver files"),
+    "exam": ("exam_gen", "question sheets (questions and options only)"),
+    "answers": ("dum_gen", "answer keys (questions and correct answers)"),
+    "html": ("convert_md_to_html", "render markdown to standalone or paginated HTML"),
+    "strip-links": ("remove_url", "remove timestamp and discussion-link blocks"),
+    "pipeline": ("pipeline", "silver, exam, answers and HTML from a single read"),
+    "dedup": ("dedup", "find exact and near-duplicate questions"),
+    "search": ("search_index", "build and query the full-text search index"),
+    "export": ("export_questions", "export parsed questions to SQLite and Parquet"),
+    "stats": ("corpus_stats", "per-exam answer agreement, coverage and age statistics"),
+    "catalog": ("catalog", "build the certification catalog and process_all CSVs"),
+    "classify-links": ("classify_links", "split a provider link dump into per-exam link files"),
+    "ingest-json": ("json_ingest", "silver, exam and answers directly from JSON/NDJSON question records"),
+    "practice": ("practice_exam", "randomized practice exams from a question offset index"),
+}
+
+
+def usage(prog: str) -> str:
+    lines = [f"usage: {prog} <command> [args...]", "", "commands:"]
+    lines.extend(f"  {name:<12} {summary}" for name, (_, summary) in COMMANDS.items())
+    lines.extend(["", f"Run '{prog} <command> --help' for the options of a command."])
+    return '\n'.join(lines)
+
+
+def main(argv: list = None) -> int:
+    """
+    Run one command.
+
+    Args:
+        argv: Command name followed by its arguments (default: sys.argv[1:])
+
+    Returns:
+        Exit code of the command; 2 for a missing or unknown command
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    prog = os.path.basename(sys.argv[0]) or "cli.py"
+    if argv and argv[0] in ("-h", "--help"):
+        print(usage(prog))
+        return 0
+    if not argv or argv[0] not in COMMANDS:
+        print(usage(prog), file=sys.stderr)
+        if argv:
+            print(f"\n{prog}: error: unknown command '{argv[0]}'", file=sys.stderr)
+        return 2
+
+    name, args = argv[0], argv[1:]
+    module = importlib.import_module(COMMANDS[name][0])
+    # argparse derives the usage line's program name from sys.argv[0]
+    sys.argv[0] = f"{prog} {name}"
+    return module.main(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
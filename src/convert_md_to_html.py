@@ -1,32 +1,34 @@
+import argparse
+import os
 import sys
-import subprocess
+import time
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+import instrument
+
+MISSING_MARKDOWN = "the 'markdown' package is required: pip install markdown"
 
 def ensure_markdown():
     try:
         import markdown
         return markdown
     except ImportError:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "markdown"])
-        import markdown
-        return markdown
+        raise ImportError(MISSING_MARKDOWN) from None
 
 def get_project_root() -> Path:
     return Path(__file__).resolve().parent.parent
 
-def convert_md_to_html(input_md: str):
-    project_root = get_project_root()
-    input_path = (project_root / input_md).resolve()
-    if not input_path.exists():
-        print(f"Input file not found: {input_path}")
-        return 1
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "toc", "nl2br", "attr_list"]
+
+# Markdown instance of this process, reused for every file via reset()
+_converter = None
 
-    md = ensure_markdown()
-    text = input_path.read_text(encoding="utf-8")
-    html_body = md.markdown(text, extensions=["fenced_code", "tables", "toc", "nl2br", "attr_list"])
+# Fragment cache of this process (see render_cache), opened on first use
+_cache = None
 
-    title = input_path.stem
-    html = f"""<!doctype html>
+def render_html_page(title: str, html_body: str) -> str:
+    return f"""<!doctype html>
 <html lang="vi">
 <head>
   <meta charset="utf-8">
@@ -42,13 +44,214 @@ def convert_md_to_html(input_md: str):
 </body>
 </html>"""
 
+def markdown_to_html_page(md, text: str, title: str) -> str:
+    html_body = md.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    return render_html_page(title, html_body)
+
+def get_converter():
+    """Return this process's Markdown instance, creating it on first use."""
+    global _converter
+    if _converter is None:
+        _converter = ensure_markdown().Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return _converter
+
+def render_fragment(text: str) -> str:
+    converter = get_converter()
+    converter.reset()
+    return converter.convert(text)
+
+def renderer_settings() -> str:
+    """Everything that affects rendered fragments, for cache and shard keys."""
+    return f"markdown {ensure_markdown().__version__}; extensions {','.join(MARKDOWN_EXTENSIONS)}"
+
+def get_cache(cache_path: str):
+    """Return this process's RenderCache for cache_path, opening it on first use."""
+    global _cache
+    if _cache is None:
+        from render_cache import RenderCache
+        _cache = RenderCache(cache_path, renderer_settings())
+    return _cache
+
+def convert_text(text: str, title: str, cache=None, page: str = "") -> str:
+    """Same output as markdown_to_html_page, without building a new converter per call.
+
+    With a RenderCache, only question blocks not rendered before go through Markdown.
+    """
+    body = cache.render(page, text, render_fragment) if cache is not None else render_fragment(text)
+    return render_html_page(title, body)
+
+def convert_md_to_html(input_md: str, cache_path: Optional[str] = None, page_size: int = 0):
+    project_root = get_project_root()
+    input_path = (project_root / input_md).resolve()
+    if not input_path.exists():
+        print(f"Input file not found: {input_path}")
+        return 1
+
+    try:
+        md = ensure_markdown()
+    except ImportError as e:
+        print(f"✗ {e}")
+        return 1
+    with instrument.stage("read"):
+        text = input_path.read_text(encoding="utf-8")
+    if page_size:
+        from html_shards import build_shards
+        cache = get_cache(cache_path) if cache_path else None
+        output_dir = input_path.with_suffix("")
+        # Shards are rendered and written page by page: one "render" stage
+        with instrument.stage("render"):
+            result = build_shards(text, output_dir, input_path.stem, page_size, cache, input_path.as_posix())
+        instrument.count("sections", result['questions'])
+        instrument.count("bytes_in", instrument.file_size(input_path))
+        if cache is not None:
+            print(f"Cache: {cache.hits} hit(s), {cache.misses} miss(es), {cache.evict_orphans()} evicted")
+        print(f"✓ {result['questions']} question(s) in {result['shards']} page(s), "
+              f"{result['written']} written to: {output_dir}")
+        return 0
+    if cache_path:
+        cache = get_cache(cache_path)
+        with instrument.stage("render"):
+            html = convert_text(text, input_path.stem, cache, input_path.as_posix())
+        evicted = cache.evict_orphans()
+        print(f"Cache: {cache.hits} hit(s), {cache.misses} miss(es), {evicted} evicted")
+    else:
+        with instrument.stage("render"):
+            html = markdown_to_html_page(md, text, input_path.stem)
+
     output_path = input_path.with_suffix(".html")
-    output_path.write_text(html, encoding="utf-8")
+    with instrument.stage("write"):
+        output_path.write_text(html, encoding="utf-8")
+    instrument.count_bytes(input_path, output_path)
     print(f"✓ HTML saved to: {output_path}")
     return 0
 
+def convert_file(input_path: Path, output_path: Path, cache_path: Optional[str] = None,
+                 page_size: int = 0) -> Tuple[int, int, int]:
+    """Convert one file with the process's shared converter.
+
+    With page_size, output_path is a folder of paginated shards (see html_shards).
+    Returns (input size in bytes, cache hits, cache misses).
+    """
+    with instrument.stage("read"):
+        data = input_path.read_bytes()
+    cache = get_cache(cache_path) if cache_path else None
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    if page_size:
+        from html_shards import build_shards
+        with instrument.stage("render"):
+            result = build_shards(data.decode("utf-8"), output_path, input_path.stem, page_size,
+                                  cache, input_path.as_posix())
+        instrument.count("sections", result['questions'])
+        instrument.count("bytes_in", len(data))
+    else:
+        with instrument.stage("render"):
+            html = convert_text(data.decode("utf-8"), input_path.stem, cache, input_path.as_posix())
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with instrument.stage("write"):
+            output_path.write_text(html, encoding="utf-8")
+        instrument.count_bytes(input_path, output_path)
+    if cache is None:
+        return len(data), 0, 0
+    instrument.count("cache_hits", cache.hits - hits)
+    instrument.count("cache_misses", cache.misses - misses)
+    return len(data), cache.hits - hits, cache.misses - misses
+
+def convert_tree(input_dir: Path, output_dir: Optional[Path] = None, jobs: int = 1,
+                 cache_path: Optional[str] = None, page_size: int = 0) -> Tuple[int, int]:
+    """
+    Convert every .md file under input_dir to HTML.
+
+    Each output goes to <output_dir>/<relative path>.html, or next to its
+    input when output_dir is None; with page_size, to a folder of that name
+    without the suffix, holding paginated shards. Files are spread over `jobs` worker
+    processes, largest first; each worker builds one Markdown instance and
+    resets it between files. With cache_path, question blocks are reused from
+    the fragment cache, pages deleted from input_dir are forgotten and orphaned
+    fragments are evicted at the end. Returns (converted, total).
+    """
+    ensure_markdown()  # fail before any work is scheduled
+    files = sorted(input_dir.rglob("*.md"), key=lambda p: p.stat().st_size, reverse=True)
+    if not files:
+        print(f"No .md files found in: {input_dir}")
+        return 0, 0
+
+    def target(path: Path) -> Path:
+        rel = path.relative_to(input_dir).with_suffix("" if page_size else ".html")
+        return (output_dir / rel) if output_dir is not None else input_dir / rel
+
+    start = time.perf_counter()
+    done_bytes = hits = misses = 0
+    failed: List[Path] = []
+    if jobs <= 1:
+        for path in files:
+            try:
+                with instrument.file(str(path)):
+                    size, h, m = convert_file(path, target(path), cache_path, page_size)
+                done_bytes, hits, misses = done_bytes + size, hits + h, misses + m
+            except Exception as e:
+                print(f"✗ {path}: {e}")
+                failed.append(path)
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        # With --metrics, workers send their timers back with each result
+        metrics = instrument.active()
+        settings = metrics.settings() if metrics is not None else None
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(instrument.call_with_metrics, settings, str(path),
+                                   convert_file, path, target(path), cache_path, page_size): path
+                       for path in files}
+            for future in as_completed(futures):
+                try:
+                    (size, h, m), snapshot = future.result()
+                    if snapshot is not None:
+                        metrics.merge(snapshot)
+                    done_bytes, hits, misses = done_bytes + size, hits + h, misses + m
+                except Exception as e:
+                    print(f"✗ {futures[future]}: {e}")
+                    failed.append(futures[future])
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    if cache_path:
+        cache = get_cache(cache_path)
+        cache.forget_pages(input_dir.as_posix().rstrip("/") + "/", (p.as_posix() for p in files))
+        evicted = cache.evict_orphans()
+        print(f"Cache: {hits} hit(s), {misses} miss(es), {evicted} evicted, {cache.size()} stored")
+
+    converted = len(files) - len(failed)
+    print(f"✓ Converted {converted}/{len(files)} file(s) with {jobs} worker(s) in {elapsed:.2f}s: "
+          f"{converted / elapsed:.1f} files/s, {done_bytes / 1024 / 1024 / elapsed:.2f} MB/s")
+    return converted, len(files)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Convert answer-key markdown to standalone HTML pages.")
+    p.add_argument("input", help="a .md file, or a folder to convert every .md file under it")
+    p.add_argument("-o", "--output", type=Path,
+                   help="output folder for folder input (default: next to each input)")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                   help="worker processes for folder input (default: CPU count)")
+    p.add_argument("--cache", help="SQLite fragment cache; only new or edited questions are re-rendered")
+    p.add_argument("--page-size", type=int, default=0, metavar="N",
+                   help="write each exam as a folder of N-question pages loaded on demand, "
+                        "with a search index; only changed pages are rewritten")
+    instrument.add_arguments(p)
+    args = p.parse_args(argv)
+    if args.page_size < 0:
+        p.error("--page-size must be positive")
+
+    with instrument.session(args, "convert_md_to_html", log=print):
+        return _run(args)
+
+def _run(args: argparse.Namespace) -> int:
+    input_path = (get_project_root() / args.input).resolve()
+    if not input_path.is_dir():
+        with instrument.file(str(input_path)):
+            return convert_md_to_html(args.input, args.cache, args.page_size)
+    try:
+        converted, total = convert_tree(input_path, args.output, args.jobs, args.cache, args.page_size)
+    except ImportError as e:
+        print(f"✗ {e}")
+        return 1
+    return 0 if total and converted == total else 1
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        sys.exit(convert_md_to_html(sys.argv[1]))
-    # default: convert the SAP file in your repo
-    sys.exit(convert_md_to_html("data/answers/aws/sap-c02-answers.md"))
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+Per-exam corpus statistics from the question store, computed with NumPy.
+
+Loads the questions written by export_questions.py once, as integer columns,
+and computes every metric with array operations instead of a loop per file
+or question:
+
+    questions       questions per exam
+    missing         question numbers absent from 1..max of each topic
+                    (with the missing numbers, e.g. "t1:3-5,9")
+    duplicates      repeated (topic, number) pairs
+    mismatch rate   share of questions with both answers whose
+                    "Suggested Answer" letters differ from the "**Answer:**" ones
+                    (Suggested Answer: CD next to **Answer: C**)
+    multi-answer    share of answered questions with more than one letter
+    age             histogram of question ages from their timestamps
+
+- String columns are dictionary-encoded while loading, so the per-exam work
+  only ever sees integers and Python only parses the distinct answer pairs
+  and dates
+- Rows are sorted by (exam, topic, number) once with a NumPy lexsort, which
+  turns the sequence checks into comparisons of neighbouring rows
+- The SQLite store is read in one sequential table scan; the Parquet file
+  from export_questions.py --parquet is read and encoded by pyarrow, the
+  faster source for millions of questions
+- The report is JSON or CSV; --mismatches also lists every disagreeing
+  question
+
+Requires NumPy (pip install numpy); --parquet also needs pyarrow.
+
+Usage:
+    python src/corpus_stats.py --db data/questions.sqlite
+    python src/corpus_stats.py --db data/questions.sqlite --format csv -o data/stats.csv
+    python src/corpus_stats.py --parquet data/questions.parquet -o data/stats.json
+    python src/corpus_stats.py --bins 1,2,3,5 --now 2025-01-01 --mismatches data/mismatches.csv
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import logging
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from export_questions import DEFAULT_DB, load_pyarrow
+
+logger = logging.getLogger(__name__)
+
+# Date part of a timestamp such as "Oct. 21, 2021, 11:35 p.m." -> "Oct. 21, 2021"
+DATE_SQL = "substr(timestamp, 1, instr(timestamp, ', ') + 5)"
+TIME_SUFFIX_RE = r', \d{1,2}(?::\d\d)?\s*[ap]\.?m\.?.*$|, (?:noon|midnight)$'
+DATE_RE = re.compile(r'([A-Za-z]{3})[a-z]*\.? (\d{1,2}), (\d{4})$')
+MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+
+SCAN_SQL = f"SELECT exam, COALESCE(topic, 0), COALESCE(number, 0), suggested, answer, {DATE_SQL} FROM questions"
+
+# Integer columns of the loaded data: exam, topic, number, (suggested, answer) and date ids
+COLUMNS = 5
+
+DEFAULT_BINS = "1,2,3,5"
+
+# Per-exam report fields, in CSV column order (age buckets follow)
+FIELDS = ("exam", "questions", "topics", "missing", "missing_numbers", "duplicates",
+          "compared", "mismatches", "mismatch_rate", "answered", "multi_answer",
+          "multi_answer_ratio", "oldest", "newest")
+
+
+def load_numpy():
+    """
+    Import NumPy.
+
+    Raises:
+        RuntimeError: If NumPy is not installed
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError("corpus statistics need NumPy; install it with: pip install numpy") from e
+    return numpy
+
+
+def parse_date(text: str) -> Optional[datetime.date]:
+    """Parse the date part of an ExamTopics timestamp ("Sept. 13, 2020"), or None."""
+    m = DATE_RE.match(text.strip())
+    month = MONTHS.get(m.group(1).lower()) if m else None
+    if not month:
+        return None
+    try:
+        return datetime.date(int(m.group(3)), month, int(m.group(2)))
+    except ValueError:
+        return None
+
+
+def letters(text: str) -> frozenset:
+    return frozenset(c for c in text.upper() if 'A' <= c <= 'Z')
+
+
+def ranges(numbers: Sequence[int]) -> str:
+    """Compact sorted numbers: [3, 4, 5, 9] -> "3-5,9"."""
+    parts = []
+    start = prev = None
+    for n in numbers:
+        if prev is not None and n == prev + 1:
+            prev = n
+            continue
+        if start is not None:
+            parts.append(f"{start}-{prev}" if prev != start else str(start))
+        start = prev = n
+    if start is not None:
+        parts.append(f"{start}-{prev}" if prev != start else str(start))
+    return ','.join(parts)
+
+
+def bucket_labels(bins: List[float]) -> List[str]:
+    """Age bucket names for year edges, e.g. [1, 2] -> ["<1y", "1-2y", "2y+", "unknown"]."""
+    labels = [f"<{bins[0]:g}y"] if bins else []
+    labels += [f"{a:g}-{b:g}y" for a, b in zip(bins, bins[1:])]
+    labels.append(f"{bins[-1]:g}y+" if bins else "all")
+    return labels + ["unknown"]
+
+
+def load_sqlite(conn: sqlite3.Connection, np) -> Tuple[object, List[str], List[Tuple[str, str]], List[str]]:
+    """
+    Load the questions table as one int64 array of COLUMNS columns.
+
+    Returns:
+        Tuple of (rows x COLUMNS array, exams, (suggested, answer) pairs, date texts);
+        the id columns index these lists
+
+    Notes:
+        - One sequential scan without ORDER BY: sorting through the
+          (exam, topic, number) index fetches every row out of order, several
+          times slower than scanning and sorting in NumPy
+    """
+    count, = conn.execute("SELECT COUNT(*) FROM questions").fetchone()
+    exam_ids: Dict[str, int] = {}
+    pair_ids: Dict[Tuple[str, str], int] = {}
+    date_ids: Dict[str, int] = {}
+    flat = np.fromiter(
+        (v for exam, topic, number, suggested, answer, day in conn.execute(SCAN_SQL)
+         for v in (exam_ids.setdefault(exam, len(exam_ids)), topic, number,
+                   pair_ids.setdefault((suggested, answer), len(pair_ids)),
+                   date_ids.setdefault(day, len(date_ids)))),
+        dtype=np.int64, count=count * COLUMNS)
+    return flat.reshape(count, COLUMNS), list(exam_ids), list(pair_ids), list(date_ids)
+
+
+def load_parquet(path: Path, np) -> Tuple[object, List[str], List[Tuple[str, str]], List[str]]:
+    """Load a Parquet file from export_questions.py like load_sqlite(), with pyarrow compute."""
+    pa = load_pyarrow()
+    import pyarrow.compute as pc
+    table = pa.parquet.read_table(str(path), columns=["exam", "topic", "number", "suggested",
+                                                      "answer", "timestamp"])
+
+    def encode(column):
+        encoded = pc.dictionary_encode(column).combine_chunks()
+        return encoded.indices.to_numpy(zero_copy_only=False), encoded.dictionary.to_pylist()
+
+    exam, exams = encode(table["exam"])
+    pair, joined = encode(pc.binary_join_element_wise(table["suggested"], table["answer"], "\x1f"))
+    day, dates = encode(pc.replace_substring_regex(table["timestamp"], TIME_SUFFIX_RE, ""))
+    data = np.empty((table.num_rows, COLUMNS), dtype=np.int64)
+    data[:, 0] = exam
+    data[:, 1] = table["topic"].fill_null(0).to_numpy()
+    data[:, 2] = table["number"].fill_null(0).to_numpy()
+    data[:, 3] = pair
+    data[:, 4] = day
+    return data, exams, [tuple(p.split("\x1f")) for p in joined], dates
+
+
+def compute_stats(data, exams: List[str], pairs: List[Tuple[str, str]], dates: List[str],
+                  bins: List[float], now: datetime.date, np) -> Tuple[List[Dict], Dict]:
+    """
+    Compute the per-exam report from load_sqlite() or load_parquet() output.
+
+    Args:
+        data: Rows in any order
+        bins: Age bucket edges in years, ascending
+        now: Reference date for ages
+
+    Returns:
+        Tuple of (one dict per exam with FIELDS and an "age" mapping, corpus totals)
+    """
+    n = len(exams)
+    # Renumber exams alphabetically, then sort the rows by exam, topic, number
+    order = sorted(range(n), key=exams.__getitem__)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    exams = [exams[i] for i in order]
+    exam = rank[data[:, 0]] if n else data[:, 0]
+    rows = np.lexsort((data[:, 2], data[:, 1], exam))
+    exam = exam[rows]
+    topic, number, pair, date = (data[rows, i] for i in range(1, COLUMNS))
+    count = np.bincount(exam, minlength=n)
+
+    # Answer flags per distinct (suggested, answer) pair, then per row by fancy indexing
+    sets = [(letters(s), letters(a)) for s, a in pairs]
+    compared_of = np.array([bool(s and a) for s, a in sets], dtype=bool)
+    mismatch_of = np.array([bool(s and a) and s != a for s, a in sets], dtype=bool)
+    answered_of = np.array([bool(a or s) for s, a in sets], dtype=bool)
+    multi_of = np.array([len(a or s) > 1 for s, a in sets], dtype=bool)
+    compared = np.bincount(exam[compared_of[pair]], minlength=n)
+    mismatches = np.bincount(exam[mismatch_of[pair]], minlength=n)
+    answered = np.bincount(exam[answered_of[pair]], minlength=n)
+    multi = np.bincount(exam[multi_of[pair]], minlength=n)
+
+    # Sequence checks on numbered rows; groups are the (exam, topic) runs of the sorted rows
+    numbered = number > 0
+    g_exam, g_topic, g_number = exam[numbered], topic[numbered], number[numbered]
+    new_group = np.ones(len(g_exam), dtype=bool)
+    new_group[1:] = (g_exam[1:] != g_exam[:-1]) | (g_topic[1:] != g_topic[:-1])
+    repeat = np.zeros(len(g_exam), dtype=bool)
+    repeat[1:] = ~new_group[1:] & (g_number[1:] == g_number[:-1])
+    duplicates = np.bincount(g_exam[repeat], minlength=n)
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], len(g_exam)) if len(starts) else starts
+    highest = g_number[ends - 1]
+    # Rows in a group minus its repeats = distinct numbers; the rest of 1..highest is missing
+    repeats = np.add.reduceat(repeat.astype(np.int64), starts) if len(starts) else starts
+    gap = highest - (ends - starts - repeats)
+    missing = np.bincount(g_exam[starts], weights=gap, minlength=n).astype(np.int64)
+    topics = np.bincount(g_exam[starts], minlength=n)
+    missing_numbers: Dict[int, List[str]] = {}
+    for i in np.flatnonzero(gap):
+        absent = np.setdiff1d(np.arange(1, highest[i] + 1), g_number[starts[i]:ends[i]])
+        missing_numbers.setdefault(int(g_exam[starts[i]]), []).append(
+            f"t{int(g_topic[starts[i]])}:{ranges(absent.tolist())}")
+
+    # Ages: parse each distinct date once, then bucket every row
+    ordinals = np.array([d.toordinal() if d else -1 for d in map(parse_date, dates)], dtype=np.int64)
+    row_ord = ordinals[date]
+    known = row_ord >= 0
+    edges = np.array([b * 365.25 for b in bins])
+    bucket = np.searchsorted(edges, now.toordinal() - row_ord, side='right')
+    bucket[~known] = len(bins) + 1
+    labels = bucket_labels(bins)
+    hist = np.bincount(exam * len(labels) + bucket, minlength=n * len(labels)).reshape(n, len(labels))
+    first = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+    newest = np.full(n, -1, dtype=np.int64)
+    np.minimum.at(first, exam[known], row_ord[known])
+    np.maximum.at(newest, exam[known], row_ord[known])
+    oldest = np.where(newest >= 0, first, -1)
+
+    def day(ordinal):
+        return datetime.date.fromordinal(int(ordinal)).isoformat() if ordinal >= 0 else ""
+
+    def rate(num, den):
+        return round(float(num) / float(den), 4) if den else 0.0
+
+    report = []
+    for i, name in enumerate(exams):
+        report.append({
+            "exam": name,
+            "questions": int(count[i]),
+            "topics": int(topics[i]),
+            "missing": int(missing[i]),
+            "missing_numbers": ';'.join(missing_numbers.get(i, [])),
+            "duplicates": int(duplicates[i]),
+            "compared": int(compared[i]),
+            "mismatches": int(mismatches[i]),
+            "mismatch_rate": rate(mismatches[i], compared[i]),
+            "answered": int(answered[i]),
+            "multi_answer": int(multi[i]),
+            "multi_answer_ratio": rate(multi[i], answered[i]),
+            "oldest": day(oldest[i]),
+            "newest": day(newest[i]),
+            "age": dict(zip(labels, (int(v) for v in hist[i]))),
+        })
+    totals = {
+        "exams": n,
+        "questions": int(count.sum()),
+        "missing": int(missing.sum()),
+        "duplicates": int(duplicates.sum()),
+        "mismatches": int(mismatches.sum()),
+        "mismatch_rate": rate(mismatches.sum(), compared.sum()),
+        "multi_answer_ratio": rate(multi.sum(), answered.sum()),
+        "age": dict(zip(labels, (int(v) for v in hist.sum(axis=0)))) if n else {},
+    }
+    return report, totals
+
+
+def mismatch_pairs(pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """The (suggested, answer) pairs whose answer letters disagree."""
+    out = []
+    for s, a in pairs:
+        ls, la = letters(s), letters(a)
+        if ls and la and ls != la:
+            out.append((s, a))
+    return out
+
+
+MISMATCH_FIELDS = ("exam", "topic", "number", "suggested", "answer", "link")
+
+
+def mismatch_rows_sqlite(conn: sqlite3.Connection, pairs: List[Tuple[str, str]]) -> Iterable[Tuple]:
+    """Questions of the store whose (suggested, answer) pair is one of pairs, sorted."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS mismatch_pairs (suggested TEXT, answer TEXT)")
+    conn.execute("DELETE FROM mismatch_pairs")
+    conn.executemany("INSERT INTO mismatch_pairs VALUES (?, ?)", pairs)
+    return conn.execute(
+        f"SELECT {', '.join('q.' + name for name in MISMATCH_FIELDS)} FROM questions q "
+        "JOIN mismatch_pairs m ON m.suggested = q.suggested AND m.answer = q.answer "
+        "ORDER BY q.exam, q.topic, q.number")
+
+
+def mismatch_rows_parquet(path: Path, pairs: List[Tuple[str, str]]) -> Iterable[Tuple]:
+    """Questions of the Parquet file whose (suggested, answer) pair is one of pairs, sorted."""
+    pa = load_pyarrow()
+    import pyarrow.compute as pc
+    table = pa.parquet.read_table(str(path), columns=list(MISMATCH_FIELDS))
+    joined = pc.binary_join_element_wise(table["suggested"], table["answer"], "\x1f")
+    table = table.filter(pc.is_in(joined, value_set=pa.array(["\x1f".join(p) for p in pairs],
+                                                               type=pa.string())))
+    # Nulls first, as SQLite orders them
+    table = table.sort_by([("exam", "ascending"), ("topic", "ascending"), ("number", "ascending")],
+                          null_placement="at_start")
+    return zip(*(table[name].to_pylist() for name in MISMATCH_FIELDS))
+
+
+def write_mismatches(rows: Iterable[Tuple], path: Path) -> int:
+    """Write the questions whose answers disagree as CSV; return the row count."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(MISMATCH_FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def render(report: List[Dict], totals: Dict, fmt: str, meta: Dict) -> str:
+    """Format the report as JSON (with totals) or CSV (one row per exam)."""
+    if fmt == "json":
+        return json.dumps({**meta, "totals": totals, "exams": report}, indent=2, ensure_ascii=False) + "\n"
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    labels = list(report[0]["age"]) if report else []
+    writer.writerow(FIELDS + tuple(f"age {label}" for label in labels))
+    for row in report:
+        writer.writerow([row[k] for k in FIELDS] + [row["age"][label] for label in labels])
+    return out.getvalue()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Per-exam statistics of the exported question store (needs NumPy).",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Export, then report as JSON:
+    python src/export_questions.py data/raw/ --db data/questions.sqlite
+    %(prog)s --db data/questions.sqlite -o data/stats.json
+
+  Millions of questions: export with --parquet once, then read that:
+    %(prog)s --parquet data/questions.parquet -o data/stats.json
+
+  CSV, ages relative to a fixed date, and the list of disagreeing answers:
+    %(prog)s --format csv --now 2025-01-01 --mismatches data/mismatches.csv
+        """
+    )
+    p.add_argument("--db", default=DEFAULT_DB, help="question store from export_questions.py (default: %(default)s)")
+    p.add_argument("--parquet", type=Path,
+                   help="read the Parquet file from export_questions.py --parquet instead (needs pyarrow)")
+    p.add_argument("--format", choices=("json", "csv"), default="json", help="report format (default: %(default)s)")
+    p.add_argument("-o", "--output", type=Path, help="report file (default: stdout)")
+    p.add_argument("--bins", default=DEFAULT_BINS,
+                   help="age bucket edges in years, comma-separated (default: %(default)s)")
+    p.add_argument("--now", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                   metavar="YYYY-MM-DD", help="reference date for ages (default: today)")
+    p.add_argument("--mismatches", type=Path, help="also write every question with disagreeing answers as CSV")
+    p.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        bins = sorted(float(b) for b in args.bins.split(',') if b.strip())
+        np = load_numpy()
+    except ValueError:
+        logger.error(f"Invalid --bins: {args.bins}")
+        return 1
+    except RuntimeError as e:
+        logger.error(str(e))
+        return 1
+    source = args.parquet or Path(args.db)
+    if not source.is_file():
+        logger.error(f"Input not found: {source} (create it with export_questions.py)")
+        return 1
+    if args.parquet:
+        try:
+            load_pyarrow()
+        except RuntimeError as e:
+            logger.error(str(e))
+            return 1
+
+    conn = None if args.parquet else sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    try:
+        start = time.perf_counter()
+        data, exams, pairs, dates = load_sqlite(conn, np) if conn else load_parquet(source, np)
+        loaded = time.perf_counter()
+        report, totals = compute_stats(data, exams, pairs, dates, bins, args.now, np)
+        logger.info(f"✓ {totals['questions']} question(s) of {totals['exams']} exam(s): loaded in "
+                    f"{loaded - start:.2f}s, computed in {time.perf_counter() - loaded:.2f}s")
+        if args.mismatches:
+            disagree = mismatch_pairs(pairs)
+            rows = write_mismatches(mismatch_rows_sqlite(conn, disagree) if conn
+                                    else mismatch_rows_parquet(source, disagree), args.mismatches)
+            logger.info(f"✓ {rows} disagreeing question(s) written to: {args.mismatches}")
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logger.error(f"Cannot read {source}: {e}")
+        return 1
+    finally:
+        if conn:
+            conn.close()
+
+    text = render(report, totals, args.format, {"source": str(source), "now": args.now.isoformat(),
+                                                 "bins": bins})
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text, encoding='utf-8')
+        logger.info(f"✓ Report written to: {args.output}")
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
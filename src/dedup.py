@@ -0,0 +1,576 @@
+# -*- coding: utf-8 -*-
+"""
+Duplicate question detection for cleaned ExamTopics markdown and raw dumps.
+
+The same question shows up many times in a corpus: the discussion board
+re-posts it, it carries over between exam versions (SAA-C02 and SAA-C03), and
+repeated downloads get concatenated. This stage finds:
+
+- Exact duplicates: identical stem and options after normalization
+  (case, punctuation, whitespace and option order are ignored)
+- Near duplicates: one-permutation MinHash signatures over word 3-gram
+  shingles, bucketed with LSH banding, so each question is compared only with the few
+  candidates sharing a band instead of with every other question
+
+Signatures live in a persistent SQLite index. Every run checks the new
+questions against everything indexed before, so a fresh download is compared
+with the whole corpus without re-reading it. Inputs whose content is
+unchanged since they were indexed are skipped. Raw dumps from the downloader
+are parsed with their own headers, so a question has the same signature in a
+raw dump and in its cleaned file.
+
+Usage:
+    python src/dedup.py data/silver/ --index data/dedup.sqlite --report data/dedup-report.md
+    python src/dedup.py data/silver/aws/saa-c03.md --index data/dedup.sqlite --check
+    python src/dedup.py data/silver/ --index data/dedup.sqlite -o data/gold/ --report report.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import operator
+import random
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from build_manifest import file_key, file_sha256
+from question_ir import Question, parse_input
+
+# Signature layout: NUM_PERM 32-bit bin minimums, split into BANDS bands of ROWS.
+# 16 bands of 8 rows make pairs at similarity 0.8 candidates ~95% of the time
+# and pairs at 0.5 only ~6%, so templated question banks stay cheap to check.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+# One-permutation hashing: the low bits of a shingle hash pick its bin
+_BIN_BITS = NUM_PERM.bit_length() - 1
+_EMPTY = 1 << 64
+_MASK32 = 0xFFFFFFFF
+# Fixed pseudo-random donor order per bin for densifying empty bins
+_DONORS = [random.Random(j).sample(range(NUM_PERM), NUM_PERM) for j in range(NUM_PERM)]
+
+# Estimated Jaccard similarity at or above which two questions are near duplicates
+DEFAULT_THRESHOLD = 0.8
+
+INDEX_FORMAT = 2
+
+# Characters of the stem kept in the index for reports
+EXCERPT_LENGTH = 120
+
+# Maximum ids per "IN (...)" query, below SQLite's variable limit
+QUERY_CHUNK = 500
+
+WORD_RE = re.compile(r'\w+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    ordinal INTEGER NOT NULL,
+    number INTEGER,
+    exact_hash TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    excerpt TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_exact ON questions (exact_hash);
+CREATE INDEX IF NOT EXISTS questions_file ON questions (file_id);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, question_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS links (
+    question_id INTEGER PRIMARY KEY,
+    duplicate_of INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    similarity REAL NOT NULL
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_words(q: Question) -> List[str]:
+    """
+    Normalize a question's stem and options into a word list.
+
+    Args:
+        q: Parsed question record
+
+    Returns:
+        Lowercased words of the stem followed by the options in sorted order,
+        so a re-post with shuffled options still matches
+    """
+    parts = [q.stem]
+    parts.extend(sorted(text for _, text in q.options))
+    text = unicodedata.normalize('NFKC', '\n'.join(parts)).lower()
+    return WORD_RE.findall(text)
+
+
+def minhash(words: List[str]) -> array:
+    """
+    Compute the MinHash signature of a word list's 3-gram shingles.
+
+    Uses one-permutation hashing: each shingle is hashed once and only
+    competes for the bin picked by its low bits, so the cost is linear in
+    the number of shingles rather than shingles x NUM_PERM. An empty bin
+    copies the first filled bin in its own fixed donor order ("optimal
+    densification"). Donors differ from bin to bin, so the bins of one LSH
+    band stay close to independent even for short questions.
+
+    Args:
+        words: Normalized words, at least one
+
+    Returns:
+        array('I') of NUM_PERM values
+    """
+    if len(words) < SHINGLE_WORDS:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {' '.join(words[i:i + SHINGLE_WORDS])
+                    for i in range(len(words) - SHINGLE_WORDS + 1)}
+    bins = [_EMPTY] * NUM_PERM
+    mask = NUM_PERM - 1
+    for s in shingles:
+        h = int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+        b, v = h & mask, h >> _BIN_BITS
+        if v < bins[b]:
+            bins[b] = v
+
+    signature = array('I', [0]) * NUM_PERM
+    for j, v in enumerate(bins):
+        if v == _EMPTY:
+            v = next(bins[d] for d in _DONORS[j] if bins[d] != _EMPTY)
+        signature[j] = v & _MASK32
+    return signature
+
+
+def band_keys(signature: array) -> List[int]:
+    """Hash each band of a signature, with its band number, into a 64-bit LSH bucket key."""
+    return [int.from_bytes(hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(),
+                                           digest_size=8, salt=bytes((band,))).digest(),
+                           'little', signed=True)
+            for band in range(BANDS)]
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimate the Jaccard similarity of two signatures."""
+    return sum(map(operator.eq, a, b)) / NUM_PERM
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for i in range(0, len(ids), QUERY_CHUNK):
+        yield ids[i:i + QUERY_CHUNK]
+
+
+class DedupIndex:
+    """
+    Persistent MinHash/LSH index of every question seen so far.
+
+    Args:
+        path: SQLite database file (created if missing), or ":memory:"
+        threshold: Estimated Jaccard similarity for near duplicates
+
+    Notes:
+        - Each question is linked to the first earlier question it
+          duplicates; clusters are the connected components of those links
+        - Changes are made in one transaction; call commit() to keep them or
+          rollback() to only check inputs against the index
+    """
+
+    def __init__(self, path: str, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        expected = {"format": str(INDEX_FORMAT), "num_perm": str(NUM_PERM), "bands": str(BANDS)}
+        stored = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if not stored:
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", expected.items())
+            self.conn.commit()
+        elif stored != expected:
+            raise ValueError(f"{path} was built with different settings {stored}; "
+                             f"delete it to rebuild the index")
+
+    def file_state(self, key: str) -> Optional[Tuple[int, str]]:
+        """Return (file_id, sha256) of an indexed file, or None."""
+        return self.conn.execute("SELECT id, sha256 FROM files WHERE path = ?", (key,)).fetchone()
+
+    def drop_file(self, file_id: int) -> None:
+        """
+        Remove a file's questions from the index.
+
+        Near-duplicate links from other files to the removed questions are
+        dropped, so those questions stop counting as duplicates until
+        re-indexed. Exact copies elsewhere are relinked to the earliest
+        remaining copy, which takes over the LSH buckets.
+        """
+        ids = [row[0] for row in self.conn.execute(
+            "SELECT id FROM questions WHERE file_id = ?", (file_id,))]
+        orphans: Dict[str, List[Tuple[int, bytes]]] = {}
+        for chunk in _chunks(ids):
+            marks = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                "SELECT q.id, q.exact_hash, q.signature FROM links l "
+                "JOIN questions q ON q.id = l.question_id "
+                f"WHERE l.kind = 'exact' AND l.duplicate_of IN ({marks}) "
+                f"AND q.file_id != ?", chunk + [file_id])
+            for qid, exact_hash, blob in rows:
+                orphans.setdefault(exact_hash, []).append((qid, blob))
+            self.conn.execute(f"DELETE FROM buckets WHERE question_id IN ({marks})", chunk)
+            self.conn.execute(f"DELETE FROM links WHERE question_id IN ({marks}) "
+                              f"OR duplicate_of IN ({marks})", chunk + chunk)
+        self.conn.execute("DELETE FROM questions WHERE file_id = ?", (file_id,))
+        self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+        for copies in orphans.values():
+            copies.sort()
+            original, blob = copies[0]
+            self.conn.executemany("INSERT INTO buckets (bucket, question_id) VALUES (?, ?)",
+                                  [(k, original) for k in band_keys(array('I', blob))])
+            self.conn.executemany("INSERT INTO links (question_id, duplicate_of, kind, similarity) "
+                                  "VALUES (?, ?, 'exact', 1.0)",
+                                  [(qid, original) for qid, _ in copies[1:]])
+
+    def _best_candidate(self, signature: array, keys: List[int]) -> Tuple[Optional[int], float]:
+        """Find the most similar indexed question among the LSH candidates."""
+        marks = ','.join('?' * len(keys))
+        candidates = [row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT question_id FROM buckets WHERE bucket IN ({marks})", keys)]
+        best_id, best = None, 0.0
+        for chunk in _chunks(candidates):
+            rows = self.conn.execute(
+                f"SELECT id, signature FROM questions WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk)
+            for qid, blob in rows:
+                sim = similarity(signature, array('I', blob))
+                if sim > best or (sim == best and best_id is not None and qid < best_id):
+                    best_id, best = qid, sim
+        if best_id is None or best < self.threshold:
+            return None, 0.0
+        return best_id, best
+
+    def add_file(self, key: str, digest: str, questions: List[Question]) -> Dict[str, int]:
+        """
+        Check a file's questions against the index and add them to it.
+
+        Args:
+            key: File key from build_manifest.file_key()
+            digest: SHA-256 of the file content
+            questions: Parsed questions of the file
+
+        Returns:
+            Counts of "questions" indexed, "exact" and "near" duplicates found,
+            and questions "skipped" because they have no text
+        """
+        counts = {"questions": 0, "exact": 0, "near": 0, "skipped": 0}
+        cur = self.conn.execute("INSERT INTO files (path, sha256) VALUES (?, ?)", (key, digest))
+        file_id = cur.lastrowid
+        for ordinal, q in enumerate(questions):
+            words = normalize_words(q)
+            if not words:
+                counts["skipped"] += 1
+                continue
+            exact_hash = hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=16).hexdigest()
+            row = self.conn.execute("SELECT id, signature FROM questions WHERE exact_hash = ? "
+                                    "ORDER BY id LIMIT 1", (exact_hash,)).fetchone()
+            if row is not None:
+                # An exact copy reuses its original's signature and needs no buckets of its own
+                link = (row[0], "exact", 1.0)
+                signature, keys = array('I', row[1]), []
+            else:
+                signature = minhash(words)
+                keys = band_keys(signature)
+                best_id, best = self._best_candidate(signature, keys)
+                link = (best_id, "near", best) if best_id is not None else None
+
+            cur = self.conn.execute(
+                "INSERT INTO questions (file_id, ordinal, number, exact_hash, signature, excerpt) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (file_id, ordinal, q.number, exact_hash, signature.tobytes(),
+                 ' '.join(q.stem.split())[:EXCERPT_LENGTH]))
+            qid = cur.lastrowid
+            counts["questions"] += 1
+            if link is not None:
+                self.conn.execute("INSERT INTO links (question_id, duplicate_of, kind, similarity) "
+                                  "VALUES (?, ?, ?, ?)", (qid,) + link)
+                counts[link[1]] += 1
+            if keys:
+                self.conn.executemany("INSERT INTO buckets (bucket, question_id) VALUES (?, ?)",
+                                      [(k, qid) for k in keys])
+        return counts
+
+    def duplicate_ordinals(self, key: str) -> Set[int]:
+        """Positions, within their file, of the questions that duplicate an earlier one."""
+        return {row[0] for row in self.conn.execute(
+            "SELECT q.ordinal FROM questions q JOIN files f ON f.id = q.file_id "
+            "JOIN links l ON l.question_id = q.id WHERE f.path = ?", (key,))}
+
+    def clusters(self) -> List[Dict]:
+        """
+        Group linked questions into clusters.
+
+        Returns:
+            Clusters, largest first. Each has the "kept" question (the
+            earliest indexed) and its "duplicates" with kind and similarity.
+        """
+        parent: Dict[int, int] = {}
+
+        def find(x: int) -> int:
+            root = x
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while x != root:
+                parent[x], x = root, parent.get(x, x)
+            return root
+
+        links = {}
+        nodes: Set[int] = set()
+        for qid, dup_of, kind, sim in self.conn.execute(
+                "SELECT question_id, duplicate_of, kind, similarity FROM links"):
+            links[qid] = (kind, sim)
+            nodes.update((qid, dup_of))
+            a, b = find(qid), find(dup_of)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+        # Links always point to an earlier id, so each root is its cluster's first question
+        groups: Dict[int, List[int]] = {}
+        for qid in nodes:
+            groups.setdefault(find(qid), []).append(qid)
+
+        info = {}
+        ids = sorted({qid for members in groups.values() for qid in members})
+        for chunk in _chunks(ids):
+            rows = self.conn.execute(
+                "SELECT q.id, f.path, q.number, q.excerpt FROM questions q "
+                f"JOIN files f ON f.id = q.file_id WHERE q.id IN ({','.join('?' * len(chunk))})",
+                chunk)
+            for qid, path, number, excerpt in rows:
+                info[qid] = {"file": path, "number": number, "excerpt": excerpt}
+
+        result = []
+        for root, members in groups.items():
+            duplicates = []
+            for qid in sorted(members):
+                if qid == root:
+                    continue
+                kind, sim = links.get(qid, ("near", 0.0))
+                duplicates.append(dict(info[qid], kind=kind, similarity=round(sim, 3)))
+            result.append({"kept": info[root], "duplicates": duplicates})
+        result.sort(key=lambda c: (-len(c["duplicates"]), c["kept"]["file"], c["kept"]["number"] or 0))
+        return result
+
+    def totals(self) -> Dict[str, int]:
+        """Count indexed questions and duplicate links by kind."""
+        totals = {"questions": self.conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0],
+                  "exact": 0, "near": 0}
+        for kind, count in self.conn.execute("SELECT kind, COUNT(*) FROM links GROUP BY kind"):
+            totals[kind] = count
+        return totals
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Undo every change made inside the block if it raises."""
+        # Releasing an outermost savepoint would commit, so nest it in a transaction
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        self.conn.execute("SAVEPOINT file")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK TO file")
+            raise
+        finally:
+            self.conn.execute("RELEASE file")
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        self.conn.rollback()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def write_deduplicated(input_path: Path, output_path: Path, drop: Set[int]) -> int:
+    """
+    Write a copy of a cleaned file or raw dump without the given questions.
+
+    Args:
+        input_path: Cleaned or raw .md file
+        output_path: Destination file
+        drop: Positions of the questions to leave out
+
+    Returns:
+        Number of questions written
+    """
+    content = input_path.read_text(encoding='utf-8')
+    questions = parse_input(content, with_fields=False)
+    parts = [content[:questions[0].start] if questions else content]
+    parts.extend(q.text() for i, q in enumerate(questions) if i not in drop)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(''.join(parts), encoding='utf-8')
+    return len(questions) - len(drop)
+
+
+def format_report(totals: Dict[str, int], clusters: List[Dict], as_json: bool) -> str:
+    """
+    Render the cluster report.
+
+    Args:
+        totals: Output of DedupIndex.totals()
+        clusters: Output of DedupIndex.clusters()
+        as_json: Emit JSON instead of markdown
+
+    Returns:
+        Report text
+    """
+    if as_json:
+        return json.dumps({"totals": totals, "clusters": clusters}, indent=2, ensure_ascii=False)
+
+    def describe(entry: Dict) -> str:
+        number = f"question {entry['number']}" if entry["number"] is not None else "question"
+        return f"`{entry['file']}` {number}: {entry['excerpt']}"
+
+    lines = ["# Duplicate Question Report", "",
+             f"- Questions indexed: {totals['questions']}",
+             f"- Exact duplicates: {totals['exact']}",
+             f"- Near duplicates: {totals['near']}",
+             f"- Clusters: {len(clusters)}", ""]
+    for i, cluster in enumerate(clusters, 1):
+        lines.append(f"## Cluster {i} ({len(cluster['duplicates']) + 1} questions)")
+        lines.append("")
+        lines.append(f"- kept: {describe(cluster['kept'])}")
+        for dup in cluster["duplicates"]:
+            label = "exact" if dup["kind"] == "exact" else f"near {dup['similarity']:.2f}"
+            lines.append(f"- {label}: {describe(dup)}")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def run_dedup(inputs: List[Path], index: DedupIndex, output_root: Optional[Path] = None,
+              check: bool = False) -> Tuple[int, int]:
+    """
+    Index cleaned files or raw dumps and optionally write deduplicated copies.
+
+    Args:
+        inputs: Cleaned or raw .md files or folders
+        index: Open DedupIndex
+        output_root: Folder for copies without duplicates, or None
+        check: If True, leave the index unchanged (caller rolls back)
+
+    Returns:
+        Tuple of (success_count, total_count)
+    """
+    files: List[Tuple[Path, Path]] = []
+    for path in inputs:
+        if path.is_dir():
+            files.extend((f, f.relative_to(path)) for f in sorted(path.rglob("*.md")))
+        elif path.is_file():
+            files.append((path, Path(path.name)))
+        else:
+            logger.error(f"Input path does not exist: {path}")
+
+    success_count = 0
+    for path, rel in files:
+        try:
+            key = file_key(path)
+            digest = file_sha256(path)
+            state = index.file_state(key)
+            if state and state[1] == digest:
+                logger.info(f"✓ {key}: unchanged, already indexed")
+            else:
+                questions = parse_input(path.read_text(encoding='utf-8'))
+                if not questions:
+                    logger.warning(f"{key}: no questions found (expected \"## question N\" "
+                                   f"or raw dump headers)")
+                with index.savepoint():
+                    if state:
+                        index.drop_file(state[0])
+                    counts = index.add_file(key, digest, questions)
+                logger.info(f"✓ {key}: {counts['questions']} question(s), "
+                            f"{counts['exact']} exact and {counts['near']} near duplicate(s)")
+            if output_root is not None:
+                kept = write_deduplicated(path, output_root / rel, index.duplicate_ordinals(key))
+                logger.debug(f"  wrote {kept} question(s) to {output_root / rel}")
+            success_count += 1
+        except Exception as e:
+            logger.error(f"Error processing {path}: {e}")
+    if not check:
+        index.commit()
+    return success_count, len(files)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Find exact and near-duplicate questions in cleaned ExamTopics markdown or raw dumps.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Index a corpus and write a cluster report:
+    %(prog)s data/silver/ --index data/dedup.sqlite --report data/dedup-report.md
+
+  Check a new download against the index without adding it:
+    %(prog)s data/silver/aws/saa-c03.md --index data/dedup.sqlite --check
+
+  Write copies of the inputs without duplicates:
+    %(prog)s data/silver/ --index data/dedup.sqlite -o data/gold/ --report report.json
+        """
+    )
+    p.add_argument("inputs", type=Path, nargs="+", help="cleaned or raw .md files or folders")
+    p.add_argument("--index", default=":memory:",
+                   help="SQLite signature index to check against and update (default: in memory)")
+    p.add_argument("-o", "--output", type=Path, help="folder for copies without duplicate questions")
+    p.add_argument("--report", type=Path, help="write the cluster report (.json for JSON, else markdown)")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                   help="similarity for near duplicates, 0-1 (default: %(default)s)")
+    p.add_argument("--check", action="store_true", help="report duplicates without updating the index")
+    p.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        index = DedupIndex(args.index, args.threshold)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Cannot open index {args.index}: {e}")
+        return 1
+
+    start = time.perf_counter()
+    success_count, total_count = run_dedup(args.inputs, index, args.output, args.check)
+    totals = index.totals()
+    logger.info(f"Indexed {totals['questions']} question(s): {totals['exact']} exact and "
+                f"{totals['near']} near duplicate(s) in {time.perf_counter() - start:.1f}s")
+
+    if args.report:
+        report = format_report(totals, index.clusters(), args.report.suffix.lower() == ".json")
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(report, encoding='utf-8')
+        logger.info(f"✓ Report written to: {args.report}")
+    if args.check:
+        index.rollback()
+    index.close()
+    return 0 if total_count and success_count == total_count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,17 @@
-import re
+import argparse
 import os
+import sys
+import time
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+import instrument
+from question_ir import ParseTimeout, Question, parse_questions
+
+QUESTION_SEPARATOR = "\n\n----------------------------------------\n\n"
+
+# Seconds one file may spend in parsing during batch runs
+DEFAULT_TIME_BUDGET = 60.0
 
 
 def get_project_root() -> Path:
@@ -47,44 +58,74 @@ def parse_question_with_answer(question_text: str) -> dict:
         'correct_answers': []
     }
     
-    # Extract title (e.g. ## question 1)
-    title_match = re.search(r'(?mi)^##\s*question(?:\s+(\d+))?', question_text)
-    if title_match:
-        num = title_match.group(1)
-        result['title'] = f"question {int(num)}" if num else 'question'
-
-    # Remove any Suggested Answer lines that may appear
-    qt = re.sub(r'(?mi)^\s*Suggested Answer:.*$', '', question_text, flags=re.MULTILINE)
-
-    # Extract question content (text between header and first option or Answer)
-    # We consider options that start with a capital letter followed by a dot, e.g. "A. "
-    q_match = re.search(r'(?ms)^##\s*question.*?\n\n(.*?)(?=\n\n[A-Z]\.\s|\n\n\*\*Answer:|$)', qt)
-    if q_match:
-        result['question'] = q_match.group(1).strip()
-
-    # Extract options like 'A. Option text' (multi-line allowed until next option or Answer)
-    options_dict = {}
-    option_pattern = r'(?ms)\n\n([A-Z])\.\s+(.*?)(?=\n\n[A-Z]\.\s|\n\n\*\*Answer:|$)'
-    options = re.findall(option_pattern, qt)
-    for letter, text in options:
-        options_dict[letter] = text.strip()
-
-    # Extract answer (letters inside bold Answer marker)
-    answer_match = re.search(r'\*\*Answer:\s*([A-Z]+)\*\*', qt)
-    if answer_match:
-        answer_text = answer_match.group(1)
-        result['correct_answers'] = extract_answers(answer_text, options_dict)
+    questions = parse_questions(question_text)
+    if questions:
+        q = questions[0]
+        result['title'] = q.title
+        result['question'] = q.stem
+        if q.answer:
+            result['correct_answers'] = extract_answers(q.answer, q.option_map())
     
     return result
 
 
-def process_exam_with_answers(input_file: str, output_dir: str) -> None:
+def render_answer_question(q: Question) -> Optional[str]:
+    """
+    Render one question with its correct answer texts.
+    
+    Args:
+        q: Parsed question record
+    
+    Returns:
+        Markdown block, or None if the question has no stem or no resolvable answer
+    """
+    correct_answers = extract_answers(q.answer, q.option_map()) if q.answer else []
+    # Image-only options ("A." with no text) cannot be shown as answer text
+    correct_answers = [answer for answer in correct_answers if answer]
+    if not (q.stem and correct_answers):
+        return None
+    output = f"## {q.title}\n\n"
+    output += f"{q.stem}\n\n"
+    output += "**Correct Answer(s):**\n\n"
+    for answer in correct_answers:
+        output += f"- {answer}\n"
+    return output
+
+
+def render_answers(exam_name: str, questions: List[Question]) -> Tuple[str, int]:
+    """
+    Render the answer key document for an exam.
+    
+    Args:
+        exam_name: Exam name used in the title
+        questions: Parsed question records
+    
+    Returns:
+        Tuple of (markdown document text, number of questions rendered)
+    """
+    processed_questions = []
+    for q in questions:
+        block = render_answer_question(q)
+        if block is not None:
+            processed_questions.append(block)
+    
+    output_content = f"# Exam Questions & Answers - {exam_name.upper()}\n\n"
+    output_content += QUESTION_SEPARATOR.join(processed_questions)
+    return output_content, len(processed_questions)
+
+
+def process_exam_with_answers(input_file: str, output_dir: str,
+                              time_budget: Optional[float] = None) -> None:
     """
     Process exam file to extract questions and correct answers only.
     
     Args:
         input_file: Path to input markdown file (relative to project root)
         output_dir: Directory to save output file (relative to project root)
+        time_budget: Seconds allowed for parsing, or None for no limit
+    
+    Raises:
+        ParseTimeout: If parsing exceeds time_budget; no output is written
     """
     # Get project root and resolve paths
     project_root = get_project_root()
@@ -92,66 +133,49 @@ def process_exam_with_answers(input_file: str, output_dir: str) -> None:
     output_path = project_root / output_dir
     
     # Read input file
-    with open(input_path, 'r', encoding='utf-8') as f:
+    with instrument.stage("read"), open(input_path, 'r', encoding='utf-8') as f:
         content = f.read()
     
     # Extract exam name from file path
     exam_name = input_path.stem
     
-    # Split content into question sections using '## question' headers
-    header_re = re.compile(r'(?mi)^##\s*question(?:\s+\d+)?')
-    matches = list(header_re.finditer(content))
-
-    processed_questions = []
-    if not matches:
-        # fallback: parse whole file as single question block
-        parsed = parse_question_with_answer(content)
-        if parsed['question'] and parsed['correct_answers']:
-            output = f"## {parsed['title']}\n\n"
-            output += f"{parsed['question']}\n\n"
-            output += "**Correct Answer(s):**\n\n"
-            for answer in parsed['correct_answers']:
-                output += f"- {answer}\n"
-            processed_questions.append(output)
-    else:
-        for i, m in enumerate(matches):
-            start = m.start()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
-            section = content[start:end]
-            parsed = parse_question_with_answer(section)
-            if parsed['question'] and parsed['correct_answers']:
-                output = f"## {parsed['title']}\n\n"
-                output += f"{parsed['question']}\n\n"
-                output += "**Correct Answer(s):**\n\n"
-                for answer in parsed['correct_answers']:
-                    output += f"- {answer}\n"
-                processed_questions.append(output)
-    
-    # Create output content
-    output_content = f"# Exam Questions & Answers - {exam_name.upper()}\n\n"
-    output_content += "\n\n----------------------------------------\n\n".join(processed_questions)
+    # Parse every '## question' section once into question records
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    with instrument.stage("split"):
+        questions = parse_questions(content, deadline=deadline)
+    with instrument.stage("render"):
+        output_content, total = render_answers(exam_name, questions)
     
     # Create output directory if not exists
     output_path.mkdir(parents=True, exist_ok=True)
     
     # Write output file
     output_file = output_path / f"{exam_name}-answers.md"
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with instrument.stage("write"), open(output_file, 'w', encoding='utf-8') as f:
         f.write(output_content)
+    instrument.count("sections", len(questions))
+    instrument.count("answers_rendered", total)
+    instrument.count_bytes(input_path, output_file)
     
     print(f"✓ Processed: {input_path}")
     print(f"✓ Output saved to: {output_file}")
-    print(f"✓ Total questions: {len(processed_questions)}")
+    print(f"✓ Total questions: {total}")
 
 
 def process_all_exams_with_answers(input_dir: str = "data/raw/aws", 
-                                   output_dir: str = "data/answers/aws") -> None:
+                                   output_dir: str = "data/answers/aws",
+                                   time_budget: Optional[float] = DEFAULT_TIME_BUDGET) -> Tuple[int, int]:
     """
     Process all exam files to extract questions and answers.
     
     Args:
         input_dir: Directory containing raw exam files (relative to project root)
         output_dir: Directory to save processed files (relative to project root)
+        time_budget: Seconds each file may spend in parsing before it is
+            skipped, or None for no limit
+    
+    Returns:
+        Tuple of (processed files, total files)
     """
     # Get project root and resolve paths
     project_root = get_project_root()
@@ -162,28 +186,64 @@ def process_all_exams_with_answers(input_dir: str = "data/raw/aws",
     
     if not exam_files:
         print(f"No markdown files found in {input_path}")
-        return
+        return 0, 0
     
     print(f"Found {len(exam_files)} exam file(s) to process\n")
     
-    # Process each file
+    # Process each file (exam_file is absolute, so folders outside the
+    # project root work too)
+    processed = 0
     for exam_file in exam_files:
         try:
-            # Convert to relative path from project root
-            relative_path = exam_file.relative_to(project_root)
-            process_exam_with_answers(str(relative_path), output_dir)
+            with instrument.file(str(exam_file)):
+                process_exam_with_answers(str(exam_file), output_dir, time_budget)
+            processed += 1
             print()
+        except ParseTimeout as e:
+            print(f"✗ Skipped {exam_file}: over the {time_budget:g}s time budget ({e})\n")
         except Exception as e:
             print(f"✗ Error processing {exam_file}: {str(e)}\n")
+    return processed, len(exam_files)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the exit code."""
+    p = argparse.ArgumentParser(
+        description="Extract questions and their correct answers from cleaned ExamTopics markdown.")
+    p.add_argument("input", help="cleaned .md file, or a folder of them (relative to the project root)")
+    p.add_argument("-o", "--output", required=True,
+                   help="output folder for <exam>-answers.md files (relative to the project root)")
+    p.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET, metavar="SECONDS",
+                   help="parse time allowed per file before it is skipped, 0 for no limit "
+                        "(default: %(default)g)")
+    instrument.add_arguments(p)
+    args = p.parse_args(argv)
+
+    with instrument.session(args, "dum_gen", log=print):
+        return _run(args)
+
+
+def _run(args: argparse.Namespace) -> int:
+    time_budget = args.time_budget or None
+
+    input_path = get_project_root() / args.input
+    if input_path.is_dir():
+        processed, total = process_all_exams_with_answers(args.input, args.output, time_budget)
+        return 0 if total and processed == total else 1
+    if not input_path.is_file():
+        print(f"✗ Input not found: {input_path}")
+        return 1
+    try:
+        with instrument.file(str(input_path)):
+            process_exam_with_answers(args.input, args.output, time_budget)
+    except ParseTimeout as e:
+        print(f"✗ Skipped {input_path}: over the {time_budget:g}s time budget ({e})")
+        return 1
+    except Exception as e:
+        print(f"✗ Error processing {input_path}: {e}")
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    # Process all exam files
-    # process_all_exams_with_answers()
-    
-    # Process single file
-    process_exam_with_answers(
-        # "data/raw/aws/mla-c01.md",
-        "data/silver/aws/dop-c02.md",
-        "data/answers/aws"
-    )
\ No newline at end of file
+    sys.exit(main())
@@ -1,94 +1,132 @@
+import argparse
 import re
 import os
+import sys
 from pathlib import Path
+from typing import List, Optional, Tuple
 
+import instrument
+from question_ir import Question, drop_suggested_lines, parse_questions
 
-def process_exam_file(input_file: str, output_dir: str) -> None:
+# Lines dropped from the question prompt
+TIMESTAMP_LINE_RE = re.compile(r'(?mi)^\*\*Timestamp:.*$')
+VIEW_LINK_LINE_RE = re.compile(r'(?mi)^\[View on ExamTopics\].*$')
+ANSWER_SPLIT_RE = re.compile(r'\n\*\*Answer:')
+
+QUESTION_SEPARATOR = "\n\n----------------------------------------\n\n"
+
+
+def render_exam_question(q: Question) -> str:
     """
-    Process exam file to extract questions and options only.
+    Render one question block with the prompt and options only.
     
     Args:
-        input_file: Path to input markdown file
-        output_dir: Directory to save output file
+        q: Parsed question record
+    
+    Returns:
+        Markdown block starting with a normalized "## question <n>" header
     """
-    # Read input file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Prompt is the body up to the bold Answer marker (we want only question + choices)
+    body = q.prompt().rstrip()
+
+    # remove Suggested Answer lines that appear before choices
+    body = drop_suggested_lines(body)
+
+    # remove Timestamp and View on ExamTopics links if they somehow remain
+    body = TIMESTAMP_LINE_RE.sub('', body)
+    body = VIEW_LINK_LINE_RE.sub('', body)
+
+    # collapse trailing blank lines
+    body = body.strip()
+
+    header = '## question' + (f' {q.number}' if q.number is not None else '')
+    block = header
+    if body:
+        block += '\n\n' + body
+    return block
+
+
+def render_exam(exam_name: str, content: str, questions: List[Question]) -> str:
+    """
+    Render the full question sheet for an exam.
     
-    # Extract exam name from file path
-    input_path = Path(input_file)
-    exam_name = input_path.stem
+    Args:
+        exam_name: Exam name used in the title
+        content: Source buffer, used as a single block when there are no questions
+        questions: Parsed question records
     
-    # Split content into question sections using headings like "## question <n>"
-    header_re = re.compile(r'(?mi)^##\s*question(?:\s+(\d+))?')
-    matches = list(header_re.finditer(content))
-
+    Returns:
+        Markdown document text
+    """
     processed_questions = []
-    if not matches:
+    if not questions:
         # fallback: treat whole file as one block
         body = content
         # remove suggested/answer/timestamp/view footers if present
-        body = re.split(r'\n\*\*Answer:', body, maxsplit=1)[0]
-        body = re.sub(r'(?mi)^\s*Suggested Answer:.*$', '', body, flags=re.MULTILINE)
+        body = ANSWER_SPLIT_RE.split(body, maxsplit=1)[0]
+        body = drop_suggested_lines(body)
         body = body.strip()
         if body:
             processed_questions.append(body)
     else:
-        for i, m in enumerate(matches):
-            start = m.start()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
-            qnum = m.group(1) or ''
-            section = content[start:end].strip()
-
-            # remove the header line and rebuild a normalized header
-            # split section into lines, drop the first header line
-            lines = section.splitlines()
-            body_lines = lines[1:] if len(lines) > 1 else []
-            body = '\n'.join(body_lines).rstrip()
-
-            # remove Suggested Answer lines that appear before choices
-            body = re.sub(r'(?mi)^\s*Suggested Answer:.*$', '', body, flags=re.MULTILINE)
+        for q in questions:
+            processed_questions.append(render_exam_question(q))
 
-            # truncate at the bold Answer marker if present (we want only question + choices)
-            body = re.split(r'\n\*\*Answer:', body, maxsplit=1)[0]
-
-            # remove Timestamp and View on ExamTopics links if they somehow remain
-            body = re.sub(r'(?mi)^\*\*Timestamp:.*$', '', body, flags=re.MULTILINE)
-            body = re.sub(r'(?mi)^\[View on ExamTopics\].*$', '', body, flags=re.MULTILINE)
+    output_content = f"# Exam Topics Questions - {exam_name.upper()}\n\n"
+    output_content += QUESTION_SEPARATOR.join(processed_questions)
+    return output_content
 
-            # collapse trailing blank lines
-            body = body.strip()
 
-            header = '## question' + (f' {int(qnum)}' if qnum else '')
-            block = header
-            if body:
-                block += '\n\n' + body
-            processed_questions.append(block)
+def process_exam_file(input_file: str, output_dir: str) -> None:
+    """
+    Process exam file to extract questions and options only.
+    
+    Args:
+        input_file: Path to input markdown file
+        output_dir: Directory to save output file
+    """
+    # Read input file
+    with instrument.stage("read"), open(input_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    # Extract exam name from file path
+    input_path = Path(input_file)
+    exam_name = input_path.stem
+    
+    # Split content into question records using headings like "## question <n>";
+    # only offsets are needed to slice the prompt
+    with instrument.stage("split"):
+        questions = parse_questions(content, with_fields=False)
     
     # Create output content
-    output_content = f"# Exam Topics Questions - {exam_name.upper()}\n\n"
-    output_content += "\n\n----------------------------------------\n\n".join(processed_questions)
+    with instrument.stage("render"):
+        output_content = render_exam(exam_name, content, questions)
     
     # Create output directory if not exists
     os.makedirs(output_dir, exist_ok=True)
     
     # Write output file
     output_file = os.path.join(output_dir, f"{exam_name}-exam.md")
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with instrument.stage("write"), open(output_file, 'w', encoding='utf-8') as f:
         f.write(output_content)
+    instrument.count("sections", len(questions))
+    instrument.count_bytes(input_file, output_file)
     
     print(f"✓ Processed: {input_file}")
     print(f"✓ Output saved to: {output_file}")
 
 
 def process_all_exams(input_dir: str = "data/raw/aws", 
-                      output_dir: str = "data/exam/aws") -> None:
+                      output_dir: str = "data/exam/aws") -> Tuple[int, int]:
     """
     Process all exam files in the input directory.
     
     Args:
         input_dir: Directory containing raw exam files
         output_dir: Directory to save processed exam files
+    
+    Returns:
+        Tuple of (processed files, total files)
     """
     input_path = Path(input_dir)
     
@@ -97,24 +135,51 @@ def process_all_exams(input_dir: str = "data/raw/aws",
     
     if not exam_files:
         print(f"No markdown files found in {input_dir}")
-        return
+        return 0, 0
     
     print(f"Found {len(exam_files)} exam file(s) to process\n")
     
     # Process each file
+    processed = 0
     for exam_file in exam_files:
         try:
-            process_exam_file(str(exam_file), output_dir)
+            with instrument.file(str(exam_file)):
+                process_exam_file(str(exam_file), output_dir)
+            processed += 1
             print()
         except Exception as e:
             print(f"✗ Error processing {exam_file}: {str(e)}\n")
+    return processed, len(exam_files)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the exit code."""
+    p = argparse.ArgumentParser(
+        description="Extract questions and options (without answers) from cleaned ExamTopics markdown.")
+    p.add_argument("input", type=Path, help="cleaned .md file, or a folder of them")
+    p.add_argument("-o", "--output", required=True, help="output folder for <exam>-exam.md files")
+    instrument.add_arguments(p)
+    args = p.parse_args(argv)
+
+    with instrument.session(args, "exam_gen", log=print):
+        return _run(args)
+
+
+def _run(args: argparse.Namespace) -> int:
+    if args.input.is_dir():
+        processed, total = process_all_exams(str(args.input), args.output)
+        return 0 if total and processed == total else 1
+    if not args.input.is_file():
+        print(f"✗ Input not found: {args.input}")
+        return 1
+    try:
+        with instrument.file(str(args.input)):
+            process_exam_file(str(args.input), args.output)
+    except Exception as e:
+        print(f"✗ Error processing {args.input}: {e}")
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    # Process all exam files
-    # process_all_exams()
-    process_exam_file(
-    # "data/raw/aws/mla-c01.md",
-    "data/silver/aws/dop-c02.md",
-    "data/exam/aws"
-)
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+Export parsed questions to SQLite (and optionally Parquet) for analytics.
+
+Study and analytics tools can query one table instead of re-parsing the
+markdown trees with their own regexes. Every question of the input files is
+bulk-loaded with its exam, topic, number, stem, options, suggested answer,
+answer, timestamp and link.
+
+- Inputs are cleaned files from clean_md.py or raw dumps from the downloader;
+  raw dumps also carry the timestamp, link and exam code of each question
+- Each file is loaded in one transaction with batched executemany inserts
+- Re-runs skip files whose SHA-256 is unchanged and, in changed files, only
+  upsert questions whose content hash changed; questions and files that
+  disappeared are deleted
+- --parquet also writes the table as a columnar Parquet file (needs pyarrow)
+
+Usage:
+    python src/export_questions.py data/silver/ --db data/questions.sqlite
+    python src/export_questions.py data/raw/aws/sap-c02.md --db data/questions.sqlite
+    python src/export_questions.py data/silver/ --db data/questions.sqlite --parquet data/questions.parquet
+
+Query example:
+    sqlite3 data/questions.sqlite "SELECT exam, COUNT(*) FROM questions GROUP BY exam"
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_manifest import file_key, file_sha256
+from clean_md import HEADER_RE, TITLE_KEY_RE
+from question_ir import Question, parse_questions
+
+EXPORT_FORMAT = 3
+
+DEFAULT_DB = "data/questions.sqlite"
+
+# Rows per Parquet row group, and per fetch when reading them back from SQLite
+PARQUET_BATCH = 50_000
+
+# Exported question fields, in table and Parquet column order
+FIELDS = ("exam", "topic", "number", "stem", "options", "suggested", "answer", "timestamp", "link")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    qkey TEXT NOT NULL,
+    exam TEXT NOT NULL,
+    topic INTEGER,
+    number INTEGER,
+    stem TEXT NOT NULL,
+    options TEXT NOT NULL,
+    suggested TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    link TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    UNIQUE (file_id, qkey)
+);
+CREATE INDEX IF NOT EXISTS questions_exam ON questions (exam, topic, number);
+CREATE INDEX IF NOT EXISTS questions_hash ON questions (content_hash);
+"""
+
+UPSERT_SQL = (
+    f"INSERT INTO questions (file_id, qkey, {', '.join(FIELDS)}, content_hash) "
+    f"VALUES ({', '.join('?' * (len(FIELDS) + 3))}) "
+    f"ON CONFLICT (file_id, qkey) DO UPDATE SET "
+    + ', '.join(f"{name} = excluded.{name}" for name in FIELDS + ("content_hash",))
+)
+
+logger = logging.getLogger(__name__)
+
+
+def question_row(q: Question, default_exam: str) -> Tuple:
+    """
+    Flatten a question into its exported field values.
+
+    Args:
+        q: Parsed question record
+        default_exam: Exam used when the question does not name one
+
+    Notes:
+        - The exam comes from the raw header line ("## Exam AZ-104 topic 1
+          question 1 ...") or else from the "[All AZ-104 Questions]" line of
+          the discussion header, which cleaned files keep; it is lowercased
+
+    Returns:
+        Values in FIELDS order; options are a JSON list of [letter, text] pairs
+    """
+    m = TITLE_KEY_RE.match(q.source[q.start:q.body_start])
+    exam = (m.group(1) if m and m.group(1) else q.exam).lower() or default_exam
+    options = json.dumps([list(opt) for opt in q.options], ensure_ascii=False)
+    return (exam, q.topic, q.number, q.stem, options, q.suggested, q.answer, q.timestamp, q.link)
+
+
+def keyed_rows(questions: List[Question], default_exam: str) -> Dict[str, Tuple]:
+    """
+    Build the rows of a file keyed by (exam, topic, number, occurrence).
+
+    The occurrence counts repeats of the same question number within the
+    file, so an inserted question only adds a row instead of shifting the
+    key of every question after it.
+
+    Returns:
+        Mapping of qkey to (content_hash, field values)
+    """
+    rows: Dict[str, Tuple] = {}
+    seen: Dict[Tuple, int] = {}
+    for q in questions:
+        values = question_row(q, default_exam)
+        ident = values[:3]
+        occurrence = seen.get(ident, 0)
+        seen[ident] = occurrence + 1
+        qkey = '|'.join('' if v is None else str(v) for v in ident + (occurrence,))
+        digest = hashlib.blake2b('\x1f'.join('' if v is None else str(v) for v in values)
+                                 .encode('utf-8'), digest_size=16).hexdigest()
+        rows[qkey] = (digest, values)
+    return rows
+
+
+class QuestionStore:
+    """
+    SQLite table of exported questions.
+
+    Args:
+        path: SQLite database file (created if missing), or ":memory:"
+
+    Notes:
+        - Questions are unique per (file, qkey); see keyed_rows
+        - The database uses WAL mode, so readers are not blocked by an export
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        expected = {"format": str(EXPORT_FORMAT)}
+        stored = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if not stored:
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", expected.items())
+            self.conn.commit()
+        elif stored != expected:
+            raise ValueError(f"{path} was written with different settings {stored}; "
+                             f"delete it to export again")
+
+    def file_state(self, key: str) -> Optional[Tuple[int, str]]:
+        """Return (file_id, sha256) of an exported file, or None."""
+        return self.conn.execute("SELECT id, sha256 FROM files WHERE path = ?", (key,)).fetchone()
+
+    def exported_files(self, prefix: str = "") -> Dict[str, int]:
+        """Map the key of every exported file under prefix to its file_id."""
+        like = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return dict(self.conn.execute("SELECT path, id FROM files WHERE path LIKE ? ESCAPE '\\'",
+                                      (like,)))
+
+    def drop_file(self, file_id: int) -> int:
+        """Delete a file and its questions in one transaction; return the number of questions."""
+        with self.conn:
+            count = self.conn.execute("DELETE FROM questions WHERE file_id = ?", (file_id,)).rowcount
+            self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        return count
+
+    def upsert_file(self, key: str, digest: str, rows: Dict[str, Tuple]) -> Dict[str, int]:
+        """
+        Bring a file's questions up to date in one transaction.
+
+        Args:
+            key: File key from build_manifest.file_key()
+            digest: SHA-256 of the file content
+            rows: Output of keyed_rows()
+
+        Returns:
+            Counts of questions "added", "changed", "unchanged" and "removed"
+        """
+        with self.conn:
+            self.conn.execute("INSERT INTO files (path, sha256) VALUES (?, ?) "
+                              "ON CONFLICT (path) DO UPDATE SET sha256 = excluded.sha256",
+                              (key, digest))
+            file_id = self.conn.execute("SELECT id FROM files WHERE path = ?", (key,)).fetchone()[0]
+            existing = dict(self.conn.execute(
+                "SELECT qkey, content_hash FROM questions WHERE file_id = ?", (file_id,)))
+
+            counts = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+            batch = []
+            for qkey, (content_hash, values) in rows.items():
+                old = existing.get(qkey)
+                if old == content_hash:
+                    counts["unchanged"] += 1
+                    continue
+                counts["added" if old is None else "changed"] += 1
+                batch.append((file_id, qkey) + values + (content_hash,))
+            self.conn.executemany(UPSERT_SQL, batch)
+
+            removed = [(file_id, qkey) for qkey in existing.keys() - rows.keys()]
+            self.conn.executemany("DELETE FROM questions WHERE file_id = ? AND qkey = ?", removed)
+            counts["removed"] = len(removed)
+        return counts
+
+    def totals(self) -> Dict[str, int]:
+        """Count exported files, questions and exams."""
+        files, = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        questions, exams = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT exam) FROM questions").fetchone()
+        return {"files": files, "questions": questions, "exams": exams}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def load_pyarrow():
+    """
+    Import pyarrow for Parquet output.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed; checked before exporting so
+            a run never fails after the database was already updated
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet output needs pyarrow; install it with: pip install pyarrow") from e
+    return pyarrow
+
+
+def write_parquet(store: QuestionStore, path: Path) -> int:
+    """
+    Write every exported question to a Parquet file.
+
+    Args:
+        store: Open QuestionStore
+        path: Destination .parquet file, replaced atomically
+
+    Returns:
+        Number of rows written
+
+    Notes:
+        - Rows are streamed from SQLite PARQUET_BATCH at a time, one row group
+          each, so memory stays bounded for any corpus size
+        - options becomes a list<struct<letter, text>> column
+    """
+    pa = load_pyarrow()
+    schema = pa.schema([
+        ("file", pa.string()),
+        ("exam", pa.string()),
+        ("topic", pa.int32()),
+        ("number", pa.int32()),
+        ("stem", pa.string()),
+        ("options", pa.list_(pa.struct([("letter", pa.string()), ("text", pa.string())]))),
+        ("suggested", pa.string()),
+        ("answer", pa.string()),
+        ("timestamp", pa.string()),
+        ("link", pa.string()),
+        ("content_hash", pa.string()),
+    ])
+    options_at = schema.names.index("options")
+    cur = store.conn.execute(
+        f"SELECT f.path, {', '.join('q.' + name for name in FIELDS)}, q.content_hash "
+        "FROM questions q JOIN files f ON f.id = q.file_id ORDER BY q.exam, q.topic, q.number, q.id")
+
+    tmp = path.with_name(path.name + ".tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    total = 0
+    writer = pa.parquet.ParquetWriter(str(tmp), schema, compression="zstd")
+    try:
+        while True:
+            rows = cur.fetchmany(PARQUET_BATCH)
+            if not rows:
+                break
+            columns = [list(col) for col in zip(*rows)]
+            columns[options_at] = [[{"letter": letter, "text": text} for letter, text in json.loads(o)]
+                                   for o in columns[options_at]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+            total += len(rows)
+    finally:
+        writer.close()
+    os.replace(tmp, path)
+    return total
+
+
+def run_export(inputs: List[Path], store: QuestionStore) -> Tuple[int, int, Dict[str, int]]:
+    """
+    Export cleaned files and folders into the store.
+
+    Args:
+        inputs: Cleaned .md files or folders (raw dumps also work)
+        store: Open QuestionStore
+
+    Returns:
+        Tuple of (success_count, total_count, summed question counts)
+
+    Notes:
+        - Files deleted from a folder input are removed from the store
+    """
+    summary = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+    files: List[Path] = []
+    for path in inputs:
+        if path.is_dir():
+            found = sorted(path.rglob("*.md"))
+            files.extend(found)
+            live = {file_key(f) for f in found}
+            root = file_key(path)
+            prefix = root.rstrip('/') + '/'
+            for key, file_id in store.exported_files(prefix).items():
+                if key not in live:
+                    summary["removed"] += store.drop_file(file_id)
+                    logger.info(f"✓ {key}: removed, deleted from the store")
+        elif path.is_file():
+            files.append(path)
+        else:
+            logger.error(f"Input path does not exist: {path}")
+
+    success_count = 0
+    for path in files:
+        try:
+            key = file_key(path)
+            digest = file_sha256(path)
+            state = store.file_state(key)
+            if state and state[1] == digest:
+                logger.debug(f"✓ {key}: unchanged")
+            else:
+                questions = parse_questions(path.read_text(encoding='utf-8'), HEADER_RE)
+                counts = store.upsert_file(key, digest, keyed_rows(questions, path.stem))
+                for name, n in counts.items():
+                    summary[name] += n
+                logger.info(f"✓ {key}: {counts['added']} added, {counts['changed']} changed, "
+                            f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+            success_count += 1
+        except Exception as e:
+            logger.error(f"Error processing {path}: {e}")
+    return success_count, len(files), summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Export parsed ExamTopics questions to SQLite and optionally Parquet.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Export (or update) a cleaned corpus:
+    %(prog)s data/silver/ --db data/questions.sqlite
+
+  Raw dumps keep each question's timestamp and link:
+    %(prog)s data/raw/aws/sap-c02.md --db data/questions.sqlite
+
+  Also write a Parquet file (needs pyarrow):
+    %(prog)s data/silver/ --db data/questions.sqlite --parquet data/questions.parquet
+        """
+    )
+    p.add_argument("inputs", type=Path, nargs="+", help="cleaned or raw .md files or folders")
+    p.add_argument("--db", default=DEFAULT_DB, help="SQLite database to update (default: %(default)s)")
+    p.add_argument("--parquet", type=Path, help="also write all questions to this Parquet file")
+    p.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.parquet:
+        try:
+            load_pyarrow()
+        except RuntimeError as e:
+            logger.error(str(e))
+            return 1
+    try:
+        if args.db != ":memory:":
+            Path(args.db).parent.mkdir(parents=True, exist_ok=True)
+        store = QuestionStore(args.db)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Cannot open database {args.db}: {e}")
+        return 1
+
+    try:
+        start = time.perf_counter()
+        success_count, total_count, summary = run_export(args.inputs, store)
+        totals = store.totals()
+        logger.info(f"Exported {totals['questions']} question(s) of {totals['exams']} exam(s) from "
+                    f"{totals['files']} file(s) in {time.perf_counter() - start:.1f}s: "
+                    f"{summary['added']} added, {summary['changed']} changed, "
+                    f"{summary['removed']} removed")
+
+        if args.parquet:
+            if args.parquet.exists() and not any(summary[k] for k in ("added", "changed", "removed")):
+                logger.info(f"✓ Parquet unchanged: {args.parquet}")
+            else:
+                rows = write_parquet(store, args.parquet)
+                logger.info(f"✓ Wrote {rows} row(s) to: {args.parquet}")
+        return 0 if total_count and success_count == total_count else 1
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
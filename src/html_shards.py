@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Paginated HTML output for large exams.
+
+Instead of one monolithic page, an exam is written to a folder of fixed-size
+question pages (shards) plus a small shell that shows the first page at once
+and loads the others as the reader scrolls to them:
+
+    <exam>/index.html      preamble, search box, page 1 inlined, placeholders
+    <exam>/page-0002.html  standalone page with questions 51-100, prev/next links
+    <exam>/index.json      compact search and navigation index
+    <exam>/manifest.json   shard list with the keys used by incremental builds
+
+index.json holds one [number, page, anchor, excerpt] row per question, so the
+shell can find a question by number or text and jump to it without loading
+every shard. The shell fetches shards and the index over HTTP; opened from
+file://, the placeholders keep their plain links to each shard page.
+
+- Header ids are made unique across the whole exam, as on the single page, so
+  a "#question-12_1" link points at the same question in both outputs
+- Rebuilds are incremental: a shard's key covers its questions, its position
+  and the ids taken before it, and a shard whose key matches the manifest is
+  neither rendered nor written again; stale shard files are deleted
+
+Usage:
+    result = build_shards(text, Path("site/sap-c02"), "sap-c02", page_size=50)
+    print(result["written"], "of", result["shards"], "shard(s) written")
+"""
+import hashlib
+import html as html_lib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List
+
+from convert_md_to_html import render_fragment, render_html_page, renderer_settings
+from question_ir import DISCUSSION_MARKER, parse_fields, parse_questions
+from render_cache import HEADER_ID_RE, dedupe_header_ids
+
+SHARD_FORMAT = 1
+
+DEFAULT_PAGE_SIZE = 50
+
+# Characters of question text kept per index.json entry
+EXCERPT_LENGTH = 120
+
+# Any "## ... question <n>" header: silver files, answer keys and raw dumps
+SECTION_HEADER_RE = re.compile(r'(?mi)^##(?:[^\n]*?\s)?question\b[^\d\n]*(\d+)?')
+
+MARKUP_RE = re.compile(r'\*\*|__|`|^\s*(?:[-*+]\s+|#+\s*)|^-{3,}\s*$', re.M)
+WHITESPACE_RE = re.compile(r'\s+')
+
+SHARD_NAME = "page-{:04d}.html"
+SHARD_GLOB = "page-[0-9]*.html"
+
+SHELL_STYLE = """<style>
+.shard-nav{margin:16px 0;color:#57606a}
+.shard-search input{width:100%;box-sizing:border-box;padding:6px 8px;font-size:16px}
+.shard-search ol{max-height:320px;overflow:auto}
+section.shard[data-src]{min-height:60vh}
+</style>"""
+
+SHELL_SCRIPT = """<script>
+(function () {
+  function load(s) {
+    if (!s.dataset.src || s.dataset.loaded) return Promise.resolve(s);
+    s.dataset.loaded = '1';
+    return fetch(s.dataset.src).then(function (r) {
+      if (!r.ok) throw new Error(r.status);
+      return r.text();
+    }).then(function (text) {
+      var part = new DOMParser().parseFromString(text, 'text/html').querySelector('section.shard');
+      if (part) s.innerHTML = part.innerHTML;
+      s.removeAttribute('data-src');
+      return s;
+    }).catch(function () { delete s.dataset.loaded; return s; });
+  }
+  if ('IntersectionObserver' in window) {
+    var io = new IntersectionObserver(function (entries) {
+      entries.forEach(function (e) {
+        if (e.isIntersecting) { io.unobserve(e.target); load(e.target); }
+      });
+    }, {rootMargin: '1000px'});
+    document.querySelectorAll('section.shard[data-src]').forEach(function (s) { io.observe(s); });
+  }
+  var index = null;
+  function getIndex() {
+    return index || (index = fetch('index.json').then(function (r) { return r.json(); }));
+  }
+  function show(page, anchor) {
+    var s = document.querySelector('section.shard[data-page="' + page + '"]');
+    if (!s) return;
+    load(s).then(function () {
+      var target = anchor && document.getElementById(anchor);
+      (target || s).scrollIntoView();
+      if (anchor) history.replaceState(null, '', '#' + anchor);
+    });
+  }
+  var box = document.getElementById('shard-search');
+  var list = document.getElementById('shard-results');
+  box.addEventListener('input', function () {
+    var q = box.value.trim().toLowerCase();
+    if (!q) { list.innerHTML = ''; return; }
+    getIndex().then(function (idx) {
+      list.innerHTML = '';
+      var found = 0;
+      for (var i = 0; i < idx.questions.length && found < 50; i++) {
+        var e = idx.questions[i];
+        if (String(e[0]) !== q && e[3].toLowerCase().indexOf(q) < 0) continue;
+        var li = document.createElement('li'), a = document.createElement('a');
+        a.href = idx.pages[e[1] - 1] + '#' + e[2];
+        a.textContent = 'Question ' + e[0] + ': ' + e[3];
+        a.dataset.page = e[1];
+        a.dataset.anchor = e[2];
+        li.appendChild(a);
+        list.appendChild(li);
+        found++;
+      }
+    });
+  });
+  list.addEventListener('click', function (ev) {
+    var a = ev.target.closest('a');
+    if (!a) return;
+    ev.preventDefault();
+    show(a.dataset.page, a.dataset.anchor);
+  });
+  var hash = decodeURIComponent(location.hash.slice(1));
+  if (hash && !document.getElementById(hash)) {
+    getIndex().then(function (idx) {
+      for (var i = 0; i < idx.questions.length; i++) {
+        if (idx.questions[i][2] === hash) return show(idx.questions[i][1], hash);
+      }
+    });
+  }
+})();
+</script>"""
+
+
+def excerpt(stem: str) -> str:
+    """Plain-text start of a question stem for the search index."""
+    if stem.startswith(DISCUSSION_MARKER):
+        stem = stem[len(DISCUSSION_MARKER):]
+    text = WHITESPACE_RE.sub(' ', MARKUP_RE.sub(' ', stem)).strip()
+    return text if len(text) <= EXCERPT_LENGTH else text[:EXCERPT_LENGTH - 1].rstrip() + '…'
+
+
+def shard_nav(k: int, last: bool) -> str:
+    links = ['<a href="index.html">Index</a>']
+    if k > 1:
+        links.append(f'<a href="{SHARD_NAME.format(k - 1)}">← Previous</a>')
+    links.append(f'Page {k}')
+    if not last:
+        links.append(f'<a href="{SHARD_NAME.format(k + 1)}">Next →</a>')
+    return f'<nav class="shard-nav">{" · ".join(links)}</nav>'
+
+
+def shard_section(k: int, html: str) -> str:
+    return f'<section class="shard" data-page="{k}">\n{html}\n</section>'
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Write content unless path already holds exactly that; return whether it was written."""
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
+def load_manifest(out_dir: Path) -> Dict:
+    """Previous manifest of out_dir, or an empty one if missing, unreadable or of another format."""
+    try:
+        manifest = json.loads((out_dir / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("format") == SHARD_FORMAT else {}
+
+
+def load_index_rows(out_dir: Path) -> Dict[int, List[list]]:
+    """Rows of the previous index.json grouped by page number, or {} if unreadable."""
+    try:
+        index = json.loads((out_dir / "index.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    rows: Dict[int, List[list]] = {}
+    for row in index.get("questions", []):
+        rows.setdefault(row[1], []).append(row)
+    return rows
+
+
+def build_shards(text: str, out_dir: Path, title: str, page_size: int = DEFAULT_PAGE_SIZE,
+                 cache=None, page: str = "") -> Dict[str, int]:
+    """
+    Write an exam as paginated HTML shards, re-rendering only changed shards.
+
+    Args:
+        text: Markdown content of the exam
+        out_dir: Output folder (created if missing)
+        title: Page title
+        page_size: Questions per shard
+        cache: Optional RenderCache for the question fragments
+        page: Stable identifier of the exam in the cache, e.g. its input path
+
+    Returns:
+        Mapping with the number of questions, shards and shards written
+
+    Raises:
+        ValueError: If page_size is not positive
+    """
+    if page_size < 1:
+        raise ValueError(f"page size must be positive, got {page_size}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = {s["file"]: s for s in load_manifest(out_dir).get("shards", [])}
+    previous_rows = load_index_rows(out_dir) if previous else {}
+
+    # Offsets only: fields are parsed for the excerpts of changed shards alone
+    questions = parse_questions(text, SECTION_HEADER_RE, with_fields=False)
+    preamble = text[:questions[0].start] if questions else text
+    blocks = [q.text() for q in questions]
+    groups = [range(i, min(i + page_size, len(blocks))) for i in range(0, len(blocks), page_size)]
+
+    def render(part: List[str]) -> List[str]:
+        if cache is not None:
+            return cache.render_blocks(part, render_fragment)
+        return [render_fragment(b) for b in part]
+
+    used: set = set()
+    preamble_html = dedupe_header_ids(render([preamble])[0], used) if preamble.strip() else ''
+
+    base = hashlib.blake2b(f"{SHARD_FORMAT}\0{renderer_settings()}\0{title}\0".encode('utf-8'),
+                           digest_size=16)
+    ids_seen = hashlib.blake2b(digest_size=16)
+    ids_seen.update(' '.join(sorted(used)).encode('utf-8'))
+
+    shards: List[Dict] = []
+    rows: List[list] = []
+    first_html = ''
+    written = 0
+    for k, group in enumerate(groups, 1):
+        name = SHARD_NAME.format(k)
+        last = k == len(groups)
+        h = base.copy()
+        h.update(f"{k}\0{int(last)}\0{ids_seen.hexdigest()}\0".encode('utf-8'))
+        for i in group:
+            data = blocks[i].encode('utf-8')
+            h.update(f"{len(data)}\0".encode('utf-8'))
+            h.update(data)
+        key = h.hexdigest()
+
+        old = previous.get(name)
+        old_rows = previous_rows.get(k, [])
+        html = None
+        if (old is not None and old.get("key") == key and len(old_rows) == len(group)
+                and (out_dir / name).exists()):
+            ids = old["ids"]
+            used.update(ids)
+            rows.extend(old_rows)
+        else:
+            ids, anchors, parts = [], [], []
+            for fragment in render([blocks[i] for i in group]):
+                fragment = dedupe_header_ids(fragment, used)
+                found = [m.group(2) for m in HEADER_ID_RE.finditer(fragment)]
+                ids.extend(found)
+                anchors.append(found[0] if found else '')
+                if fragment:
+                    parts.append(fragment)
+            rows.extend([questions[i].number, k, anchor, excerpt(parse_fields(questions[i]).stem)]
+                        for i, anchor in zip(group, anchors))
+            html = '\n'.join(parts)
+            nav = shard_nav(k, last)
+            (out_dir / name).write_text(
+                render_html_page(f"{title} – page {k}", f"{nav}\n{shard_section(k, html)}\n{nav}"),
+                encoding="utf-8")
+            written += 1
+        if k == 1:
+            if html is None:
+                page_text = (out_dir / name).read_text(encoding="utf-8")
+                start = page_text.index('\n', page_text.index('<section class="shard"')) + 1
+                html = page_text[start:page_text.rindex('\n</section>')]
+            first_html = html
+        ids_seen.update(' '.join(ids).encode('utf-8'))
+        ids_seen.update(b'\0')
+        numbers = [questions[i].number for i in group]
+        shards.append({"file": name, "first": numbers[0], "last": numbers[-1],
+                       "count": len(group), "key": key, "ids": ids})
+
+    if cache is not None:
+        cache.set_page(page, [preamble] + blocks)
+
+    names = [s["file"] for s in shards]
+    for stale in out_dir.glob(SHARD_GLOB):
+        if stale.name not in names:
+            stale.unlink()
+
+    index = {"title": title, "page_size": page_size, "pages": names, "questions": rows}
+    write_if_changed(out_dir / "index.json",
+                     json.dumps(index, ensure_ascii=False, separators=(',', ':')))
+
+    body = [preamble_html,
+            '<div class="shard-search"><input id="shard-search" type="search" '
+            'placeholder="Find a question by number or text" autocomplete="off">'
+            '<ol id="shard-results"></ol></div>']
+    if shards:
+        body.append(shard_section(1, first_html))
+    for k, s in enumerate(shards[1:], 2):
+        label = html_lib.escape(f"Questions {s['first']}–{s['last']}" if s["first"] is not None
+                                else f"Page {k}")
+        body.append(f'<section class="shard" data-page="{k}" data-src="{s["file"]}">\n'
+                    f'<p><a href="{s["file"]}">{label}</a></p>\n</section>')
+    body.extend([SHELL_STYLE, SHELL_SCRIPT])
+    write_if_changed(out_dir / "index.html", render_html_page(title, '\n'.join(body)))
+
+    write_if_changed(out_dir / "manifest.json", json.dumps(
+        {"format": SHARD_FORMAT, "title": title, "page_size": page_size,
+         "questions": len(questions), "index": "index.json", "shards": shards},
+        ensure_ascii=False, indent=1))
+    return {"questions": len(questions), "shards": len(shards), "written": written}
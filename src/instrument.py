@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation for the command-line tools.
+
+When a nightly run is slow, the metrics file says where the time went:
+
+- Per-stage wall and CPU timers (read, split, clean, sort, render, write)
+- Counters: files, sections, bytes in and out, and lines dropped by each
+  cleaning rule (REMOVE_LINE_RE, TOPIC_LINE_RE, timestamp cut)
+- Peak memory: the process's maximum RSS, and with --trace-memory the
+  tracemalloc peak of Python allocations (tracemalloc slows the run down,
+  so it is off by default)
+- With --profile DIR, a cProfile of every file, of which the --profile-top
+  slowest are kept as .prof files with a text summary next to them
+
+The metrics file is JSON, or a Prometheus textfile (node_exporter textfile
+collector) when its name ends in .prom. Nothing is measured unless one of
+the options is given: stage() and count() return at once when metrics are
+disabled. Pool workers record their own metrics and send them back with
+their result (see call_with_metrics).
+
+Usage (any instrumented tool):
+    python src/clean_md.py data/raw/ -o data/silver/ --metrics data/metrics/clean_md.json
+    python src/clean_md.py data/raw/ -o data/silver/ --metrics /var/lib/node_exporter/clean_md.prom
+    python src/exam_gen.py data/silver/aws -o data/exam/aws --profile data/profiles --profile-top 3
+"""
+import heapq
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "examtopics"
+
+# Prometheus label name of labelled counters (others use "key")
+LABEL_NAMES = {"lines_dropped": "rule", "merged": "result"}
+
+# HELP text of the counters the tools record; others get their name
+COUNTER_HELP = {
+    "sections": "Question sections processed",
+    "bytes_in": "Bytes of input read",
+    "bytes_out": "Bytes of output written",
+    "lines_dropped": "Lines dropped by each cleaning rule",
+    "merged": "Question sections merged into existing outputs, by result",
+}
+
+DEFAULT_PROFILE_TOP = 5
+
+# Functions listed in each profile's text summary
+PROFILE_SUMMARY_LINES = 30
+
+# Metrics of this process, or None when instrumentation is off
+_active: Optional["Metrics"] = None
+
+
+class Metrics:
+    """
+    Timers, counters, memory and profiles of one tool run.
+
+    Args:
+        tool: Tool name, used as the "tool" label and in file names
+        trace_memory: If True, run tracemalloc and report its peak
+        profile_top: Keep the cProfile output of this many slowest files (0: no profiling)
+    """
+
+    def __init__(self, tool: str, trace_memory: bool = False, profile_top: int = 0):
+        self.tool = tool
+        self.trace_memory = trace_memory
+        self.profile_top = profile_top
+        self.started = time.time()
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        # name -> [wall seconds, cpu seconds, calls]
+        self.stages: Dict[str, List[float]] = {}
+        # name -> count, or name -> {label: count}
+        self.counters: Dict[str, object] = {}
+        self.file_count = 0
+        # Min-heap of (wall seconds, file, marshalled profile stats or None)
+        self.slowest: List[Tuple[float, str, Optional[bytes]]] = []
+        self.tracemalloc_peak: Optional[int] = None
+        self.max_rss: Optional[int] = None
+        if trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+
+    def settings(self) -> Dict[str, object]:
+        """Constructor arguments, to create the same kind of Metrics in a worker."""
+        return {"tool": self.tool, "trace_memory": self.trace_memory, "profile_top": self.profile_top}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, [0.0, 0.0, 0])
+            entry[0] += time.perf_counter() - wall
+            entry[1] += time.process_time() - cpu
+            entry[2] += 1
+
+    def count(self, name: str, n: int = 1, label: Optional[str] = None) -> None:
+        if label is None:
+            self.counters[name] = self.counters.get(name, 0) + n
+        else:
+            group = self.counters.setdefault(name, {})
+            group[label] = group.get(label, 0) + n
+
+    @contextmanager
+    def file(self, name: str) -> Iterator[None]:
+        """Time one input file and, when profiling, profile it."""
+        profiler = None
+        if self.profile_top:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - wall
+            stats = None
+            if profiler is not None:
+                import marshal
+                profiler.disable()
+                profiler.create_stats()
+                stats = marshal.dumps(profiler.stats)
+            self.file_count += 1
+            self._keep_slowest((elapsed, name, stats))
+
+    def _keep_slowest(self, record: Tuple[float, str, Optional[bytes]]) -> None:
+        keep = max(self.profile_top, DEFAULT_PROFILE_TOP)
+        if len(self.slowest) < keep:
+            heapq.heappush(self.slowest, record)
+        elif record[0] > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, record)
+
+    def _sample_memory(self) -> None:
+        if self.trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                peak = tracemalloc.get_traced_memory()[1]
+                self.tracemalloc_peak = max(self.tracemalloc_peak or 0, peak)
+        try:
+            import resource
+        except ImportError:  # Windows
+            return
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        rss = rss if sys.platform == "darwin" else rss * 1024
+        self.max_rss = max(self.max_rss or 0, rss)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Picklable state for merge(), e.g. from a pool worker."""
+        self._sample_memory()
+        return {"stages": self.stages, "counters": self.counters, "files": self.file_count,
+                "slowest": self.slowest, "tracemalloc_peak": self.tracemalloc_peak,
+                "max_rss": self.max_rss}
+
+    def merge(self, snap: Dict[str, object]) -> None:
+        """Add another process's snapshot: sums for timers and counters, maxima for memory."""
+        for name, (wall, cpu, calls) in snap["stages"].items():
+            entry = self.stages.setdefault(name, [0.0, 0.0, 0])
+            entry[0] += wall
+            entry[1] += cpu
+            entry[2] += calls
+        for name, value in snap["counters"].items():
+            if isinstance(value, dict):
+                for label, n in value.items():
+                    self.count(name, n, label)
+            else:
+                self.count(name, value)
+        self.file_count += snap["files"]
+        for record in snap["slowest"]:
+            self._keep_slowest(tuple(record))
+        for attr in ("tracemalloc_peak", "max_rss"):
+            if snap[attr] is not None:
+                setattr(self, attr, max(getattr(self, attr) or 0, snap[attr]))
+
+    def report(self) -> Dict[str, object]:
+        """The run's metrics as a JSON-ready dict."""
+        self._sample_memory()
+        return {
+            "tool": self.tool,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+            "wall_seconds": round(time.perf_counter() - self._wall0, 6),
+            "cpu_seconds": round(time.process_time() - self._cpu0, 6),
+            "files": self.file_count,
+            "stages": {name: {"wall_seconds": round(wall, 6), "cpu_seconds": round(cpu, 6), "calls": calls}
+                       for name, (wall, cpu, calls) in self.stages.items()},
+            "counters": self.counters,
+            "memory": {"max_rss_bytes": self.max_rss, "tracemalloc_peak_bytes": self.tracemalloc_peak},
+            "slowest_files": [{"file": name, "wall_seconds": round(wall, 6)}
+                              for wall, name, _ in sorted(self.slowest, reverse=True)],
+        }
+
+    def to_prometheus(self) -> str:
+        """The run's metrics in the Prometheus text exposition format (all gauges)."""
+        report = self.report()
+        tool = _label_value(self.tool)
+        lines: List[str] = []
+
+        def gauge(name: str, help_text: str, samples: List[Tuple[str, float]]) -> None:
+            if not samples:
+                return
+            full = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} gauge")
+            for labels, value in samples:
+                lines.append(f'{full}{{tool="{tool}"{labels}}} {_sample_value(value)}')
+
+        gauge("last_run_timestamp_seconds", "Start of the last run, Unix time", [("", self.started)])
+        gauge("run_wall_seconds", "Wall time of the last run", [("", report["wall_seconds"])])
+        gauge("run_cpu_seconds", "CPU time of the last run (this process)", [("", report["cpu_seconds"])])
+        gauge("files", "Files processed in the last run", [("", report["files"])])
+        for field, help_text in (("wall_seconds", "Wall time per stage"), ("cpu_seconds", "CPU time per stage"),
+                                 ("calls", "Calls per stage")):
+            gauge(f"stage_{field}", f"{help_text} in the last run",
+                  [(f',stage="{_label_value(name)}"', stage[field]) for name, stage in report["stages"].items()])
+        for name, value in sorted(self.counters.items()):
+            metric = re.sub(r'[^a-zA-Z0-9_]', '_', name)
+            if isinstance(value, dict):
+                label = LABEL_NAMES.get(name, "key")
+                samples = [(f',{label}="{_label_value(k)}"', v) for k, v in sorted(value.items())]
+            else:
+                samples = [("", value)]
+            help_text = COUNTER_HELP.get(name, name.replace('_', ' ').capitalize())
+            gauge(metric, f"{help_text} in the last run", samples)
+        memory = report["memory"]
+        if memory["max_rss_bytes"] is not None:
+            gauge("max_rss_bytes", "Peak resident set size", [("", memory["max_rss_bytes"])])
+        if memory["tracemalloc_peak_bytes"] is not None:
+            gauge("tracemalloc_peak_bytes", "Peak traced Python allocations",
+                  [("", memory["tracemalloc_peak_bytes"])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: Path) -> None:
+        """Write the metrics file atomically: Prometheus text for *.prom, JSON otherwise."""
+        if path.suffix == ".prom":
+            text = self.to_prometheus()
+        else:
+            import json
+            text = json.dumps(self.report(), indent=2, ensure_ascii=False) + '\n'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The textfile collector may read at any time: never expose a partial file
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding='utf-8')
+        os.replace(tmp, path)
+
+    def write_profiles(self, folder: Path) -> List[Path]:
+        """Write the profiles of the profile_top slowest files; return the .prof paths."""
+        import pstats
+        folder.mkdir(parents=True, exist_ok=True)
+        # Ranks of an earlier run would mix with this run's
+        for stale in folder.glob(f"{self.tool}-[0-9][0-9]-*"):
+            if stale.suffix in (".prof", ".txt"):
+                stale.unlink()
+        written = []
+        ranked = [r for r in sorted(self.slowest, reverse=True) if r[2] is not None][:self.profile_top]
+        for rank, (wall, name, stats) in enumerate(ranked, 1):
+            stem = re.sub(r'[^\w.-]+', '_', Path(name).stem)
+            path = folder / f"{self.tool}-{rank:02d}-{stem}.prof"
+            path.write_bytes(stats)
+            with open(path.with_suffix(".txt"), 'w', encoding='utf-8') as fh:
+                fh.write(f"{name}: {wall:.3f}s wall\n\n")
+                pstats.Stats(str(path), stream=fh).sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+            written.append(path)
+        return written
+
+    def close(self) -> None:
+        if self.trace_memory:
+            import tracemalloc
+            self._sample_memory()
+            tracemalloc.stop()
+
+
+def _sample_value(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _label_value(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def enable(tool: str, trace_memory: bool = False, profile_top: int = 0) -> Metrics:
+    """Start collecting metrics in this process and return the collector."""
+    global _active
+    _active = Metrics(tool, trace_memory, profile_top)
+    return _active
+
+
+def disable() -> None:
+    global _active
+    if _active is not None:
+        _active.close()
+    _active = None
+
+
+def active() -> Optional[Metrics]:
+    return _active
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as one call of stage name; does nothing when metrics are off."""
+    if _active is None:
+        yield
+        return
+    with _active.stage(name):
+        yield
+
+
+def count(name: str, n: int = 1, label: Optional[str] = None) -> None:
+    """Add n to a counter (with an optional label, e.g. the rule of lines_dropped)."""
+    if _active is not None and n:
+        _active.count(name, n, label)
+
+
+@contextmanager
+def file(name: str) -> Iterator[None]:
+    """Time (and when profiling, profile) the processing of one input file."""
+    if _active is None:
+        yield
+        return
+    with _active.file(name):
+        yield
+
+
+def file_size(path) -> int:
+    """Size of a file in bytes, or 0 if it cannot be read (for bytes_in/bytes_out)."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def count_bytes(input_path, output_path) -> None:
+    """Add the sizes of an input file and the output written from it to bytes_in/bytes_out."""
+    if _active is not None:
+        _active.count("bytes_in", file_size(input_path))
+        _active.count("bytes_out", file_size(output_path))
+
+
+def call_with_metrics(settings: Optional[Dict[str, object]], name: str, fn: Callable, *args):
+    """
+    Run fn(*args) as one file in a pool worker, with metrics when settings is given.
+
+    Args:
+        settings: Metrics.settings() of the parent, or None when metrics are off
+        name: File name for the per-file timer and profile
+
+    Returns:
+        Tuple of (fn's result, Metrics snapshot or None) for Metrics.merge() in the parent
+    """
+    if settings is None:
+        return fn(*args), None
+    metrics = enable(**settings)
+    try:
+        with metrics.file(name):
+            result = fn(*args)
+        return result, metrics.snapshot()
+    finally:
+        disable()
+
+
+def add_arguments(parser) -> None:
+    """Add the --metrics, --trace-memory, --profile and --profile-top options to a parser."""
+    g = parser.add_argument_group("instrumentation")
+    g.add_argument("--metrics", type=Path, metavar="FILE",
+                   help="write stage timers, counters and peak memory to FILE "
+                        "(Prometheus textfile if it ends in .prom, JSON otherwise)")
+    g.add_argument("--trace-memory", action="store_true",
+                   help="also measure peak Python allocations with tracemalloc (slower)")
+    g.add_argument("--profile", type=Path, metavar="DIR",
+                   help="profile every file with cProfile and keep the slowest in DIR")
+    g.add_argument("--profile-top", type=int, default=DEFAULT_PROFILE_TOP, metavar="N",
+                   help="number of slowest files to keep profiles of (default: %(default)s)")
+
+
+@contextmanager
+def session(args, tool: str, log: Callable[[str], None] = logger.info) -> Iterator[Optional[Metrics]]:
+    """
+    Enable metrics for a tool run if the add_arguments() options ask for it.
+
+    Writes the metrics file and the profiles when the block exits, also
+    after an error. Yields the Metrics, or None when instrumentation is off.
+    """
+    if not (args.metrics or args.trace_memory or args.profile):
+        yield None
+        return
+    metrics = enable(tool, args.trace_memory, max(args.profile_top, 1) if args.profile else 0)
+    try:
+        yield metrics
+    finally:
+        try:
+            if args.profile:
+                written = metrics.write_profiles(args.profile)
+                log(f"✓ {len(written)} profile(s) of the slowest files written to: {args.profile}")
+            if args.metrics:
+                metrics.write(args.metrics)
+                log(f"✓ Metrics written to: {args.metrics}")
+            elif args.trace_memory:
+                report = metrics.report()
+                log(f"Peak memory: {report['memory']['tracemalloc_peak_bytes'] or 0:,} bytes traced, "
+                    f"{report['memory']['max_rss_bytes'] or 0:,} bytes RSS")
+        finally:
+            disable()
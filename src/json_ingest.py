@@ -0,0 +1,610 @@
+# -*- coding: utf-8 -*-
+"""
+Direct JSON ingest: silver, exam and answer outputs from structured question records.
+
+The Go downloader holds every question as structured data (models.QuestionData,
+or models.JSONResponse for cached pages) and flattens it to markdown in
+WriteData, which clean_md, exam_gen and dum_gen then parse back with regexes.
+This reader takes the records as JSON instead:
+
+- Page files of the examtopics-data cache: {"pageProps": {"questions": [...]}}
+  with the JSONResponse fields (question_text, choices, answer, discussion, ...)
+- QuestionData records (Title, Header, Content, Questions, Answer, Timestamp,
+  QuestionLink, Comments), as encoding/json exports the struct
+- Either kind as a JSON array or as NDJSON, one record per line
+
+Files are decoded incrementally with JSONDecoder.raw_decode over a buffer
+refilled --chunk-size characters at a time, so a page file is never held in
+memory as a whole; records are decoded one by one. Each record is cleaned
+straight from its fields: the lines WriteData would write for it, up to its
+timestamp line, go through the rules of clean_md's section cleaner, and its
+Question is placed from the fields it came from (options from the
+QuestionData option list, the answer from the answer line) instead of being
+parsed back. The outputs are byte-identical to
+
+    WriteData -> clean_md.py -> exam_gen.py -> dum_gen.py
+
+for the same records. A file with a record that would not make a numbered
+section of its own (a title without a question number, a field holding a
+question header line) is read again through the markdown path of
+pipeline.py, which merges and splits sections as clean_md does.
+JSONResponse records are flattened as fetch.getJSONFromLink does: choices
+become "**A:** text" lines and titles are numbered in record order.
+
+Usage:
+    python src/json_ingest.py data/json/az-104.ndjson --silver data/silver/microsoft \\
+        --exam data/exam/microsoft --answers data/answers/microsoft
+    python src/json_ingest.py data/json/ --silver data/silver --exam data/exam \\
+        --answers data/answers --chunk-size 4M --html
+"""
+import argparse
+import io
+import json
+import logging
+import re
+import sys
+from itertools import accumulate, chain
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from clean_md import (HEADER_RE, REMOVE_LINE_RE, TIMESTAMP_RE, TOPIC_LINE_RE, VIEW_LINK_RE,
+                      normalize_header, write_sections)
+from pipeline import clean_and_parse_lines, load_markdown, write_outputs
+from question_ir import (ALL_QUESTIONS_MARKER, ANSWER_FIELD, ANSWER_RE, DISCUSSION_MARKER, LETTERS_RE,
+                         SUGGESTED_MARKER, TOPIC_RE, Question, parse_questions, question_from_fields)
+from sizes import parse_size
+
+logger = logging.getLogger(__name__)
+
+# File suffixes read in folder mode
+JSON_SUFFIXES = (".json", ".jsonl", ".ndjson")
+
+# Characters read per refill of the decode buffer
+CHUNK_SIZE = 1024 * 1024
+
+# Keys under which page files nest their question records
+CONTAINER_KEYS = ("pageProps", "questions")
+
+# A page object whose first key is a container; it is streamed, not decoded whole
+CONTAINER_START_RE = re.compile(r'\{\s*"(?:pageProps|questions)"\s*:')
+
+# Characters a key and its colon may take after "{" when checking for CONTAINER_START_RE
+CONTAINER_LOOKAHEAD = 256
+
+WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+# Document head WriteData writes before the first question
+WRITE_DATA_HEAD = ["# Exam Topics Questions", "", "@thatonecodes", ""]
+
+
+class JSONStream:
+    """
+    Incremental reader of question records from a JSON or NDJSON text stream.
+
+    Args:
+        fh: Text file handle
+        chunk_size: Characters read per refill
+
+    Notes:
+        - Only the record being decoded (plus one chunk) is buffered: page
+          objects and arrays are walked key by key and element by element,
+          and consumed text is dropped on every refill
+        - A value ending exactly at the end of the buffer is decoded again
+          after the next refill, so numbers are never cut at a chunk boundary
+        - The read size doubles while one value does not fit, so a record
+          larger than the chunk size costs linear, not quadratic, time
+    """
+
+    def __init__(self, fh: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        """Drop the consumed text and append up to size characters; False at end of input."""
+        if self.eof:
+            return False
+        data = self.fh.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at the end of input."""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(self.chunk_size):
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError(f"expected one of {chars!r} but found {c or 'end of input'!r}")
+        self.pos += 1
+        return c
+
+    def _value(self) -> object:
+        """Decode the complete JSON value at the next non-whitespace position."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(max(self.chunk_size, len(self.buf) - self.pos))
+
+    def records(self) -> Iterator[dict]:
+        """Yield every question record in the stream, in order."""
+        # Only a leading page object is walked key by key; values after it
+        # (NDJSON lines) are decoded whole, one at a time
+        if self._peek() == '{':
+            if len(self.buf) - self.pos < CONTAINER_LOOKAHEAD:
+                self._fill(self.chunk_size)
+            if CONTAINER_START_RE.match(self.buf, self.pos):
+                yield from self._container()
+        while True:
+            c = self._peek()
+            if not c:
+                return
+            if c == '[':
+                yield from self._array()
+            elif c == '{':
+                value = self._value()
+                if "pageProps" in value or "questions" in value:
+                    yield from iter_records(value)
+                else:
+                    yield value
+            else:
+                raise ValueError(f"expected a JSON object or array but found {c!r}")
+
+    def _array(self) -> Iterator[dict]:
+        self.pos += 1
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield from iter_records(self._value())
+            if self._expect(',]') == ']':
+                return
+
+    def _container(self) -> Iterator[dict]:
+        """Walk a page object key by key, streaming its pageProps and questions."""
+        self.pos += 1
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError(f"expected an object key but found {key!r}")
+            self._expect(':')
+            c = self._peek()
+            if key in CONTAINER_KEYS and c == '{':
+                yield from self._container()
+            elif key in CONTAINER_KEYS and c == '[':
+                yield from self._array()
+            else:
+                self._value()  # other page fields
+            if self._expect(',}') == '}':
+                return
+
+
+def iter_records(value: object) -> Iterator[dict]:
+    """Question records in a decoded JSON value: a record, a list of them or a page."""
+    if isinstance(value, list):
+        for item in value:
+            yield from iter_records(item)
+    elif isinstance(value, dict):
+        for key in CONTAINER_KEYS:
+            if key in value:
+                yield from iter_records(value[key])
+                return
+        yield value
+
+
+def name_from_path(path: Path) -> str:
+    """Exam name in JSONResponse titles, as utils.GetNameFromLink derives it."""
+    return ' '.join(path.stem.replace('-', ' ').split())
+
+
+def record_fields(record: dict, name: str,
+                  number: int) -> Optional[Tuple[str, List[str], int, str, str]]:
+    """
+    Fields of one record as WriteData writes them, before newline translation.
+
+    Args:
+        record: QuestionData or JSONResponse question fields
+        name: Exam name for JSONResponse titles
+        number: Position of the record (1-based), the question number of
+            JSONResponse titles
+
+    Returns:
+        (title, parts, options, answer, timestamp), where parts are the
+        paragraphs between the title and the answer line and the last options
+        of them are QuestionData options; None for a record WriteData skips
+        (one without a title)
+    """
+    if "Title" in record or "Header" in record:
+        title = record.get("Title") or ''
+        parts = [record.get("Header") or '']
+        if record.get("Content"):
+            parts.append(record["Content"])
+        options = record.get("Questions") or ()
+        parts.extend(options)
+        answer = record.get("Answer") or ''
+        timestamp = record.get("Timestamp") or ''
+    else:
+        # fetch.getJSONFromLink: choices in key order, images as the content
+        title = f"Examtopics {name} question #{number}"
+        choices = record.get("choices") or {}
+        parts = [record.get("question_text") or '']
+        content = '\n'.join(record.get("question_images") or ())
+        if content:
+            parts.append(content)
+        parts.append(''.join(f"**{key}:** {choices[key]}\n\n" for key in sorted(choices)))
+        options = ()
+        answer = record.get("answer") or ''
+        timestamp = record.get("timestamp") or ''
+    if not title:
+        return None
+    return title, parts, len(options), answer, timestamp
+
+
+def record_section(record: dict, name: str, number: int) -> Optional[str]:
+    """
+    Flatten one record to the text WriteData writes for it, up to the timestamp line.
+
+    Args:
+        record, name, number: As for record_fields
+
+    Returns:
+        Markdown text ending in a newline, or None for a record WriteData skips
+    """
+    fields = record_fields(record, name, number)
+    if fields is None:
+        return None
+    title, parts, _, answer, timestamp = fields
+    text = ''.join((f"## {title}\n\n", *(f"{part}\n\n" for part in parts),
+                    f"**Answer: {answer}**\n\n", f"**Timestamp: {timestamp}**\n"))
+    if '\r' in text:
+        # As reading the markdown file in text mode would translate them
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+class SectionBreak(ValueError):
+    """A record whose markdown would not form a numbered section of its own."""
+
+
+def record_block(record: dict, name: str, number: int,
+                 remove_topic: bool) -> Optional[Tuple[int, str, List[Question]]]:
+    """
+    Clean one record straight from its fields into its silver block and Question.
+
+    Args:
+        record, name, number: As for record_fields
+        remove_topic: If True, remove "Topic #: <n>" lines
+
+    Returns:
+        (question number, cleaned block, questions), or None for a record
+        WriteData skips
+
+    Raises:
+        SectionBreak: If the title has no question number or a field holds a
+            numbered header line, so the markdown path would split or merge
+            sections differently
+
+    Notes:
+        - Field lines are cleaned with the rules of clean_md.iter_clean_sections;
+          the regexes only run on lines whose first character could match
+        - The Question is placed from the fields: the options are the
+          QuestionData option lines and the stem ends before the first of
+          them (or before the answer line). A record whose text could read
+          differently to parse_fields (a cut or "**Answer:" inside a field,
+          an option over several lines, a question line that looks like an
+          option) is parsed from its block instead
+    """
+    fields = record_fields(record, name, number)
+    if fields is None:
+        return None
+    title, parts, n_options, answer, _ = fields
+    m = HEADER_RE.match(f"## {title}")
+    if m is None or '\n' in title or '\r' in title:
+        raise SectionBreak(f"record {number} does not start a numbered section")
+    qnum = int(m.group(1))
+
+    out: List[str] = []
+    option_at: List[int] = []   # index in out of each option line
+    topic: Optional[int] = None
+    suggested = ''
+    regular = '\n' not in answer and '\r' not in answer
+    prev_blank = False
+    first_option = len(parts) - n_options
+    for k, part in enumerate(chain(parts, (f"**Answer: {answer}**",))):
+        is_option = first_option <= k < len(parts)
+        if k < len(parts) and ANSWER_FIELD in part:
+            regular = False
+        if '\r' in part:
+            part = part.replace('\r\n', '\n').replace('\r', '\n')
+        kept = 0
+        for ln in part.split('\n'):
+            s = ln.lstrip()
+            if not s:
+                if not prev_blank:
+                    out.append('')
+                prev_blank = True
+                continue
+            c = s[0]
+            if c in ('Q', 'q') and REMOVE_LINE_RE.match(ln):
+                continue
+            if remove_topic and c in ('T', 't') and TOPIC_LINE_RE.match(ln):
+                continue
+            if c in ('*', '[') and (TIMESTAMP_RE.match(ln) or VIEW_LINK_RE.match(ln)):
+                break
+            if ln.startswith('##'):
+                if HEADER_RE.match(ln):
+                    raise SectionBreak(f"record {number} holds a question header line")
+                regular = False     # parse_questions would split at "## question"
+            r = ln.rstrip()
+            if ((prev_blank or not out) and 'A' <= r[0] <= 'Z' and r[1:2] == '.'
+                    and (len(r) == 2 or r[2].isspace())):
+                if is_option:
+                    option_at.append(len(out))
+                else:
+                    regular = False
+            elif is_option:
+                regular = False
+            if c == 'S':
+                t = r.lstrip()
+                if not suggested and t.startswith(SUGGESTED_MARKER):
+                    m = LETTERS_RE.match(t, 17)
+                    if m:
+                        suggested = m.group(1)
+            elif c == 'T' and topic is None:
+                m = TOPIC_RE.fullmatch(s.rstrip())
+                if m:
+                    topic = int(m.group(1))
+            out.append(r)
+            prev_blank = False
+            kept += 1
+        else:
+            if is_option and kept != 1:
+                regular = False
+            # The blank line written after each field
+            if not prev_blank:
+                out.append('')
+            prev_blank = True
+            continue
+        # A cut line: everything after it, the answer line included, is dropped
+        regular = False
+        break
+
+    start, end = 0, len(out)
+    while start < end and not out[start]:
+        start += 1
+    while end > start and not out[end - 1]:
+        end -= 1
+    lines = out[start:end]
+    header = normalize_header(qnum)
+    block = header + '\n\n' + '\n'.join(lines) if lines else header
+    if not regular:
+        return qnum, block, parse_questions(block)
+
+    # Line offsets; the body starts with the blank line after the header
+    body_start = len(header) + 1
+    offsets = list(accumulate((len(line) + 1 for line in lines), initial=body_start + 1))
+    options = [i - start for i in option_at]
+    last = len(lines) - 1
+    # The first option or the answer line that follows an empty line of the body ends the stem
+    stop = next((i for i in options if i > 0), last)
+    stem_end = offsets[stop] - 2 if stop > 0 else len(block)
+    stem_start = body_start
+    t = lines[0].lstrip()
+    after = t[25:26]
+    if t.startswith(DISCUSSION_MARKER) and not (after.isalnum() or after == '_'):
+        for i in range(1, stop):
+            line = lines[i]
+            if (line.startswith(ALL_QUESTIONS_MARKER) and len(line) >= 15
+                    and line.endswith('Questions]')):
+                if offsets[i] + len(line) <= stem_end:
+                    stem_start = offsets[i] + len(line)
+                break
+    spans = []
+    for i in options:
+        line, pos = lines[i], offsets[i]
+        eol = pos + len(line)
+        spans.append((pos, eol - len(line[2:].lstrip()), eol))
+    m = ANSWER_RE.search(lines[last])
+    q = question_from_fields(block, qnum, body_start, offsets[last] - 1, (stem_start, stem_end),
+                             spans, topic, suggested, m.group(1) if m else '')
+    return qnum, block, [q]
+
+
+def build_silver(records: Iterable[dict], name: str,
+                 remove_topic: bool) -> Tuple[str, List[Question]]:
+    """
+    Silver text and questions of records, as pipeline.clean_and_parse_lines gives for their dump.
+
+    Raises:
+        SectionBreak: As record_block
+    """
+    blocks = []
+    number = 0
+    for record in records:
+        number += 1
+        block = record_block(record, name, number, remove_topic)
+        if block is not None:
+            blocks.append(block)
+
+    # Sort by question number, as clean_md's buffered mode does
+    blocks.sort(key=itemgetter(0))
+    buf = io.StringIO()
+    write_sections(chain((("__preamble__", '\n'.join(WRITE_DATA_HEAD)),),
+                         ((qnum, text) for qnum, text, _ in blocks)), buf)
+    return buf.getvalue(), [q for _, _, qs in blocks for q in qs]
+
+
+def iter_dump_lines(records: Iterable[dict], name: str) -> Iterator[str]:
+    """
+    Return an iterator over the lines of the markdown WriteData would write for records.
+
+    Notes:
+        - Each record stops at its "**Timestamp:" line, which starts the
+          cleaner's cut; the view link and the comments (single lines after
+          utils.CleanText) would be cut as well, so they are not built
+        - Lines are produced a record at a time and chained in C, which
+          keeps per-line overhead out of the reader
+    """
+    def record_lines() -> Iterator[List[str]]:
+        number = 0
+        for record in records:
+            number += 1
+            text = record_section(record, name, number)
+            if text is not None:
+                yield text[:-1].split('\n')
+
+    return chain(WRITE_DATA_HEAD, chain.from_iterable(record_lines()))
+
+
+def ingest_file(input_path: Path, silver_path: Path, exam_dir: Path, answers_dir: Path,
+                remove_topic: bool = False, md=None, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Produce the silver, exam and answer outputs of one JSON or NDJSON export.
+
+    Args:
+        input_path: .json, .jsonl or .ndjson file
+        silver_path: Output path for the cleaned markdown
+        exam_dir: Folder for <name>-exam.md
+        answers_dir: Folder for <name>-answers.md (and .html)
+        remove_topic: If True, remove "Topic #: <n>" lines
+        md: The markdown module to also render HTML, or None to skip it
+        chunk_size: Characters read per refill of the decode buffer
+
+    Returns:
+        Counts of records read, questions found and answers written
+    """
+    count = 0
+
+    def counted(records: Iterator[dict]) -> Iterator[dict]:
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    name = name_from_path(input_path)
+    with open(input_path, 'r', encoding='utf-8') as fh:
+        try:
+            silver, questions = build_silver(counted(JSONStream(fh, chunk_size).records()), name,
+                                             remove_topic)
+        except SectionBreak as e:
+            logger.debug(f"{input_path}: {e}; cleaning it as markdown")
+            fh.seek(0)
+            count = 0
+            records = counted(JSONStream(fh, chunk_size).records())
+            silver, questions = clean_and_parse_lines(iter_dump_lines(records, name), remove_topic)
+    counts = write_outputs(input_path.stem, silver, questions, silver_path, exam_dir, answers_dir, md)
+    counts["records"] = count
+    return counts
+
+
+def ingest(input_path: Path, silver_root: Path, exam_root: Path, answers_root: Path,
+           remove_topic: bool = False, html: bool = False,
+           chunk_size: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Ingest a JSON export file or every export under a folder.
+
+    Args:
+        input_path: Export file, or folder of *.json / *.jsonl / *.ndjson files
+        silver_root, exam_root, answers_root: Output roots, as for pipeline.run_pipeline
+        remove_topic: If True, remove "Topic #: <n>" lines
+        html: If True, also render each answer key to HTML
+        chunk_size: Characters read per refill of the decode buffer
+
+    Returns:
+        Tuple of (success_count, total_count)
+
+    Notes:
+        - Folder input preserves subdirectory structure under each root;
+          <rel>.json is written as <silver_root>/<rel>.md
+    """
+    if input_path.is_dir():
+        files = sorted(p for p in input_path.rglob("*") if p.suffix in JSON_SUFFIXES and p.is_file())
+        base = input_path
+    elif input_path.is_file():
+        files = [input_path]
+        base = input_path.parent
+    else:
+        logger.error(f"Input path does not exist: {input_path}")
+        return 0, 0
+
+    md = None
+    if html:
+        md = load_markdown()
+        if md is None:
+            return 0, len(files)
+
+    success_count = 0
+    for path in files:
+        rel = path.relative_to(base)
+        try:
+            counts = ingest_file(path, silver_root / rel.with_suffix(".md"), exam_root / rel.parent,
+                                 answers_root / rel.parent, remove_topic, md, chunk_size)
+        except (OSError, ValueError) as e:
+            logger.error(f"✗ Error processing {path}: {e}")
+            continue
+        success_count += 1
+        logger.info(f"✓ {rel}: {counts['records']} record(s), {counts['questions']} question(s), "
+                    f"{counts['answers']} answer(s)")
+
+    logger.info(f"Processing complete: {success_count}/{len(files)} files succeeded")
+    return success_count, len(files)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Emit silver, exam and answer outputs directly from JSON or NDJSON question records.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s data/json/az-104.ndjson --silver data/silver/microsoft \\
+      --exam data/exam/microsoft --answers data/answers/microsoft
+
+  A folder of examtopics-data page files, 4 MB per read:
+  %(prog)s data/json/ --silver data/silver --exam data/exam --answers data/answers --chunk-size 4M
+        """
+    )
+    p.add_argument("input", type=Path, help="JSON/NDJSON export file, or folder of them")
+    p.add_argument("--silver", type=Path, required=True, help="output folder for cleaned markdown")
+    p.add_argument("--exam", type=Path, required=True, help="output folder for -exam.md sheets")
+    p.add_argument("--answers", type=Path, required=True, help="output folder for -answers.md keys")
+    p.add_argument("--html", action="store_true", help="also render each answer key to HTML")
+    p.add_argument("--remove-topic", action="store_true", help="also remove 'Topic #: <n>' lines")
+    p.add_argument("--chunk-size", type=parse_size, default=CHUNK_SIZE, metavar="SIZE",
+                   help="characters read at a time, e.g. 256K or 4M (default: 1M)")
+    p.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.chunk_size <= 0:
+        p.error("--chunk-size must be positive")
+
+    success_count, total_count = ingest(args.input, args.silver, args.exam, args.answers,
+                                        args.remove_topic, args.html, args.chunk_size)
+    return 0 if total_count and success_count == total_count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Reference parsers and inputs for checking the shared question IR.
+
+The legacy parsers reproduce what exam_gen and dum_gen did on their own
+before question_ir: each split the silver file on headers and ran its own
+regex chain per section. tests/test_question_ir.py compares the IR against
+them, and bench_question_ir.py times them, on the same silver text.
+
+CASES builds single question sections that are adversarial for the legacy
+regexes (long whitespace runs), n lines at a time, for the tokenizer tests
+and bench_tokenizer.py.
+
+Usage:
+    from parse_oracles import legacy_answers, legacy_exam, silver_text
+
+    content = silver_text(300)
+    sheet = list(legacy_exam(content))
+"""
+import io
+import re
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+
+import clean_md
+import dum_gen
+from synth_corpus import write_dump
+
+HEAD = ("## question 1\n\nActual exam question from\n\nMicrosoft's\nAZ-104\n\n"
+        "Topic #: 1\n\n[All AZ-104 Questions]\n\n"
+        "You need to ensure the storage account can be restored. What should you do?\n")
+TAIL = ("Suggested Answer: B\n\nA. Enable soft delete.\n\nB. Configure geo-redundant storage.\n\n"
+        "C. Create a snapshot.\n\nD. Add a lock.\n\n**Answer: B**\n")
+
+
+def blank_lines(n: int) -> str:
+    return HEAD + "\n" * n + "Refer to the exhibit.\n" + TAIL
+
+
+def space_lines(n: int) -> str:
+    return HEAD + " \t \n" * n + "Refer to the exhibit.\n" + TAIL
+
+
+def padded_comments(n: int) -> str:
+    return HEAD + TAIL + "\nComments:\n" + "\n" * n + "[user1] Answer is B, tested it in the lab.\n"
+
+
+def option_flood(n: int) -> str:
+    options = "".join(f"\n\n{chr(65 + i % 26)}. Option number {i}." for i in range(n))
+    return HEAD + "Suggested Answer: B\n" + options + "\n\n**Answer: B**\n"
+
+
+CASES: Dict[str, Callable[[int], str]] = {
+    "blank-lines": blank_lines,
+    "space-lines": space_lines,
+    "padded-comments": padded_comments,
+    "option-flood": option_flood,
+}
+
+
+def legacy_exam(content: str) -> Iterator[str]:
+    """exam_gen.process_exam_file parsing as it was before the shared IR."""
+    header_re = re.compile(r'(?mi)^##\s*question(?:\s+(\d+))?')
+    matches = list(header_re.finditer(content))
+    for i, m in enumerate(matches):
+        start = m.start()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        qnum = m.group(1) or ''
+        section = content[start:end].strip()
+        lines = section.splitlines()
+        body = '\n'.join(lines[1:] if len(lines) > 1 else []).rstrip()
+        body = re.sub(r'(?mi)^\s*Suggested Answer:.*$', '', body, flags=re.MULTILINE)
+        body = re.split(r'\n\*\*Answer:', body, maxsplit=1)[0]
+        body = re.sub(r'(?mi)^\*\*Timestamp:.*$', '', body, flags=re.MULTILINE)
+        body = re.sub(r'(?mi)^\[View on ExamTopics\].*$', '', body, flags=re.MULTILINE)
+        body = body.strip()
+        block = '## question' + (f' {int(qnum)}' if qnum else '')
+        if body:
+            block += '\n\n' + body
+        yield block
+
+
+def legacy_answers(content: str) -> Iterator[dict]:
+    """dum_gen.parse_question_with_answer as it was before the shared IR."""
+    header_re = re.compile(r'(?mi)^##\s*question(?:\s+\d+)?')
+    matches = list(header_re.finditer(content))
+    for i, m in enumerate(matches):
+        start = m.start()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        text = content[start:end]
+        result = {'title': '', 'question': '', 'correct_answers': []}
+        title_match = re.search(r'(?mi)^##\s*question(?:\s+(\d+))?', text)
+        if title_match:
+            num = title_match.group(1)
+            result['title'] = f"question {int(num)}" if num else 'question'
+        qt = re.sub(r'(?mi)^\s*Suggested Answer:.*$', '', text, flags=re.MULTILINE)
+        q_match = re.search(r'(?ms)^##\s*question.*?\n\n(.*?)(?=\n\n[A-Z]\.\s|\n\n\*\*Answer:|$)', qt)
+        if q_match:
+            result['question'] = q_match.group(1).strip()
+        options = dict(re.findall(r'(?ms)\n\n([A-Z])\.\s+(.*?)(?=\n\n[A-Z]\.\s|\n\n\*\*Answer:|$)', qt))
+        answer_match = re.search(r'\*\*Answer:\s*([A-Z]+)\*\*', qt)
+        if answer_match:
+            result['correct_answers'] = dum_gen.extract_answers(answer_match.group(1), options)
+        yield result
+
+
+def silver_text(questions: int) -> str:
+    """Generate a raw dump and clean it in memory into silver text."""
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = Path(tmp) / "raw.md"
+        write_dump(raw, questions=questions)
+        with open(raw, encoding='utf-8') as fh:
+            buf = io.StringIO()
+            clean_md.write_sections(clean_md.iter_clean_sections(fh, False), buf)
+    return buf.getvalue()
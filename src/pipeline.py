@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+Fused ExamTopics pipeline: silver, exam, answers and HTML from a single read.
+
+Replaces the four-stage chain
+
+    clean_md.py -> exam_gen.py -> dum_gen.py -> convert_md_to_html.py
+
+where every stage re-reads and re-parses the previous stage's file. Each raw
+dump is streamed once through clean_md's section cleaner, every cleaned block
+is parsed once into a question_ir record, and all outputs are rendered from
+those records:
+
+    <silver>/<rel>.md            cleaned markdown (same as clean_md.py)
+    <exam>/<rel>-exam.md         questions and options (same as exam_gen.py)
+    <answers>/<rel>-answers.md   answer key (same as dum_gen.py)
+    <answers>/<rel>-answers.html optional HTML rendering of the answer key
+
+With --watch, a raw folder is polled instead: every dump whose size and
+modification time have not changed for --settle seconds (the downloader has
+finished writing it) is run through the pipeline, and optionally added to
+the search index, as soon as it is complete, so each exam is ready seconds
+after the downloader saved it rather than after the whole batch.
+
+Usage:
+    python src/pipeline.py data/raw/aws/ --silver data/silver/aws \\
+        --exam data/exam/aws --answers data/answers/aws
+    python src/pipeline.py data/raw/aws/sap-c02.md --silver data/silver/aws \\
+        --exam data/exam/aws --answers data/answers/aws --html
+    python src/pipeline.py results/raw --watch --silver data/silver --exam data/exam \
+        --answers data/answers --index data/search.sqlite
+"""
+import argparse
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from clean_md import iter_clean_sections, write_sections
+from dum_gen import render_answers
+from exam_gen import render_exam
+from question_ir import Question, parse_questions
+
+logger = logging.getLogger(__name__)
+
+
+def clean_and_parse(input_path: Path, remove_topic: bool) -> Tuple[str, List[Question]]:
+    """
+    Stream-clean a raw dump and parse each cleaned block once.
+
+    Args:
+        input_path: Raw .md file
+        remove_topic: If True, remove "Topic #: <n>" lines
+
+    Returns:
+        Tuple of (silver text, question records sorted by number). The
+        records point into their own cleaned blocks, not into the silver text.
+    """
+    with open(input_path, 'r', encoding='utf-8') as fh:
+        return clean_and_parse_lines(fh, remove_topic)
+
+
+def clean_and_parse_lines(lines: Iterable[str], remove_topic: bool) -> Tuple[str, List[Question]]:
+    """clean_and_parse() for the lines of a raw dump from any source (see json_ingest)."""
+    preamble = []
+    blocks: List[Tuple[int, str, List[Question]]] = []
+    for qnum, text in iter_clean_sections(lines, remove_topic):
+        if qnum == "__preamble__":
+            preamble.append((qnum, text))
+            continue
+        blocks.append((qnum, text, parse_questions(text)))
+
+    # Sort by question number, as clean_md's buffered mode does
+    blocks.sort(key=lambda x: x[0])
+
+    buf = io.StringIO()
+    write_sections(preamble + [(qnum, text) for qnum, text, _ in blocks], buf)
+    questions = [q for _, _, qs in blocks for q in qs]
+    return buf.getvalue(), questions
+
+
+def run_file(input_path: Path, silver_path: Path, exam_dir: Path, answers_dir: Path,
+             remove_topic: bool = False, md=None) -> Dict[str, int]:
+    """
+    Produce every output for one raw dump from a single read.
+
+    Args:
+        input_path: Raw .md file
+        silver_path: Output path for the cleaned markdown
+        exam_dir: Folder for <name>-exam.md
+        answers_dir: Folder for <name>-answers.md (and .html)
+        remove_topic: If True, remove "Topic #: <n>" lines
+        md: The markdown module to also render HTML, or None to skip it
+
+    Returns:
+        Counts of questions found and answers written
+    """
+    silver, questions = clean_and_parse(input_path, remove_topic)
+    return write_outputs(input_path.stem, silver, questions, silver_path, exam_dir, answers_dir, md)
+
+
+def write_outputs(exam_name: str, silver: str, questions: List[Question], silver_path: Path,
+                  exam_dir: Path, answers_dir: Path, md=None) -> Dict[str, int]:
+    """
+    Render and write the exam sheet and answer key of a cleaned dump, and the dump itself.
+
+    Args:
+        exam_name: Exam name for the titles and the <name>-exam.md / <name>-answers.md files
+        silver, questions: As returned by clean_and_parse()
+        silver_path, exam_dir, answers_dir, md: As for run_file()
+
+    Returns:
+        Counts of questions found and answers written
+    """
+    exam = render_exam(exam_name, silver, questions)
+    answers, answered = render_answers(exam_name, questions)
+
+    silver_path.parent.mkdir(parents=True, exist_ok=True)
+    silver_path.write_text(silver, encoding="utf-8")
+    exam_dir.mkdir(parents=True, exist_ok=True)
+    (exam_dir / f"{exam_name}-exam.md").write_text(exam, encoding="utf-8")
+    answers_dir.mkdir(parents=True, exist_ok=True)
+    answers_path = answers_dir / f"{exam_name}-answers.md"
+    answers_path.write_text(answers, encoding="utf-8")
+
+    if md is not None:
+        from convert_md_to_html import markdown_to_html_page
+        html = markdown_to_html_page(md, answers, answers_path.stem)
+        answers_path.with_suffix(".html").write_text(html, encoding="utf-8")
+
+    return {"questions": len(questions), "answers": answered}
+
+
+def load_markdown():
+    """Import the markdown package for --html, or log how to install it and return None."""
+    try:
+        import markdown
+    except ImportError:
+        logger.error("--html needs the 'markdown' package: pip install markdown")
+        return None
+    return markdown
+
+
+def run_pipeline(input_path: Path, silver_root: Path, exam_root: Path, answers_root: Path,
+                 remove_topic: bool = False, html: bool = False) -> Tuple[int, int]:
+    """
+    Run the fused pipeline over a raw file or folder.
+
+    Args:
+        input_path: Raw .md file or folder of raw dumps
+        silver_root: Output root for cleaned markdown
+        exam_root: Output root for question sheets
+        answers_root: Output root for answer keys
+        remove_topic: If True, remove "Topic #: <n>" lines
+        html: If True, also render each answer key to HTML
+
+    Returns:
+        Tuple of (success_count, total_count)
+
+    Notes:
+        - Folder input preserves subdirectory structure under each root
+    """
+    if input_path.is_dir():
+        files = sorted(input_path.rglob("*.md"))
+        base = input_path
+    elif input_path.is_file():
+        files = [input_path]
+        base = input_path.parent
+    else:
+        logger.error(f"Input path does not exist: {input_path}")
+        return 0, 0
+
+    md = None
+    if html:
+        md = load_markdown()
+        if md is None:
+            return 0, len(files)
+
+    success_count = 0
+    for path in files:
+        rel = path.relative_to(base)
+        try:
+            counts = run_file(path, silver_root / rel, exam_root / rel.parent,
+                              answers_root / rel.parent, remove_topic, md)
+        except Exception as e:
+            logger.error(f"Error processing {path}: {e}")
+            continue
+        success_count += 1
+        logger.info(f"✓ {rel}: {counts['questions']} question(s), {counts['answers']} answer(s)")
+
+    logger.info(f"Processing complete: {success_count}/{len(files)} files succeeded")
+    return success_count, len(files)
+
+
+def file_signature(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+class DumpWatcher:
+    """
+    Poll a folder of raw dumps and report each one once it stops changing.
+
+    Args:
+        root: Folder to watch (recursively, *.md)
+        settle: Seconds a file's size and mtime must stay the same before it
+            counts as completely written
+
+    Notes:
+        - Empty files and hidden files (temporary files such as ".x.md.tmp")
+          are never reported
+        - A reported file is reported again only after it changes
+    """
+
+    def __init__(self, root: Path, settle: float):
+        self.root = root
+        self.settle = settle
+        # Path -> (signature, monotonic time it was first seen with that signature)
+        self.pending: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+        self.done: Dict[Path, Tuple[int, int]] = {}
+
+    def mark_done(self, path: Path, signature: Tuple[int, int]) -> None:
+        self.done[path] = signature
+        self.pending.pop(path, None)
+
+    def scan(self) -> List[Path]:
+        """Return the files that changed and have been stable for settle seconds."""
+        now = time.monotonic()
+        ready = []
+        seen = set()
+        for path in sorted(self.root.rglob("*.md")):
+            if path.name.startswith('.'):
+                continue
+            try:
+                signature = file_signature(path)
+            except OSError:
+                continue  # renamed or deleted since the listing
+            seen.add(path)
+            if signature[0] == 0 or self.done.get(path) == signature:
+                continue
+            previous = self.pending.get(path)
+            if previous is None or previous[0] != signature:
+                self.pending[path] = (signature, now)
+            elif now - previous[1] >= self.settle:
+                ready.append(path)
+        for path in list(self.pending):
+            if path not in seen:
+                del self.pending[path]
+        return ready
+
+
+def watch_pipeline(input_root: Path, silver_root: Path, exam_root: Path, answers_root: Path,
+                   remove_topic: bool = False, html: bool = False, index_path: Optional[str] = None,
+                   interval: float = 1.0, settle: float = 3.0, idle_exit: float = 0) -> Tuple[int, int]:
+    """
+    Run the pipeline on each raw dump of a folder as soon as it is completely written.
+
+    Args:
+        input_root: Folder the downloader writes raw dumps into
+        silver_root, exam_root, answers_root, remove_topic, html: As for run_pipeline()
+        index_path: Search index to add each cleaned file to, or None
+        interval: Seconds between two polls of the folder
+        settle: Seconds without a size or mtime change before a dump is processed
+        idle_exit: Stop after this many seconds without any new or changing
+            dump (0: run until interrupted)
+
+    Returns:
+        Tuple of (success_count, total_count) of processed dumps
+
+    Notes:
+        - Dumps whose silver output is newer than the dump were processed
+          by an earlier run and are skipped until they change
+        - A dump that changes while it is processed is processed again
+    """
+    md = load_markdown() if html else None
+    if html and md is None:
+        return 0, 0
+    index = None
+    if index_path:
+        from search_index import SearchIndex, build_index
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        index = SearchIndex(index_path)
+
+    watcher = DumpWatcher(input_root, settle)
+    for path in input_root.rglob("*.md"):
+        silver_path = silver_root / path.relative_to(input_root)
+        try:
+            signature = file_signature(path)
+            if silver_path.stat().st_mtime_ns >= signature[1]:
+                watcher.mark_done(path, signature)
+        except OSError:
+            pass
+    logger.info(f"Watching {input_root} ({len(watcher.done)} dump(s) already processed); "
+                f"press Ctrl+C to stop")
+
+    success_count = total_count = 0
+    last_activity = time.monotonic()
+    try:
+        while True:
+            ready = watcher.scan()
+            if ready or watcher.pending:
+                last_activity = time.monotonic()
+            for path in ready:
+                rel = path.relative_to(input_root)
+                try:
+                    signature = file_signature(path)
+                except OSError:
+                    continue
+                total_count += 1
+                try:
+                    counts = run_file(path, silver_root / rel, exam_root / rel.parent,
+                                      answers_root / rel.parent, remove_topic, md)
+                    if index is not None:
+                        build_index([silver_root / rel], index)
+                except Exception as e:
+                    logger.error(f"Error processing {path}: {e}")
+                    watcher.mark_done(path, signature)
+                    continue
+                try:
+                    unchanged = file_signature(path) == signature
+                except OSError as e:
+                    # Deleted or rotated while processed: leave it to the next scan
+                    logger.warning(f"{rel} changed while processed: {e}")
+                    unchanged = False
+                if unchanged:
+                    watcher.mark_done(path, signature)
+                success_count += 1
+                latency = time.time() - signature[1] / 1e9
+                logger.info(f"✓ {rel}: {counts['questions']} question(s), {counts['answers']} answer(s), "
+                            f"ready {latency:.1f}s after the last write")
+            if idle_exit and time.monotonic() - last_activity >= idle_exit:
+                logger.info(f"No new dumps for {idle_exit:g}s, stopping")
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        logger.info("Stopped")
+    finally:
+        if index is not None:
+            index.close()
+    logger.info(f"Watch complete: {success_count}/{total_count} dump(s) processed")
+    return success_count, total_count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Clean raw ExamTopics dumps and emit silver, exam, answer and HTML outputs in one pass.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s data/raw/aws/ --silver data/silver/aws --exam data/exam/aws --answers data/answers/aws
+  %(prog)s data/raw/aws/sap-c02.md --silver data/silver/aws --exam data/exam/aws \\
+      --answers data/answers/aws --html
+
+  Process each dump as soon as cmd/process_all has written it, and index it:
+  %(prog)s results/raw --watch --silver data/silver --exam data/exam \\
+      --answers data/answers --index data/search.sqlite
+        """
+    )
+    p.add_argument("input", type=Path, help="raw .md file or folder")
+    p.add_argument("--silver", type=Path, required=True, help="output folder for cleaned markdown")
+    p.add_argument("--exam", type=Path, required=True, help="output folder for -exam.md sheets")
+    p.add_argument("--answers", type=Path, required=True, help="output folder for -answers.md keys")
+    p.add_argument("--html", action="store_true", help="also render each answer key to HTML")
+    p.add_argument("--remove-topic", action="store_true", help="also remove 'Topic #: <n>' lines")
+    w = p.add_argument_group("watch mode")
+    w.add_argument("--watch", action="store_true",
+                   help="poll the input folder and process each dump once it is completely written")
+    w.add_argument("--interval", type=float, default=1.0,
+                   help="seconds between polls (default: %(default)g)")
+    w.add_argument("--settle", type=float, default=3.0,
+                   help="seconds a dump's size and mtime must stay unchanged (default: %(default)g)")
+    w.add_argument("--index", help="also add each cleaned file to this search index (see search_index.py)")
+    w.add_argument("--idle-exit", type=float, default=0, metavar="SECONDS",
+                   help="stop after this long without new dumps (default: run until Ctrl+C)")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.index and not args.watch:
+        p.error("--index is only used with --watch")
+    if args.watch:
+        if not args.input.is_dir():
+            p.error("--watch needs a folder")
+        success_count, total_count = watch_pipeline(
+            args.input, args.silver, args.exam, args.answers, args.remove_topic, args.html,
+            args.index, args.interval, args.settle, args.idle_exit)
+        return 0 if success_count == total_count else 1
+    success_count, total_count = run_pipeline(args.input, args.silver, args.exam, args.answers,
+                                              args.remove_topic, args.html)
+    return 0 if total_count and success_count == total_count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
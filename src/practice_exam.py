@@ -0,0 +1,554 @@
+# -*- coding: utf-8 -*-
+"""
+Randomized practice exams from a precomputed question offset index.
+
+The build step parses each cleaned exam once and stores, per question, the
+byte offsets of its stem and option texts in the source file, its option
+letters, answer key, number and topic. Generating a practice exam is then
+a seeded draw over that index and a join of byte slices of the source
+buffer: no markdown is parsed again, so thousands of variants take seconds.
+
+- Reproducible: variant i of an exam depends only on (exam, seed, i), so any
+  single variant can be regenerated without the others
+- Shuffled: question order always, option order with --shuffle-options
+  (the answer key is remapped to the new letters)
+- Stratified: --stratify draws from each topic in proportion to its share of
+  the exam
+- Incremental: files whose SHA-256 is unchanged since they were indexed are
+  skipped; generation refuses a source that changed after indexing
+
+Questions without an answer key that resolves to their options are left
+out of the index, as they cannot be scored.
+
+Usage:
+    python src/practice_exam.py build data/silver/ --index data/practice_index.json
+    python src/practice_exam.py generate --exam az-104 --count 1000 --questions 50 --seed 7 -o data/practice/
+    python src/practice_exam.py generate --count 20 --shuffle-options --stratify -o data/practice/
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import string
+import sys
+import time
+from hashlib import sha256
+from itertools import permutations
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from build_manifest import file_sha256
+from exam_gen import QUESTION_SEPARATOR
+from question_ir import parse_questions
+
+INDEX_FORMAT = 2
+
+DEFAULT_INDEX = "data/practice_index.json"
+
+# Questions per practice exam unless --questions is given
+DEFAULT_QUESTIONS = 50
+
+SEPARATOR = QUESTION_SEPARATOR.encode('utf-8')
+
+# Option letters after shuffling
+LETTERS = string.ascii_uppercase
+LETTER_BYTES = [c.encode('ascii') for c in LETTERS]
+
+# Options per question up to which every order is tabulated (6! = 720 orders)
+MAX_TABULATED_OPTIONS = 6
+
+# Option orders by option count, filled by option_orders
+_ORDERS: Dict[int, Tuple[List[Tuple[int, ...]], List[Tuple[int, ...]]]] = {}
+
+logger = logging.getLogger(__name__)
+
+
+def exam_key(path: Path) -> str:
+    """Exam a cleaned file belongs to: its lowercased file name without extension."""
+    return path.stem.lower()
+
+
+def byte_offsets(text: str, offsets: List[int]) -> Dict[int, int]:
+    """
+    Map character offsets in text to byte offsets in its UTF-8 encoding.
+
+    Args:
+        text: Decoded source buffer
+        offsets: Character offsets, in any order
+
+    Returns:
+        Dictionary from each character offset to its byte offset
+    """
+    mapping = {}
+    prev = pos = 0
+    for off in sorted(set(offsets)):
+        pos += len(text[prev:off].encode('utf-8'))
+        mapping[off] = pos
+        prev = off
+    return mapping
+
+
+def index_entry(path: Path) -> Dict:
+    """
+    Build the index entry of one cleaned exam file.
+
+    Args:
+        path: Cleaned .md file
+
+    Returns:
+        JSON-ready dictionary with the file's hash and size and one column
+        per question field; "stems" and "options" hold (start, end) byte
+        offset pairs, flattened, and question i owns the options
+        first_option[i] to first_option[i + 1]
+
+    Notes:
+        - The file is decoded without newline translation, so character
+          offsets convert one to one into offsets of the raw bytes
+        - A stem is the question text without the suggested answer; in the
+          rare case it is not one contiguous slice of the file (a suggested
+          answer line inside it), its text is kept in "extra" and its offsets
+          point past the end of the file, into that text
+    """
+    data = path.read_bytes()
+    text = data.decode('utf-8')
+    numbers, topics, answers, letters = [], [], [], []
+    stems: List[int] = []
+    options: List[int] = []
+    first_option = [0]
+    # Stems that are not one slice of the file, by position of their pair in stems
+    literals: Dict[int, bytes] = {}
+    skipped = 0
+
+    for q in parse_questions(text):
+        spans = q.option_spans()
+        option_letters = ''.join(letter for letter, _, _ in spans)
+        stem = q.stem
+        if not (stem and q.answer and all(c in option_letters for c in q.answer)):
+            skipped += 1
+            continue
+        at = text.find(stem, q.body_start, q.answer_start)
+        if at == -1:
+            literals[len(stems)] = stem.encode('utf-8')
+            stems.extend((0, 0))
+        else:
+            stems.extend((at, at + len(stem)))
+        for _, start, end in spans:
+            options.extend((start, end))
+        first_option.append(len(options) // 2)
+        numbers.append(q.number)
+        topics.append(q.topic)
+        answers.append(q.answer)
+        letters.append(option_letters)
+
+    mapping = byte_offsets(text, stems + options)
+    stems = [mapping[off] for off in stems]
+    pos = len(data)
+    for i, literal in literals.items():
+        stems[i], stems[i + 1] = pos, pos + len(literal)
+        pos += len(literal)
+    return {
+        "exam": exam_key(path),
+        "sha256": sha256(data).hexdigest(),
+        "size": len(data),
+        "numbers": numbers,
+        "topics": topics,
+        "answers": answers,
+        "letters": letters,
+        "stems": stems,
+        "options": [mapping[off] for off in options],
+        "first_option": first_option,
+        "extra": b''.join(literals.values()).decode('utf-8'),
+        "skipped": skipped,
+    }
+
+
+class PracticeIndex:
+    """
+    JSON index of question offsets and answer keys, keyed by file.
+
+    Args:
+        path: Location of the JSON index file; loaded if it exists
+
+    Notes:
+        - Files are keyed by their path relative to the index's folder, so the
+          index works from any working directory and moves with the corpus
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") != INDEX_FORMAT:
+                raise ValueError(f"index format {data.get('version')!r}, expected {INDEX_FORMAT}; "
+                                 f"delete it and run the build command again")
+            self.files = data["files"]
+
+    def key(self, path: Path) -> str:
+        """Key of a file or folder: its path relative to the index's folder, else its absolute path."""
+        resolved = path.resolve()
+        try:
+            return Path(os.path.relpath(resolved, self.path.resolve().parent)).as_posix()
+        except ValueError:  # another drive on Windows
+            return resolved.as_posix()
+
+    def source(self, key: str) -> Path:
+        """Path of the file indexed under key."""
+        return self.path.resolve().parent / key
+
+    def exams(self) -> Dict[str, List[str]]:
+        """Map each exam to the keys of the files indexed for it."""
+        exams: Dict[str, List[str]] = {}
+        for key, entry in sorted(self.files.items()):
+            exams.setdefault(entry["exam"], []).append(key)
+        return exams
+
+    def save(self) -> None:
+        """Atomically write the index to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": INDEX_FORMAT, "files": self.files},
+                                  separators=(',', ':'), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def build_index(inputs: List[Path], index: PracticeIndex) -> Tuple[int, int]:
+    """
+    Bring the index up to date with cleaned files and folders.
+
+    Args:
+        inputs: Cleaned .md files or folders
+        index: PracticeIndex to update (not saved)
+
+    Returns:
+        Tuple of (success_count, total_count)
+
+    Notes:
+        - Unchanged files are skipped by content hash
+        - Indexed files under a folder input that no longer exist are dropped
+    """
+    files: List[Path] = []
+    for path in inputs:
+        if path.is_dir():
+            found = sorted(path.rglob("*.md"))
+            files.extend(found)
+            live = {index.key(f) for f in found}
+            root = index.key(path)
+            prefix = "" if root == "." else root.rstrip('/') + '/'
+            for key in [k for k in index.files if k.startswith(prefix) and k not in live]:
+                del index.files[key]
+                logger.info(f"✓ {key}: removed, dropped from the index")
+        elif path.is_file():
+            files.append(path)
+        else:
+            logger.error(f"Input path does not exist: {path}")
+
+    success_count = 0
+    for path in files:
+        try:
+            key = index.key(path)
+            state = index.files.get(key)
+            if state and state["sha256"] == file_sha256(path):
+                logger.debug(f"✓ {key}: unchanged, already indexed")
+            else:
+                entry = index_entry(path)
+                index.files[key] = entry
+                skipped = f", {entry['skipped']} without a usable answer key" if entry["skipped"] else ""
+                logger.info(f"✓ {key}: {len(entry['numbers'])} question(s) "
+                            f"{'re-' if state else ''}indexed{skipped}")
+            success_count += 1
+        except Exception as e:
+            logger.error(f"Error processing {path}: {e}")
+    return success_count, len(files)
+
+
+def option_orders(count: int) -> Optional[Tuple[List[Tuple[int, ...]], List[Tuple[int, ...]]]]:
+    """
+    Every order of count options with its inverse, or None above MAX_TABULATED_OPTIONS.
+
+    Cached, so shuffling a question's options costs one random choice.
+    """
+    if count > MAX_TABULATED_OPTIONS:
+        return None
+    table = _ORDERS.get(count)
+    if table is None:
+        orders = list(permutations(range(count)))
+        inverses = [tuple(sorted(range(count), key=order.__getitem__)) for order in orders]
+        table = _ORDERS[count] = (orders, inverses)
+    return table
+
+
+class ExamSource:
+    """
+    Questions of one exam, sliced once out of its source files' bytes.
+
+    Args:
+        exam: Exam name
+        entries: (source file, index entry) pairs of the exam's files
+
+    Raises:
+        ValueError: If a source file changed since it was indexed
+
+    Attributes:
+        bodies: Stem and options in source order, ready to follow a header
+        stems: Stem bytes per question
+        options: Per question, option text bytes with their separator
+            (b". text", or b"." for an option without text)
+        answers: Answer letters per question
+        answer_at: Per question, positions of the answer letters among its options
+        numbers: Source question number per question
+        strata: Question positions grouped by topic, in topic order
+    """
+
+    def __init__(self, exam: str, entries: List[Tuple[Path, Dict]]):
+        self.exam = exam
+        self.bodies: List[bytes] = []
+        self.stems: List[bytes] = []
+        self.options: List[Tuple[bytes, ...]] = []
+        self.answers: List[str] = []
+        self.answer_at: List[Tuple[int, ...]] = []
+        self.numbers: List[Optional[int]] = []
+        topics: List[Optional[int]] = []
+        for path, entry in entries:
+            data = path.read_bytes()
+            if sha256(data).hexdigest() != entry["sha256"]:
+                raise ValueError(f"{path} changed since it was indexed; run the build command again")
+            if entry["extra"]:
+                data += entry["extra"].encode('utf-8')
+            stems, offsets, first = entry["stems"], entry["options"], entry["first_option"]
+            for i, (letters, answer) in enumerate(zip(entry["letters"], entry["answers"])):
+                stem = data[stems[2 * i]:stems[2 * i + 1]]
+                options = []
+                for j in range(first[i], first[i + 1]):
+                    text = data[offsets[2 * j]:offsets[2 * j + 1]]
+                    options.append(b". " + text if text else b".")
+                self.stems.append(stem)
+                self.options.append(tuple(options))
+                self.bodies.append(b"\n\n".join([stem] + [letter.encode('ascii') + option
+                                                         for letter, option in zip(letters, options)]))
+                self.answer_at.append(tuple(letters.index(c) for c in answer))
+            self.answers.extend(entry["answers"])
+            self.numbers.extend(entry["numbers"])
+            topics.extend(entry["topics"])
+        groups: Dict[Optional[int], List[int]] = {}
+        for i, topic in enumerate(topics):
+            groups.setdefault(topic, []).append(i)
+        self.strata = [groups[t] for t in sorted(groups, key=lambda t: (t is not None, t or 0))]
+
+    def __len__(self) -> int:
+        return len(self.stems)
+
+    def draw(self, rng: random.Random, size: int, stratify: bool) -> List[int]:
+        """
+        Pick size distinct questions in random order.
+
+        Args:
+            rng: Seeded generator of this variant
+            size: Number of questions, at most len(self)
+            stratify: If True, give each topic a share of size proportional to
+                its number of questions (largest remainder), then shuffle
+
+        Returns:
+            Question positions in presentation order
+        """
+        if not stratify or len(self.strata) == 1:
+            return rng.sample(range(len(self)), size)
+        total = len(self)
+        shares = [size * len(group) / total for group in self.strata]
+        quotas = [int(share) for share in shares]
+        by_remainder = sorted(range(len(shares)), key=lambda k: quotas[k] - shares[k])
+        for k in by_remainder[:size - sum(quotas)]:
+            quotas[k] += 1
+        picks: List[int] = []
+        for group, quota in zip(self.strata, quotas):
+            picks.extend(rng.sample(group, quota))
+        rng.shuffle(picks)
+        return picks
+
+    def render(self, picks: List[int], rng: random.Random, shuffle_options: bool,
+               title: str) -> Tuple[bytes, bytes]:
+        """
+        Assemble a practice exam and its answer key from byte slices.
+
+        Args:
+            picks: Question positions in presentation order
+            rng: Seeded generator of this variant, used for option order
+            shuffle_options: If True, shuffle each question's options and
+                remap its answer letters
+            title: Text after "# Practice Exam - " in both headings
+
+        Returns:
+            Tuple of (exam sheet, answer key) as UTF-8 bytes
+        """
+        blocks = []
+        key_lines = [f"# Practice Exam Answers - {title}\n".encode('utf-8')]
+        for n, i in enumerate(picks, 1):
+            answer = self.answers[i]
+            options = self.options[i]
+            if shuffle_options and len(options) > 1:
+                table = option_orders(len(options))
+                if table is None:
+                    order = rng.sample(range(len(options)), len(options))
+                    inverse = sorted(range(len(options)), key=order.__getitem__)
+                else:
+                    k = rng.randrange(len(table[0]))
+                    order, inverse = table[0][k], table[1][k]
+                answer = ''.join(sorted(LETTERS[inverse[at]] for at in self.answer_at[i]))
+                body = b"\n\n".join([self.stems[i]] + [LETTER_BYTES[new] + options[old]
+                                                        for new, old in enumerate(order)])
+            else:
+                body = self.bodies[i]
+            blocks.append(b"## question %d\n\n" % n + body)
+            number = self.numbers[i]
+            source = f" (question {number})" if number is not None else ""
+            key_lines.append(f"{n}. {answer}{source}".encode('utf-8'))
+        sheet = f"# Practice Exam - {title}\n\n".encode('utf-8') + SEPARATOR.join(blocks)
+        return sheet, b"\n".join(key_lines) + b"\n"
+
+
+def variant_rng(exam: str, seed: int, variant: int) -> random.Random:
+    """Generator for one variant; depends only on exam, seed and variant number."""
+    return random.Random(f"{exam}:{seed}:{variant}")
+
+
+def iter_variants(source: ExamSource, count: int, size: int, seed: int, shuffle_options: bool,
+                  stratify: bool) -> Iterator[Tuple[int, bytes, bytes]]:
+    """
+    Yield (variant, exam sheet, answer key) for variants 1 to count of an exam.
+
+    Args:
+        source: Sliced questions of the exam
+        count: Number of variants
+        size: Questions per variant; clamped to the questions available
+        seed: Base seed; the same seed always gives the same variants
+        shuffle_options: Shuffle options and remap answer letters
+        stratify: Draw in proportion to topic sizes
+    """
+    size = min(size, len(source))
+    for variant in range(1, count + 1):
+        rng = variant_rng(source.exam, seed, variant)
+        picks = source.draw(rng, size, stratify)
+        title = f"{source.exam.upper()} (seed {seed}, variant {variant})"
+        sheet, key = source.render(picks, rng, shuffle_options, title)
+        yield variant, sheet, key
+
+
+def generate(index: PracticeIndex, exams: List[str], output_dir: Path, count: int, size: int,
+             seed: int, shuffle_options: bool, stratify: bool) -> Tuple[int, int]:
+    """
+    Write count practice exams and answer keys for each exam.
+
+    Args:
+        index: Loaded PracticeIndex
+        exams: Exams to generate for; every indexed exam if empty
+        output_dir: Folder for <exam>-practice-<seed>-<variant>.md and
+            <exam>-practice-<seed>-<variant>-answers.md
+        count, size, seed, shuffle_options, stratify: As for iter_variants
+
+    Returns:
+        Tuple of (success_count, total_count) exams
+    """
+    indexed = index.exams()
+    names = exams or sorted(indexed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    success_count = 0
+    for exam in names:
+        keys = indexed.get(exam.lower())
+        if not keys:
+            logger.error(f"Exam not in the index: {exam}")
+            continue
+        try:
+            start = time.perf_counter()
+            source = ExamSource(exam.lower(), [(index.source(key), index.files[key]) for key in keys])
+            if not len(source):
+                logger.error(f"{exam}: no questions with a usable answer key")
+                continue
+            if size > len(source):
+                logger.warning(f"{exam}: only {len(source)} question(s) indexed; "
+                               f"variants will have {len(source)}")
+            for variant, sheet, key in iter_variants(source, count, size, seed,
+                                                     shuffle_options, stratify):
+                stem = f"{source.exam}-practice-{seed}-{variant:04d}"
+                (output_dir / f"{stem}.md").write_bytes(sheet)
+                (output_dir / f"{stem}-answers.md").write_bytes(key)
+            elapsed = time.perf_counter() - start
+            logger.info(f"✓ {exam}: {count} variant(s) of {min(size, len(source))} question(s) "
+                        f"in {elapsed:.2f}s ({count / elapsed:.0f}/s)")
+            success_count += 1
+        except Exception as e:
+            logger.error(f"Error generating {exam}: {e}")
+    return success_count, len(names)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Generate randomized practice exams from an index of cleaned ExamTopics questions.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Index (or update the index of) a cleaned corpus:
+    %(prog)s build data/silver/ --index data/practice_index.json
+
+  1000 reproducible 50-question variants of one exam:
+    %(prog)s generate --exam az-104 --count 1000 --questions 50 --seed 7 -o data/practice/
+
+  Shuffled options and topic-stratified draws for every indexed exam:
+    %(prog)s generate --count 20 --shuffle-options --stratify -o data/practice/
+        """
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="index cleaned .md files and folders")
+    build.add_argument("inputs", type=Path, nargs="+", help="cleaned .md files or folders")
+
+    gen = sub.add_parser("generate", help="write practice exams and answer keys")
+    gen.add_argument("-o", "--output", type=Path, required=True, help="output folder")
+    gen.add_argument("--exam", action="append", default=[],
+                     help="exam to generate for, e.g. az-104; repeatable (default: every indexed exam)")
+    gen.add_argument("-n", "--count", type=int, default=1,
+                     help="variants per exam (default: %(default)s)")
+    gen.add_argument("-q", "--questions", type=int, default=DEFAULT_QUESTIONS,
+                     help="questions per variant (default: %(default)s)")
+    gen.add_argument("--seed", type=int, default=0, help="base seed (default: %(default)s)")
+    gen.add_argument("--shuffle-options", action="store_true",
+                     help="shuffle options and remap the answer letters")
+    gen.add_argument("--stratify", action="store_true",
+                     help="draw from each topic in proportion to its size")
+
+    for sp in (build, gen):
+        sp.add_argument("--index", type=Path, default=Path(DEFAULT_INDEX),
+                        help="JSON practice index (default: %(default)s)")
+        sp.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "generate" and not args.index.exists():
+        logger.error(f"Index not found: {args.index} (run the build command first)")
+        return 1
+    if args.command == "generate" and (args.count < 1 or args.questions < 1):
+        p.error("--count and --questions must be at least 1")
+    try:
+        index = PracticeIndex(args.index)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Cannot open index {args.index}: {e}")
+        return 1
+
+    if args.command == "build":
+        start = time.perf_counter()
+        success_count, total_count = build_index(args.inputs, index)
+        index.save()
+        questions = sum(len(entry["numbers"]) for entry in index.files.values())
+        logger.info(f"Index holds {questions} question(s) from {len(index.files)} file(s); "
+                    f"updated in {time.perf_counter() - start:.1f}s")
+        return 0 if total_count and success_count == total_count else 1
+
+    success_count, total_count = generate(index, args.exam, args.output, args.count,
+                                          args.questions, args.seed, args.shuffle_options,
+                                          args.stratify)
+    return 0 if total_count and success_count == total_count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,9 @@
+import argparse
 import csv
+import sys
+from typing import List, Optional
 
-# Read the .txt file
-
-source = 'oracle'
-with open(f'../results/link/{source}-link.txt', 'r') as f:
-    lines = f.readlines()
+CSV_HEADER = ['Platform', 'Certification Title', 'Certification Code', 'Certification Slug', 'Certification link']
 
 # Platform to prefix mapping
 platform_prefix = {
@@ -14,49 +13,54 @@ platform_prefix = {
     # Add more platforms as needed
 }
 
-# Prepare data list
-data = []
-for line in lines:
-    url = line.strip()
-    if not url:
-        continue
-    
-    # Extract platform from URL
-    platform = url.split('/')[4].capitalize()  # e.g., 'amazon' -> 'Amazon'
-    pre_title = platform_prefix.get(platform, platform)  # Use prefix if available, else platform name
-    
-    # Extract slug from URL
-    slug = url.split('/')[-2]
-    
+def strip_vendor_prefix(slug: str) -> str:
     # Remove 'aws-certified-' or 'aws-' prefix if present
     if slug.startswith('aws-certified-'):
-        slug_clean = slug[len('aws-certified-'):]
-    elif slug.startswith('aws-'):
-        slug_clean = slug[len('aws-'):]
-    else:
-        slug_clean = slug
-    
+        return slug[len('aws-certified-'):]
+    if slug.startswith('aws-'):
+        return slug[len('aws-'):]
+    return slug
+
+def exam_title(platform: str, slug: str) -> str:
     # Generate title: capitalize words, replace hyphens with spaces, adjust for 'Specialty'
-    title_words = slug_clean.split('-')
+    pre_title = platform_prefix.get(platform, platform)  # Use prefix if available, else platform name
+    title_words = strip_vendor_prefix(slug).split('-')
     title = pre_title + ' ' + ' '.join(word.capitalize() for word in title_words)
-    title = title.replace(' Specialty', ' - Specialty')
-    
-    # Extract code
-    if slug_clean.endswith('-specialty'):
-        # code = '-'.join(slug_clean.split('-')[-2:]).lower()
-        code = '-'.join(slug_clean.split('-')[-2:])
-    else:
-        code_parts = slug_clean.split('-')[-2:]
-        # code = '-'.join(code_parts).lower()
-        code = '-'.join(code_parts)
-    
-    # Append to data
-    data.append([platform, title, code, slug, url])
-
-# Write to CSV
-with open(f'../source-local/{source}_cert.csv', 'w', newline='') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(['Platform', 'Certification Title', 'Certification Code', 'Certification Slug', 'Certification link'])
-    writer.writerows(data)
-
-print(f"CSV file '../source-local/{source}_cert.csv' created successfully.")
\ No newline at end of file
+    return title.replace(' Specialty', ' - Specialty')
+
+def exam_code(slug: str) -> str:
+    # Last two words of the slug, e.g. 'security-specialty' or 'saa-c03'
+    return '-'.join(strip_vendor_prefix(slug).split('-')[-2:])
+
+def link_row(url: str) -> List[str]:
+    """CSV row for an exam link such as https://www.examtopics.com/exams/amazon/<slug>/."""
+    parts = url.split('/')
+    platform = parts[4].capitalize()  # e.g., 'amazon' -> 'Amazon'
+    slug = parts[-2]
+    return [platform, exam_title(platform, slug), exam_code(slug), slug, url]
+
+def convert_link_file(link_file: str, csv_file: str) -> int:
+    """Write the certification CSV for one link file; return the number of rows."""
+    with open(link_file, 'r') as f:
+        data = [link_row(line.strip()) for line in f if line.strip()]
+
+    with open(csv_file, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(data)
+    return len(data)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Build a certification CSV from one provider's exam link file.")
+    p.add_argument("source", help="provider of the link file, e.g. oracle")
+    p.add_argument("--links-dir", default="../results/link", help="folder of <source>-link.txt files")
+    p.add_argument("--output-dir", default="../source-local", help="folder for <source>_cert.csv")
+    args = p.parse_args(argv)
+
+    csv_file = f'{args.output_dir}/{args.source}_cert.csv'
+    convert_link_file(f'{args.links_dir}/{args.source}-link.txt', csv_file)
+    print(f"CSV file '{csv_file}' created successfully.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+Shared question IR for the ExamTopics markdown tools.
+
+Splits a markdown buffer into question sections once and extracts a compact
+Question record per section, so clean_md, exam_gen and dum_gen no longer each
+run their own header and field regexes over the same text. Fields are found
+in one line-oriented pass per section, so parse time stays linear in the input
+size however the text is shaped.
+
+Usage:
+    from question_ir import parse_questions
+
+    text = Path("data/silver/aws/dop-c02.md").read_text(encoding="utf-8")
+    for q in parse_questions(text):
+        print(q.number, q.answer, q.options)
+"""
+import re
+import time
+from array import array
+from typing import List, Optional, Pattern, Tuple
+
+# Headers of cleaned (silver) files: "## question <N>" or a bare "## question"
+SILVER_HEADER_RE = re.compile(r'(?mi)^##\s*question(?:\s+(\d+))?')
+
+# Headers of raw dumps: "question" followed by a number anywhere on a "##" line,
+# e.g. "## Exam AZ-104 topic 1 question 1 discussion" (clean_md.HEADER_RE)
+RAW_HEADER_RE = re.compile(r'(?mi)^##.*?question[^\d]*(\d+)\b')
+
+# Field markers; every field is recognized from the start of a single line
+SUGGESTED_MARKER = 'Suggested Answer:'
+ANSWER_FIELD = '**Answer:'
+TIMESTAMP_MARKER = '**Timestamp:'
+LINK_MARKER = '[View on ExamTopics]('
+DISCUSSION_MARKER = 'Actual exam question from'
+ALL_QUESTIONS_MARKER = '[All '
+
+# Patterns applied to one line at a time, so their cost is bounded by the line
+LETTERS_RE = re.compile(r'\s*([A-Z]+)')
+ANSWER_RE = re.compile(r'\*\*Answer:\s*([A-Z]+)\*\*')
+TOPIC_RE = re.compile(r'Topic\s*#\s*:?\s*(\d+)')
+
+# Suggested-answer line start for drop_suggested_lines; horizontal space only,
+# so a match never spans lines
+SUGGESTED_START_RE = re.compile(r'(?mi)^[^\S\n]*suggested answer:')
+
+# Marker that ends the question prompt (stem + options)
+ANSWER_MARKER = '\n**Answer:'
+
+
+class ParseTimeout(TimeoutError):
+    """Raised by parse_questions when parsing runs past its deadline."""
+
+
+# Layout of the fixed part of Question._spans; option triples follow
+_START, _BODY, _ANSWER_AT, _END, _STEM_S, _STEM_E, _TS_S, _TS_E, _LINK_S, _LINK_E = range(10)
+_FIXED = 10
+
+
+class Question:
+    """
+    Compact record of one question section.
+
+    Text fields are stored as offsets into the shared source buffer (one
+    array per record) and only materialized when accessed.
+
+    Attributes:
+        source: Buffer the offsets point into
+        number: Question number from the header, or None if the header has none
+        topic: Topic number from a "Topic #: <n>" line, or None
+        suggested: Letters from "Suggested Answer: <X>", or ''
+        answer: Letters from "**Answer: <X>**", or ''
+        start: Offset of the header in the source buffer
+        body_start: Offset of the first line after the header
+        answer_start: Offset of "\\n**Answer:" within the body, or end
+        end: Offset where the next section (or the buffer) starts
+        stem: Question text without the discussion header and suggested answer
+        exam: Exam named by the "[All <exam> Questions]" line of the discussion
+            header, or ''
+        options: Tuple of (letter, text) pairs in document order
+        timestamp: Text of the "**Timestamp: ...**" line, or ''
+        link: URL of the "[View on ExamTopics](...)" link, or ''
+    """
+
+    __slots__ = ('source', 'number', 'topic', 'suggested', 'answer', '_spans')
+
+    def __init__(self, source: str, number: Optional[int], start: int, body_start: int,
+                 answer_start: int, end: int):
+        self.source = source
+        self.number = number
+        self.topic: Optional[int] = None
+        self.suggested = ''
+        self.answer = ''
+        self._spans = array('q', (start, body_start, answer_start, end,
+                                  body_start, body_start, 0, 0, 0, 0))
+
+    @property
+    def start(self) -> int:
+        return self._spans[_START]
+
+    @property
+    def body_start(self) -> int:
+        return self._spans[_BODY]
+
+    @property
+    def answer_start(self) -> int:
+        return self._spans[_ANSWER_AT]
+
+    @property
+    def end(self) -> int:
+        return self._spans[_END]
+
+    @property
+    def title(self) -> str:
+        """Normalized title without the markdown prefix, e.g. "question 12"."""
+        return f'question {self.number}' if self.number is not None else 'question'
+
+    @property
+    def stem(self) -> str:
+        sp = self._spans
+        return drop_suggested_lines(self.source[sp[_STEM_S]:sp[_STEM_E]]).strip()
+
+    @property
+    def exam(self) -> str:
+        sp, src = self._spans, self.source
+        stem_start = sp[_STEM_S]
+        if stem_start == sp[_BODY]:
+            return ''
+        # parse_fields starts the stem right after the "[All <exam> Questions]" line
+        line = src[src.rfind('\n', sp[_BODY], stem_start) + 1:stem_start].rstrip(' \t')
+        return line[len(ALL_QUESTIONS_MARKER):-len('Questions]')].strip()
+
+    @property
+    def options(self) -> Tuple[Tuple[str, str], ...]:
+        sp, src = self._spans, self.source
+        return tuple((src[sp[i]], src[sp[i + 1]:sp[i + 2]].strip())
+                     for i in range(_FIXED, len(sp), 3))
+
+    @property
+    def timestamp(self) -> str:
+        sp = self._spans
+        return self.source[sp[_TS_S]:sp[_TS_E]].strip()
+
+    @property
+    def link(self) -> str:
+        sp = self._spans
+        return self.source[sp[_LINK_S]:sp[_LINK_E]]
+
+    def option_spans(self) -> Tuple[Tuple[str, int, int], ...]:
+        """(letter, start, end) of each option's text in the source buffer, whitespace trimmed."""
+        sp, src = self._spans, self.source
+        spans = []
+        for i in range(_FIXED, len(sp), 3):
+            start, end = sp[i + 1], sp[i + 2]
+            text = src[start:end]
+            end = start + len(text.rstrip())
+            start = min(start + len(text) - len(text.lstrip()), end)
+            spans.append((src[sp[i]], start, end))
+        return tuple(spans)
+
+    def option_map(self) -> dict:
+        """Map option letters to option text."""
+        return dict(self.options)
+
+    def text(self) -> str:
+        """Slice the whole section, header included, out of the source buffer."""
+        return self.source[self.start:self.end]
+
+    def prompt(self) -> str:
+        """Slice the raw question body (stem and options) out of the source buffer."""
+        return self.source[self.body_start:self.answer_start]
+
+    def __repr__(self) -> str:
+        return (f'Question(number={self.number!r}, topic={self.topic!r}, '
+                f'options={(len(self._spans) - _FIXED) // 3}, answer={self.answer!r})')
+
+
+def drop_suggested_lines(text: str) -> str:
+    """
+    Remove "Suggested Answer:" lines from text in linear time.
+
+    Gives the same result as re.sub(r'(?mi)^\\s*Suggested Answer:.*$', '', text),
+    which rescans every run of blank lines once per line in it: the matched
+    line is emptied together with the whitespace-only lines directly above it.
+
+    Args:
+        text: Question text
+
+    Returns:
+        Text without suggested-answer lines
+    """
+    pieces: List[str] = []
+    kept = 0        # text[kept:] has not been copied to pieces yet
+    floor = 0       # earliest offset a match may extend back to
+    for m in SUGGESTED_START_RE.finditer(text):
+        start = m.start()
+        # Take in the whitespace-only lines directly above, one line at a time
+        while start > floor:
+            prev = text.rfind('\n', floor, start - 1) + 1 or floor
+            if text[prev:start - 1].strip():
+                break
+            start = prev
+        eol = text.find('\n', m.end())
+        if eol == -1:
+            eol = len(text)
+        pieces.append(text[kept:start])
+        kept = eol
+        floor = eol + 1
+    if not pieces:
+        return text
+    pieces.append(text[kept:])
+    return ''.join(pieces)
+
+
+def parse_fields(q: Question) -> Question:
+    """
+    Fill the content fields of a Question from its section of the source buffer.
+
+    Args:
+        q: Question with offsets already set
+
+    Returns:
+        The same Question, for chaining
+
+    Notes:
+        - Single pass over the section's lines: each line is classified by
+          its first characters and only the matching field is examined, so
+          parse time is linear in the section size whatever its content
+        - An option is a line "<letter>. <text>" directly after an empty line;
+          its text is the rest of that line, so an image-only option ("A.")
+          has empty text. The first option or "**Answer:" line after an
+          empty line ends the stem
+        - The stem starts after the "Actual exam question from ...
+          [All <exam> Questions]" block when the body opens with one
+        - Only offsets and short answer strings are stored; no section copy
+    """
+    source, sp = q.source, q._spans
+    body_start, end = sp[_BODY], sp[_END]
+
+    stem_start, stem_end = body_start, -1
+    header = 0              # discussion header: 0 undecided, 1 inside, 2 done or absent
+    blank_at = -1           # start of the previous line if it was empty
+    have_ts = have_link = False
+    pos = body_start
+    for line in source[body_start:end].split('\n'):
+        eol = pos + len(line)
+        if not line:
+            blank_at = pos
+            pos = eol + 1
+            continue
+        c = line[0]
+
+        if blank_at != -1:
+            if 'A' <= c <= 'Z' and line[1:2] == '.':
+                rest = line[2:]
+                if rest[:1].isspace() or (not rest and eol < end):
+                    if stem_end == -1 and blank_at > body_start:
+                        stem_end = blank_at - 1
+                    sp.extend((pos, eol - len(rest.lstrip()), eol))
+            elif stem_end == -1 and blank_at > body_start and line.startswith(ANSWER_FIELD):
+                stem_end = blank_at - 1
+            blank_at = -1
+
+        if not q.answer and ANSWER_FIELD in line:
+            m = ANSWER_RE.search(line)
+            if m:
+                q.answer = m.group(1)
+
+        if c == '*':
+            if not have_ts and line.startswith(TIMESTAMP_MARKER):
+                r = line.rstrip(' \t')
+                if len(r) >= 14 and r.endswith('**'):
+                    value = r[12:-2]
+                    sp[_TS_S] = pos + 12 + len(value) - len(value.lstrip())
+                    sp[_TS_E] = pos + len(r) - 2
+                    have_ts = True
+        elif c == '[':
+            if not have_link and line.startswith(LINK_MARKER):
+                j = line.find(')', 21)
+                if j != -1:
+                    sp[_LINK_S], sp[_LINK_E] = pos + 21, pos + j
+                    have_link = True
+            elif header == 1 and stem_end == -1 and line.startswith(ALL_QUESTIONS_MARKER):
+                r = line.rstrip(' \t')
+                if len(r) >= 15 and r.endswith('Questions]'):
+                    stem_start = eol
+                    header = 2
+        else:
+            if c.isspace():
+                c = line.lstrip()[:1]
+            if c == 'S':
+                t = line.lstrip()
+                if not q.suggested and t.startswith(SUGGESTED_MARKER):
+                    m = LETTERS_RE.match(t, 17)
+                    if m:
+                        q.suggested = m.group(1)
+            elif c == 'T' and q.topic is None:
+                m = TOPIC_RE.fullmatch(line.strip())
+                if m:
+                    q.topic = int(m.group(1))
+
+        if header == 0 and stem_end == -1:
+            t = line.lstrip()
+            if t:
+                after = t[25:26]
+                header = 1 if (t.startswith(DISCUSSION_MARKER)
+                               and not (after.isalnum() or after == '_')) else 2
+        pos = eol + 1
+
+    if header != 2 or stem_start > (end if stem_end == -1 else stem_end):
+        stem_start = body_start
+    sp[_STEM_S] = stem_start
+    sp[_STEM_E] = end if stem_end == -1 else stem_end
+    return q
+
+
+def question_from_fields(source: str, number: Optional[int], body_start: int, answer_start: int,
+                         stem: Tuple[int, int], options: List[Tuple[int, int, int]],
+                         topic: Optional[int] = None, suggested: str = '',
+                         answer: str = '') -> Question:
+    """
+    Build a Question for a one-section source whose fields are already located.
+
+    Args:
+        source: Cleaned section, header included, as the whole buffer
+        number: Question number
+        body_start, answer_start: Offsets as parse_fields' caller sets them
+        stem: (start, end) of the stem
+        options: (letter offset, text start, line end) of each option
+        topic, suggested, answer: Field values
+
+    Returns:
+        The Question parse_fields would build from the same source
+
+    Notes:
+        - For writers that produce the section themselves (json_ingest) and
+          so know where each field is without scanning it
+    """
+    q = Question(source, number, 0, body_start, answer_start, len(source))
+    q.topic, q.suggested, q.answer = topic, suggested, answer
+    sp = q._spans
+    sp[_STEM_S], sp[_STEM_E] = stem
+    for option in options:
+        sp.extend(option)
+    return q
+
+
+def parse_questions(text: str, header_re: Pattern = SILVER_HEADER_RE,
+                    with_fields: bool = True, deadline: Optional[float] = None) -> List[Question]:
+    """
+    Split a markdown buffer into Question records.
+
+    Args:
+        text: Complete markdown file content
+        header_re: Pattern whose matches start a section; group 1, if it
+            participates, is the question number
+        with_fields: If False, only number and offsets are filled in, which is
+            all a caller slicing the source buffer needs
+        deadline: time.monotonic() value after which parsing stops, or None
+
+    Returns:
+        List of Question records in document order; empty if no header matched
+
+    Raises:
+        ParseTimeout: If the deadline passes before the last section is parsed
+
+    Notes:
+        - Content before the first header (the preamble) is not part of any
+          record; it ends at records[0].start
+        - The deadline is checked between sections, so a batch caller can
+          bound the time spent on one file
+    """
+    questions = []
+    has_number = header_re.groups > 0
+    prev = None
+    # Walk matches lazily, closing each section when the next header appears,
+    # so no list of Match objects is kept alive
+    for m in header_re.finditer(text):
+        if prev is not None:
+            questions.append(_make_question(text, prev, m.start(), has_number, with_fields))
+            if deadline is not None and time.monotonic() > deadline:
+                raise ParseTimeout(f"parse deadline passed after {len(questions)} question(s)")
+        prev = m
+    if prev is not None:
+        questions.append(_make_question(text, prev, len(text), has_number, with_fields))
+    return questions
+
+
+def parse_input(text: str, with_fields: bool = True) -> List[Question]:
+    """
+    Parse the questions of a cleaned file or a raw dump.
+
+    Args:
+        text: File content
+        with_fields: Passed to parse_questions
+
+    Returns:
+        Questions in file order
+
+    Notes:
+        - A file without silver "## question N" headers is read as a raw dump
+          (RAW_HEADER_RE); the stem skips the discussion block either way
+    """
+    header_re = SILVER_HEADER_RE if SILVER_HEADER_RE.search(text) else RAW_HEADER_RE
+    return parse_questions(text, header_re, with_fields)
+
+
+def _make_question(text: str, m, end: int, has_number: bool, with_fields: bool) -> Question:
+    """Build a Question for the section starting at header match m."""
+    start = m.start()
+    nl = text.find('\n', start, end)
+    body_start = nl + 1 if nl != -1 else end
+    answer_start = text.find(ANSWER_MARKER, body_start, end)
+    if answer_start == -1:
+        answer_start = end
+    num = m.group(1) if has_number else None
+    q = Question(text, int(num) if num else None, start, body_start, answer_start, end)
+    if with_fields:
+        parse_fields(q)
+    return q
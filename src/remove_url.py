@@ -1,48 +1,229 @@
-import re
+# -*- coding: utf-8 -*-
+"""
+Strip "**Timestamp: ...**" / "[View on ExamTopics](...)" blocks from dumps.
+
+Every match of TIMESTAMP_LINK_RE (from "**Timestamp:" up to the first "/)",
+the end of the discussion link) is removed. Files are memory-mapped and
+scanned once with a compiled bytes pattern; the ranges between matches are
+written straight from the mapping to a temporary file next to the output,
+which is then renamed over it, so an interrupted run never leaves a partial
+file behind and no decoded copy of the dump is ever held in memory.
+
+- Inputs may be files, folders (every .md file below them) or glob patterns
+- Files are updated in place unless -o is given; files without a match are
+  not rewritten
+- The report lists matches and bytes removed per file and in total
+
+Usage:
+    python src/remove_url.py data/raw/azure/dp-700.md
+    python src/remove_url.py data/raw/ "dumps/**/*.md" --dry-run
+    python src/remove_url.py data/raw/azure/ -o data/silver/azure/
+"""
+import argparse
+import glob
+import logging
+import mmap
 import os
-import shutil
+import re
+import sys
+import tempfile
+import time
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Same matches as the original r"\*\*Timestamp:[\s\S]*?/\)": everything up to the
+# first "/)". The unrolled loop lets the engine skip runs of non-"/" bytes
+# instead of trying the lazy tail at every byte, which is 2-3x faster.
+TIMESTAMP_LINK_RE = re.compile(rb"\*\*Timestamp:[^/]*(?:/(?!\))[^/]*)*/\)")
+
+GLOB_CHARS = frozenset('*?[')
+
+# Write buffer for the kept ranges
+WRITE_BUFFER = 1 << 20
+
+
+def glob_root(pattern: str) -> Path:
+    """Folder of a glob pattern before its first component with a wildcard, e.g. "dumps" for "dumps/**/*.md"."""
+    parts = Path(pattern).parts
+    for i, part in enumerate(parts):
+        if GLOB_CHARS.intersection(part):
+            return Path(*parts[:i])
+    return Path(pattern).parent
+
+
+def is_output_folder(output: str) -> bool:
+    """Whether -o names a folder: an existing one, or a path ending in a separator or without a suffix."""
+    return os.path.isdir(output) or output.endswith(('/', os.sep)) or not Path(output).suffix
+
+
+def iter_inputs(patterns: List[str]) -> Iterator[Tuple[Path, Path]]:
+    """
+    Expand files, folders and glob patterns.
+
+    Yields:
+        (file, root) pairs; root is the folder the file's output path is
+        relative to when writing to an output folder: the folder itself, the
+        part of a glob pattern before its first wildcard, or a file's parent
+    """
+    seen = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = ((p, path) for p in sorted(path.rglob("*.md")))
+        elif GLOB_CHARS.intersection(pattern):
+            root = glob_root(pattern)
+            matches = ((Path(p), root) for p in sorted(glob.glob(pattern, recursive=True)))
+        else:
+            matches = [(path, path.parent)]
+        for file, root in matches:
+            if file.is_dir():
+                continue
+            key = file.resolve()
+            if key not in seen:
+                seen.add(key)
+                yield file, root
+
+
+def strip_file(input_path: Path, output_path: Optional[Path] = None,
+               dry_run: bool = False) -> Tuple[int, int, int]:
+    """
+    Remove every timestamp/link block from one file in a single pass.
+
+    Args:
+        input_path: File to scan
+        output_path: Where to write the result (default: input_path, in place)
+        dry_run: Only count; write nothing
+
+    Returns:
+        Tuple of (matches, bytes removed, input size)
+
+    Notes:
+        - The output is written to a temporary file in its own folder and
+          renamed over the target with os.replace, keeping the input's mode
+        - In place, a file without matches is left untouched
+    """
+    output_path = output_path or input_path
+    size = input_path.stat().st_size
+    matches = removed = 0
+    tmp_name = None
+    with open(input_path, 'rb') as src:
+        if size == 0:
+            if output_path != input_path and not dry_run:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                output_path.write_bytes(b'')
+            return 0, 0, 0
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            spans = TIMESTAMP_LINK_RE.finditer(mm)
+            if dry_run:
+                for m in spans:
+                    matches += 1
+                    removed += m.end() - m.start()
+                return matches, removed, size
+            first = next(spans, None)
+            if first is None and output_path == input_path:
+                return 0, 0, size
+
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{output_path.name}.", suffix=".tmp",
+                                            dir=output_path.parent)
+            try:
+                with os.fdopen(fd, 'wb', buffering=WRITE_BUFFER) as out, memoryview(mm) as view:
+                    pos = 0
+                    for m in chain(() if first is None else (first,), spans):
+                        start, end = m.span()
+                        out.write(view[pos:start])
+                        matches += 1
+                        removed += end - start
+                        pos = end
+                    out.write(view[pos:])
+                    out.flush()
+                    os.fsync(out.fileno())
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+    # The mapping and the input are closed before the rename (required on Windows)
+    os.chmod(tmp_name, input_path.stat().st_mode & 0o7777)
+    os.replace(tmp_name, output_path)
+    return matches, removed, size
+
 
 def remove_timestamp_and_links(input_file, output_file):
-    # Read entire file and remove any block that matches the provided regex
-    # User requested regex: \*\*Timestamp:[\s\S]*?/\)
-    pattern = re.compile(r"\*\*Timestamp:[\s\S]*?/\)")
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except Exception as e:
-        print(f"Lỗi khi đọc file {input_file}: {e}")
-        return 0
-
-    matches = pattern.findall(content)
-    removed_count = len(matches)
-    if removed_count > 0:
-        new_content = pattern.sub('', content)
-    else:
-        new_content = content
-
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        print(f"Đã ghi {len(new_content.splitlines())} dòng vào {output_file}.")
-    except Exception as e:
-        print(f"Lỗi khi ghi file: {e}")
-        return 0
-
-    print(f"Đã xóa {removed_count} match(ở) theo regex.")
-    return removed_count
-
-# Sử dụng
-input_file = '/Users/kien.ly/Library/CloudStorage/OneDrive-BangkokSolution/my-project/examtopics-downloader/data/raw/azure/dp-700.md'
-output_file = '/Users/kien.ly/Library/CloudStorage/OneDrive-BangkokSolution/my-project/examtopics-downloader/data/silver/azure/dp-700-cleaned.md'
-
-print(f"Input file: {input_file}")
-print(f"Output file: {output_file}")
-
-removed = remove_timestamp_and_links(input_file, output_file)
-
-# Rename để thay thế file gốc
-try:
-    shutil.move(output_file, input_file)
-    print("File đã được cập nhật.")
-except Exception as e:
-    print(f"Lỗi khi cập nhật file: {e}")
\ No newline at end of file
+    """Strip one file into output_file; return the number of blocks removed."""
+    matches, _, _ = strip_file(Path(input_file), Path(output_file))
+    return matches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Remove '**Timestamp: ... /)' blocks (timestamp and discussion link) from markdown dumps.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  In place:
+    %(prog)s data/raw/azure/dp-700.md
+    %(prog)s data/raw/ "dumps/**/*.md"
+
+  Into another folder (same relative paths):
+    %(prog)s data/raw/azure/ -o data/silver/azure/
+
+  Report only:
+    %(prog)s data/raw/ --dry-run
+        """
+    )
+    p.add_argument("inputs", nargs="+", help="files, folders (every .md below them) or glob patterns")
+    p.add_argument("-o", "--output",
+                   help="output file (with a suffix such as .md) for a single input file, otherwise "
+                        "output folder (default: update the inputs in place)")
+    p.add_argument("--dry-run", action="store_true", help="report what would be removed, write nothing")
+    p.add_argument("-v", "--verbose", action="store_true", help="report every file, not only changed ones")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    inputs = list(iter_inputs(args.inputs))
+    if not inputs:
+        logger.error("No input files found")
+        return 1
+    output = None if args.output is None else Path(args.output)
+    single_target = (output is not None and len(inputs) == 1
+                     and not is_output_folder(args.output) and not Path(args.inputs[0]).is_dir())
+
+    start = time.perf_counter()
+    total_matches = total_removed = total_bytes = changed = failed = 0
+    for path, root in inputs:
+        if output is None:
+            target = None
+        elif single_target:
+            target = output
+        else:
+            target = output / path.relative_to(root)
+        try:
+            matches, removed, size = strip_file(path, target, args.dry_run)
+        except (OSError, ValueError) as e:
+            logger.error(f"✗ {path}: {e}")
+            failed += 1
+            continue
+        total_matches += matches
+        total_removed += removed
+        total_bytes += size
+        changed += bool(matches)
+        log = logger.info if matches else logger.debug
+        log(f"{'Would strip' if args.dry_run else '✓ Stripped'} {path}: {matches} block(s), "
+            f"{removed:,} of {size:,} bytes")
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    logger.info(f"{'Dry run' if args.dry_run else '✓ Done'}: {changed}/{len(inputs)} file(s) with "
+                f"matches, {total_matches} block(s), {total_removed:,} bytes removed "
+                f"({100 * total_removed / max(total_bytes, 1):.1f}%) in {elapsed:.2f}s, "
+                f"{total_bytes / 1024 / 1024 / elapsed:.1f} MB/s")
+    if failed:
+        logger.error(f"✗ {failed} file(s) failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Per-question HTML fragment cache for convert_md_to_html.
+
+A page is split into its preamble and one block per "## question" section.
+Each block is rendered on its own and stored in SQLite under the hash of its
+text and the renderer settings, so regenerating a 2,000-question answer key
+after one question changed renders one block and reuses the rest.
+
+- Stitched fragments match rendering the whole document at once: top-level
+  HTML elements are joined with newlines either way, and header ids are made
+  unique across the page afterwards, as the toc extension would have done
+- Every page records the fragments it uses; fragments no page uses any more
+  (edited or removed questions, changed settings, deleted pages) are orphans
+  and are evicted with evict_orphans()
+
+Usage:
+    cache = RenderCache("data/html-cache.sqlite", settings)
+    body = cache.render(page_key, text, render_fragment)
+    cache.evict_orphans()
+    print(cache.hits, cache.misses)
+"""
+import hashlib
+import re
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional
+
+from question_ir import parse_questions
+
+CACHE_FORMAT = 1
+
+# Maximum keys per "IN (...)" query, below SQLite's variable limit
+QUERY_CHUNK = 500
+
+# Header ids as written by the toc extension, and its "_<n>" de-duplication suffix
+HEADER_ID_RE = re.compile(r'<h([1-6]) id="([^"]*)"')
+IDCOUNT_RE = re.compile(r'^(.*)_([0-9]+)$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    key TEXT PRIMARY KEY,
+    html TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS refs (
+    page TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (page, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS refs_key ON refs (key);
+"""
+
+
+def split_blocks(text: str) -> List[str]:
+    """
+    Split a markdown page into the blocks that are rendered separately.
+
+    Returns:
+        The preamble (if not empty) followed by one block per question
+        section; the blocks concatenate back to text
+    """
+    questions = parse_questions(text, with_fields=False)
+    if not questions:
+        return [text]
+    blocks = [text[:questions[0].start]] if questions[0].start else []
+    blocks.extend(q.text() for q in questions)
+    return blocks
+
+
+def unique_id(id: str, used: set) -> str:
+    """Same rule as markdown.extensions.toc.unique: append _1, _2, ... until unused."""
+    while id in used or not id:
+        m = IDCOUNT_RE.match(id)
+        if m:
+            id = f"{m.group(1)}_{int(m.group(2)) + 1}"
+        else:
+            id = f"{id}_1"
+    used.add(id)
+    return id
+
+
+def dedupe_header_ids(html: str, used: Optional[set] = None) -> str:
+    """
+    Make header ids unique across stitched fragments, in document order.
+
+    Args:
+        html: Stitched HTML
+        used: Ids already taken earlier in the document; updated in place
+
+    Returns:
+        html with repeated header ids renamed
+    """
+    used = set() if used is None else used
+
+    def fix(m: re.Match) -> str:
+        new = unique_id(m.group(2), used)
+        return m.group(0) if new == m.group(2) else f'<h{m.group(1)} id="{new}"'
+
+    return HEADER_ID_RE.sub(fix, html)
+
+
+class RenderCache:
+    """
+    Content-addressed store of rendered question fragments.
+
+    Args:
+        path: SQLite database file (created if missing)
+        settings: Description of everything that affects rendering (format,
+            library version, extensions); part of every fragment key
+
+    Attributes:
+        hits: Fragments reused since the cache was opened
+        misses: Fragments rendered since the cache was opened
+
+    Notes:
+        - Several processes may share one cache file; writes are short
+          transactions and the database uses WAL mode
+    """
+
+    def __init__(self, path: str, settings: str):
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self._base = hashlib.blake2b(f"{CACHE_FORMAT}\0{settings}\0".encode('utf-8'), digest_size=16)
+        self.hits = 0
+        self.misses = 0
+
+    def fragment_key(self, block: str) -> str:
+        h = self._base.copy()
+        h.update(block.encode('utf-8'))
+        return h.hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), QUERY_CHUNK):
+            chunk = unique[i:i + QUERY_CHUNK]
+            found.update(self.conn.execute(
+                f"SELECT key, html FROM fragments WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+        return found
+
+    def render(self, page: str, text: str, render_fragment: Callable[[str], str]) -> str:
+        """
+        Render a page, reusing cached fragments.
+
+        Args:
+            page: Stable identifier of the page, e.g. its input path
+            text: Markdown content of the page
+            render_fragment: Renders one markdown block to an HTML fragment
+
+        Returns:
+            HTML body of the whole page
+        """
+        parts = self.fragments(page, split_blocks(text), render_fragment)
+        return dedupe_header_ids('\n'.join(html for html in parts if html))
+
+    def fragments(self, page: str, blocks: List[str],
+                  render_fragment: Callable[[str], str]) -> List[str]:
+        """
+        Render blocks one by one, reusing cached fragments, and record them as the page's.
+
+        Args:
+            page: Stable identifier of the page
+            blocks: Markdown blocks, e.g. from split_blocks()
+            render_fragment: Renders one markdown block to an HTML fragment
+
+        Returns:
+            One HTML fragment per block, header ids not yet de-duplicated
+        """
+        parts = self.render_blocks(blocks, render_fragment)
+        self.set_page(page, blocks)
+        return parts
+
+    def render_blocks(self, blocks: List[str], render_fragment: Callable[[str], str]) -> List[str]:
+        """Like fragments(), without recording the blocks as any page's; see set_page()."""
+        keys = [self.fragment_key(b) for b in blocks]
+        cached = self._lookup(keys)
+        new = {}
+        parts = []
+        for block, key in zip(blocks, keys):
+            html = cached.get(key)
+            if html is None:
+                html = render_fragment(block)
+                cached[key] = new[key] = html
+                self.misses += 1
+            else:
+                self.hits += 1
+            parts.append(html)
+
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO fragments (key, html) VALUES (?, ?)",
+                                  new.items())
+        return parts
+
+    def set_page(self, page: str, blocks: Iterable[str]) -> None:
+        """Record blocks as the complete set of fragments page uses."""
+        keys = [self.fragment_key(b) for b in blocks]
+        with self.conn:
+            self.conn.execute("DELETE FROM refs WHERE page = ?", (page,))
+            self.conn.executemany("INSERT OR IGNORE INTO refs (page, key) VALUES (?, ?)",
+                                  ((page, key) for key in keys))
+
+    def forget_pages(self, prefix: str, live: Iterable[str]) -> int:
+        """Drop the fragment references of pages under prefix that are not in live."""
+        live = set(live)
+        like = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        gone = [(page,) for page, in self.conn.execute(
+            "SELECT DISTINCT page FROM refs WHERE page LIKE ? ESCAPE '\\'", (like,))
+            if page not in live]
+        with self.conn:
+            self.conn.executemany("DELETE FROM refs WHERE page = ?", gone)
+        return len(gone)
+
+    def evict_orphans(self) -> int:
+        """Delete fragments no page references; return how many were evicted."""
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM fragments WHERE NOT EXISTS "
+                                    "(SELECT 1 FROM refs WHERE refs.key = fragments.key)")
+        return cur.rowcount
+
+    def size(self) -> int:
+        """Number of stored fragments."""
+        return self.conn.execute("SELECT COUNT(*) FROM fragments").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
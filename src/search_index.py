@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Full-text search over cleaned ExamTopics markdown.
+
+Builds a persistent SQLite FTS5 index of every question's stem and options,
+keyed by exam (the file name, e.g. "az-104") and question number, so finding
+a question by keyword no longer means grepping the whole silver corpus.
+
+- Incremental: files whose SHA-256 is unchanged since they were indexed are
+  skipped, changed files are re-indexed in place, and files deleted from an
+  indexed folder are dropped from the index
+- Ranked: hits are ordered by BM25 with stem matches weighted above option
+  matches, and shown with a highlighted snippet
+- Raw dumps from the downloader are read with their own headers, as dedup.py
+  reads them, so an uncleaned folder can be indexed too
+
+Usage:
+    python src/search_index.py build data/silver/ --index data/search.sqlite
+    python src/search_index.py query "geo-redundant storage" --index data/search.sqlite
+    python src/search_index.py query "snapshot*" --exam az-104 --limit 5 --json
+"""
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from build_manifest import file_key, file_sha256
+from question_ir import Question, parse_input
+
+INDEX_FORMAT = 2
+
+DEFAULT_INDEX = "data/search.sqlite"
+
+# BM25 column weights: a stem match counts twice as much as an option match
+STEM_WEIGHT = 2.0
+OPTIONS_WEIGHT = 1.0
+
+# Tokens of context around the matched terms in a snippet
+SNIPPET_TOKENS = 16
+HIGHLIGHT = ("**", "**")
+
+# A search word, optionally followed by "*" for prefix search
+TERM_RE = re.compile(r'(\w+)(\*?)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    exam TEXT NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    number INTEGER,
+    topic INTEGER,
+    answer TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_file ON questions (file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS question_text USING fts5(
+    stem, options, exam UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def exam_key(path: Path) -> str:
+    """Exam a cleaned file belongs to: its lowercased file name without extension."""
+    return path.stem.lower()
+
+
+def match_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query.
+
+    Every word must match; punctuation is ignored, so input such as
+    "az-104" or "C:\\temp" never raises an FTS5 syntax error. A word
+    ending in "*" matches as a prefix.
+
+    Examples:
+        >>> match_query('geo-redundant snap*')
+        '"geo" "redundant" "snap"*'
+    """
+    return ' '.join(f'"{word}"{star}' for word, star in TERM_RE.findall(text))
+
+
+class SearchIndex:
+    """
+    Persistent FTS5 index of cleaned questions.
+
+    Args:
+        path: SQLite database file (created if missing), or ":memory:"
+
+    Notes:
+        - Each question is one FTS5 row whose rowid is its questions.id, so a
+          file is dropped with two deletes and no rescan of the text
+        - Changes are made in one transaction; call commit() to keep them
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        expected = {"format": str(INDEX_FORMAT)}
+        stored = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if not stored:
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", expected.items())
+            self.conn.commit()
+        elif stored != expected:
+            raise ValueError(f"{path} was built with different settings {stored}; "
+                             f"delete it to rebuild the index")
+
+    def file_state(self, key: str) -> Optional[Tuple[int, str]]:
+        """Return (file_id, sha256) of an indexed file, or None."""
+        return self.conn.execute("SELECT id, sha256 FROM files WHERE path = ?", (key,)).fetchone()
+
+    def indexed_files(self, prefix: str = "") -> Dict[str, int]:
+        """Map the key of every indexed file under prefix to its file_id."""
+        like = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return dict(self.conn.execute("SELECT path, id FROM files WHERE path LIKE ? ESCAPE '\\'",
+                                      (like,)))
+
+    def drop_file(self, file_id: int) -> None:
+        """Remove a file and its questions from the index."""
+        self.conn.execute("DELETE FROM question_text WHERE rowid IN "
+                          "(SELECT id FROM questions WHERE file_id = ?)", (file_id,))
+        self.conn.execute("DELETE FROM questions WHERE file_id = ?", (file_id,))
+        self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def add_file(self, key: str, exam: str, digest: str, questions: List[Question]) -> int:
+        """
+        Index a file's questions.
+
+        Args:
+            key: File key from build_manifest.file_key()
+            exam: Exam the questions belong to
+            digest: SHA-256 of the file content
+            questions: Parsed questions of the file
+
+        Returns:
+            Number of questions indexed
+        """
+        cur = self.conn.execute("INSERT INTO files (path, exam, sha256) VALUES (?, ?, ?)",
+                                (key, exam, digest))
+        file_id = cur.lastrowid
+        rows = []
+        for q in questions:
+            cur = self.conn.execute("INSERT INTO questions (file_id, number, topic, answer) "
+                                    "VALUES (?, ?, ?, ?)", (file_id, q.number, q.topic, q.answer))
+            options = '\n'.join(f"{letter}. {text}" for letter, text in q.options)
+            rows.append((cur.lastrowid, q.stem, options, exam))
+        self.conn.executemany("INSERT INTO question_text (rowid, stem, options, exam) "
+                              "VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def search(self, query: str, limit: int = 10, exam: Optional[str] = None,
+               raw: bool = False) -> List[Dict]:
+        """
+        Find the best-matching questions.
+
+        Args:
+            query: Words to look for (see match_query), or FTS5 syntax if raw
+            limit: Maximum number of hits
+            exam: Only return questions of this exam
+            raw: Pass query to FTS5 unchanged (phrases, OR, NEAR, column filters)
+
+        Returns:
+            Hits, best first, each with "exam", "file", "number", "topic",
+            "answer", "score" (higher is better) and "snippet"
+
+        Raises:
+            sqlite3.OperationalError: If a raw query is not valid FTS5 syntax
+        """
+        match = query if raw else match_query(query)
+        if not match:
+            return []
+        # bm25() is called directly: going through the rank column costs twice as much
+        sql = ("SELECT rowid, bm25(question_text, ?, ?) AS score, "
+               "snippet(question_text, -1, ?, ?, ' … ', ?) "
+               "FROM question_text WHERE question_text MATCH ?")
+        params: list = [STEM_WEIGHT, OPTIONS_WEIGHT, HIGHLIGHT[0], HIGHLIGHT[1], SNIPPET_TOKENS, match]
+        if exam:
+            sql += " AND exam = ?"
+            params.append(exam.lower())
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        hits = []
+        for rowid, score, snippet in self.conn.execute(sql, params).fetchall():
+            exam_name, path, number, topic, answer = self.conn.execute(
+                "SELECT f.exam, f.path, q.number, q.topic, q.answer FROM questions q "
+                "JOIN files f ON f.id = q.file_id WHERE q.id = ?", (rowid,)).fetchone()
+            hits.append({"exam": exam_name, "file": path, "number": number, "topic": topic,
+                         "answer": answer, "score": round(-score, 3),
+                         "snippet": ' '.join(snippet.split())})
+        return hits
+
+    def totals(self) -> Dict[str, int]:
+        """Count indexed files and questions."""
+        return {"files": self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+                "questions": self.conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]}
+
+    def optimize(self) -> None:
+        """Merge the FTS5 segments into one for the fastest queries."""
+        self.conn.execute("INSERT INTO question_text (question_text) VALUES ('optimize')")
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Undo every change made inside the block if it raises."""
+        # Releasing an outermost savepoint would commit, so nest it in a transaction
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        self.conn.execute("SAVEPOINT file")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK TO file")
+            raise
+        finally:
+            self.conn.execute("RELEASE file")
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def build_index(inputs: List[Path], index: SearchIndex) -> Tuple[int, int]:
+    """
+    Bring the index up to date with cleaned files and folders.
+
+    Args:
+        inputs: Cleaned .md files or folders (raw dumps are read as such)
+        index: Open SearchIndex
+
+    Returns:
+        Tuple of (success_count, total_count)
+
+    Notes:
+        - Unchanged files are skipped by content hash
+        - Indexed files under a folder input that no longer exist are dropped
+    """
+    files: List[Path] = []
+    for path in inputs:
+        if path.is_dir():
+            found = sorted(path.rglob("*.md"))
+            files.extend(found)
+            live = {file_key(f) for f in found}
+            root = file_key(path)
+            prefix = root.rstrip('/') + '/'
+            for key, file_id in index.indexed_files(prefix).items():
+                if key not in live:
+                    index.drop_file(file_id)
+                    logger.info(f"✓ {key}: removed, dropped from the index")
+        elif path.is_file():
+            files.append(path)
+        else:
+            logger.error(f"Input path does not exist: {path}")
+
+    success_count = 0
+    for path in files:
+        try:
+            key = file_key(path)
+            digest = file_sha256(path)
+            state = index.file_state(key)
+            if state and state[1] == digest:
+                logger.debug(f"✓ {key}: unchanged, already indexed")
+            else:
+                questions = parse_input(path.read_text(encoding='utf-8'))
+                if not questions:
+                    logger.warning(f"{key}: no questions found (expected \"## question N\" "
+                                   f"or raw dump headers)")
+                with index.savepoint():
+                    if state:
+                        index.drop_file(state[0])
+                    count = index.add_file(key, exam_key(path), digest, questions)
+                logger.info(f"✓ {key}: {count} question(s) {'re-' if state else ''}indexed")
+            success_count += 1
+        except Exception as e:
+            logger.error(f"Error processing {path}: {e}")
+    index.commit()
+    return success_count, len(files)
+
+
+def format_hits(hits: List[Dict]) -> str:
+    """Render search hits as plain text, one numbered block per hit."""
+    lines = []
+    for i, hit in enumerate(hits, 1):
+        number = f"question {hit['number']}" if hit["number"] is not None else "question"
+        topic = f" (topic {hit['topic']})" if hit["topic"] is not None else ""
+        answer = f"  answer: {hit['answer']}" if hit["answer"] else ""
+        lines.append(f"{i:>3}. {hit['exam']} {number}{topic}  score {hit['score']:.2f}{answer}")
+        lines.append(f"     {hit['snippet']}")
+        lines.append(f"     {hit['file']}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(
+        description="Build and query a full-text index of cleaned ExamTopics questions.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Index (or update the index of) a cleaned corpus:
+    %(prog)s build data/silver/ --index data/search.sqlite
+
+  Search every exam, or one exam:
+    %(prog)s query "geo-redundant storage" --index data/search.sqlite
+    %(prog)s query "snapshot*" --exam az-104 --limit 5 --json
+
+  FTS5 syntax (phrases, OR, NEAR, column filters):
+    %(prog)s query --raw '"soft delete" OR stem:versioning'
+        """
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="index cleaned .md files and folders")
+    build.add_argument("inputs", type=Path, nargs="+", help="cleaned .md files or folders")
+    build.add_argument("--optimize", action="store_true",
+                       help="merge index segments afterwards for the fastest queries")
+
+    query = sub.add_parser("query", help="search the index")
+    query.add_argument("text", help="words to search for; end a word with * for prefix search")
+    query.add_argument("--exam", help="only search this exam, e.g. az-104")
+    query.add_argument("-n", "--limit", type=int, default=10, help="maximum hits (default: %(default)s)")
+    query.add_argument("--raw", action="store_true", help="pass the query to FTS5 unchanged")
+    query.add_argument("--json", action="store_true", help="print hits as JSON")
+
+    for sp in (build, query):
+        sp.add_argument("--index", default=DEFAULT_INDEX,
+                        help="SQLite search index (default: %(default)s)")
+        sp.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "query" and not Path(args.index).exists():
+        logger.error(f"Index not found: {args.index} (run the build command first)")
+        return 1
+    try:
+        if args.command == "build":
+            Path(args.index).parent.mkdir(parents=True, exist_ok=True)
+        index = SearchIndex(args.index)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Cannot open index {args.index}: {e}")
+        return 1
+
+    try:
+        if args.command == "build":
+            start = time.perf_counter()
+            success_count, total_count = build_index(args.inputs, index)
+            if args.optimize:
+                index.optimize()
+                index.commit()
+            totals = index.totals()
+            logger.info(f"Index holds {totals['questions']} question(s) from {totals['files']} "
+                        f"file(s); updated in {time.perf_counter() - start:.1f}s")
+            return 0 if total_count and success_count == total_count else 1
+
+        start = time.perf_counter()
+        try:
+            hits = index.search(args.text, args.limit, args.exam, args.raw)
+        except sqlite3.OperationalError as e:
+            logger.error(f"Invalid query: {e}")
+            return 1
+        elapsed = (time.perf_counter() - start) * 1000
+        if args.json:
+            print(json.dumps(hits, indent=2, ensure_ascii=False))
+        else:
+            if hits:
+                print(format_hits(hits))
+            print(f"{len(hits)} hit(s) in {elapsed:.1f} ms")
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
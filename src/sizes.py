@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Human-readable byte sizes for command-line options.
+
+Shared by the tools and benchmarks that take sizes such as --memory-budget,
+--chunk-size or --size, so they all accept the same "16M" / "2G" syntax.
+
+Usage:
+    from sizes import parse_size
+    p.add_argument("--memory-budget", type=parse_size, metavar="SIZE")
+"""
+
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a human-readable size such as "16M" or "2G" into bytes.
+
+    Args:
+        text: Size with optional K/M/G suffix
+
+    Returns:
+        Size in bytes
+    """
+    text = text.strip().upper()
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
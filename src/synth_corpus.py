@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic ExamTopics corpus generator.
+
+Writes raw dumps in the exact layout internal/utils/files.go WriteData emits:
+document title, "## <title>" headers, the "Actual exam question from" block
+with "Question #" and "Topic #" lines, question text with a suggested answer,
+lettered options, **Answer:**, **Timestamp:**, the view link, optional
+comments and the dashed separator. Output is seeded and written question by
+question, so it scales from 100 to 1,000,000+ questions in constant memory.
+
+Usage:
+    python src/synth_corpus.py out.md --questions 100000
+    python src/synth_corpus.py out.md --questions 5000 --comments 25 --seed 7
+    python src/synth_corpus.py out.md --size 512M
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sizes import parse_size
+
+SEPARATOR = "----------------------------------------"
+
+MONTHS = ["Jan.", "Feb.", "March", "April", "May", "June", "July", "Aug.",
+          "Sept.", "Oct.", "Nov.", "Dec."]
+
+WORDS = ("azure aws gcp virtual machine storage account network subnet policy role "
+         "backup snapshot replica region zone cluster container kubernetes pipeline "
+         "deployment monitoring alert metric log query database table index cache "
+         "function queue topic event identity tenant subscription resource group "
+         "encryption key vault certificate gateway firewall endpoint latency cost").split()
+
+STEMS = [
+    "You have an environment that contains {n} {a} resources. You need to ensure that the {b} "
+    "can be restored after an outage while minimizing {c} costs. What should you do?",
+    "Your company plans to migrate a {a} workload to the cloud. The solution must support {b} "
+    "and {c}. Which service should you recommend?",
+    "A team reports intermittent {a} failures in production. You need to identify the {b} that "
+    "causes the issue with the least administrative effort. What should you configure first?",
+    "You are designing a {a} solution for {n} users. The solution must meet the following "
+    "requirements: support {b}, enforce {c} and minimize latency. Which two actions should you "
+    "perform? (Choose two.)",
+]
+
+COMMENTS = [
+    "Selected Answer: {x} I passed the exam today, this question was on it. {x} is correct.",
+    "Answer is {x}. The documentation clearly states that {a} requires {b}.",
+    "Why not {y}? {y} also supports {a} but the cost is higher.",
+    "{x} is right, tested it in the lab with {n} {a} instances.",
+]
+
+
+class Exam:
+    """Identity of a synthetic exam, as it appears in WriteData headers and links."""
+
+    __slots__ = ('vendor', 'provider', 'code', 'slug')
+
+    def __init__(self, vendor: str, provider: str, code: str, slug: Optional[str] = None):
+        self.vendor = vendor
+        self.provider = provider
+        self.code = code
+        self.slug = slug or code.lower().replace(' ', '-')
+
+
+DEFAULT_EXAMS = [
+    Exam("Microsoft", "microsoft", "AZ-104"),
+    Exam("Amazon", "amazon", "AWS Certified Solutions Architect - Associate SAA-C03",
+         "aws-certified-solutions-architect-associate-saa-c03"),
+    Exam("Google", "google", "Professional Cloud DevOps Engineer"),
+]
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def _timestamp(rng: random.Random) -> str:
+    hour = rng.randint(1, 12)
+    return (f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2019, 2025)}, "
+            f"{hour}:{rng.randint(0, 59):02d} {rng.choice(['a.m.', 'p.m.'])}")
+
+
+def question_data(rng: random.Random, exam: Exam, num: int, topic: int,
+                  comments: int) -> Dict[str, object]:
+    """
+    Generate one question as the fields of the Go models.QuestionData struct.
+
+    Args:
+        rng: Seeded random generator
+        exam: Exam the question belongs to
+        num: Question number within its topic
+        topic: Topic number
+        comments: Number of discussion comments (0 for none)
+
+    Returns:
+        Dict with the QuestionData field names (Title, Header, Content,
+        Questions, Answer, Timestamp, QuestionLink, Comments), as
+        encoding/json would export the struct
+    """
+    n_options = rng.choice((4, 4, 4, 5, 6))
+    letters = "ABCDEF"[:n_options]
+    multi = rng.random() < 0.2
+    answer = ''.join(sorted(rng.sample(letters, 2))) if multi else rng.choice(letters)
+    # The community answer disagrees with the suggested one now and then
+    suggested = answer if rng.random() < 0.85 else rng.choice(letters)
+
+    title = f"Exam {exam.code} topic {topic} question {num} discussion"
+    header = (f"Actual exam question from\n\n{exam.vendor}'s\n{exam.code}\n\n"
+              f"Question #: {num}\nTopic #: {topic}\n\n[All {exam.code} Questions]")
+    stem = rng.choice(STEMS).format(n=rng.randint(2, 500), a=_words(rng, 2),
+                                    b=_words(rng, 3), c=_words(rng, 2))
+    content = f"{stem} \nSuggested Answer: {suggested} 🗳️ "
+    options = [f"{letter}. {_words(rng, rng.randint(6, 18)).capitalize()}." for letter in letters]
+    link_id = rng.randint(10000, 999999)
+    link = (f"https://www.examtopics.com/discussions/{exam.provider}/view/"
+            f"{link_id}-exam-{exam.slug}-topic-{topic}-question-{num}-discussion/")
+    timestamp = _timestamp(rng)
+    text = ''
+    if comments:
+        other = rng.choice(letters)
+        text = ' '.join(
+            f"[user{rng.randint(1, 99999)}] " + rng.choice(COMMENTS).format(
+                x=answer, y=other, a=_words(rng, 2), b=_words(rng, 3), n=rng.randint(2, 50))
+            for _ in range(comments))
+    return {"Title": title, "Header": header, "Content": content, "Questions": options,
+            "Answer": answer, "Timestamp": timestamp, "QuestionLink": link, "Comments": text}
+
+
+def render_question(rng: random.Random, exam: Exam, num: int, topic: int,
+                    comments: int) -> str:
+    """
+    Render one question exactly as WriteData writes a QuestionData entry.
+
+    Args:
+        rng: Seeded random generator
+        exam: Exam the question belongs to
+        num: Question number within its topic
+        topic: Topic number
+        comments: Number of discussion comments to append (0 for none)
+
+    Returns:
+        Markdown text for the question, ending with the separator block
+    """
+    return write_data_section(question_data(rng, exam, num, topic, comments), bool(comments))
+
+
+def write_data_section(data: Dict[str, object], comments: bool) -> str:
+    """Render QuestionData fields as WriteData does (with -c when comments is True)."""
+    parts = [f"## {data['Title']}\n\n", f"{data['Header']}\n\n"]
+    if data['Content']:
+        parts.append(f"{data['Content']}\n\n")
+    parts.extend(f"{opt}\n\n" for opt in data['Questions'])
+    parts.append(f"**Answer: {data['Answer']}**\n\n")
+    parts.append(f"**Timestamp: {data['Timestamp']}**\n\n")
+    parts.append(f"[View on ExamTopics]({data['QuestionLink']})\n\n")
+    if comments:
+        parts.append(f"Comments: {data['Comments']}\n")
+    parts.append(f"{SEPARATOR}\n\n")
+    return ''.join(parts)
+
+
+def iter_question_data(questions: Optional[int] = None, seed: int = 0, comments: int = 0,
+                       exams: Optional[List[Exam]] = None, topics: int = 3) -> Iterator[Dict[str, object]]:
+    """
+    Yield the questions of a dump as QuestionData fields (see iter_dump for the arguments).
+
+    With the same arguments, the records hold exactly the questions iter_dump
+    writes as markdown, so a JSON export and a markdown dump can be compared.
+    """
+    rng = random.Random(seed)
+    exams = exams or DEFAULT_EXAMS[:1]
+    i = 0
+    while questions is None or i < questions:
+        exam = exams[i % len(exams)]
+        per_exam = i // len(exams)
+        yield question_data(rng, exam, per_exam // topics + 1, per_exam % topics + 1, comments)
+        i += 1
+
+
+def iter_dump(questions: Optional[int] = None, target_bytes: Optional[int] = None,
+              seed: int = 0, comments: int = 0, exams: Optional[List[Exam]] = None,
+              topics: int = 3) -> Iterator[str]:
+    """
+    Yield a raw dump chunk by chunk: the document title, then one question at a time.
+
+    Args:
+        questions: Number of questions to generate
+        target_bytes: Alternatively, stop once roughly this many bytes were produced
+        seed: Random seed; the same arguments always produce the same dump
+        comments: Comments per question (0 writes no Comments line, like WriteData without -c)
+        exams: Exams to cycle through; defaults to DEFAULT_EXAMS[:1]
+        topics: Number of topics per exam
+
+    Yields:
+        Markdown text chunks
+    """
+    if questions is None and target_bytes is None:
+        raise ValueError("either questions or target_bytes is required")
+    head = "# Exam Topics Questions\n\n@thatonecodes\n\n"
+    written = len(head)
+    yield head
+
+    for data in iter_question_data(questions, seed, comments, exams, topics):
+        if target_bytes is not None and written >= target_bytes:
+            break
+        chunk = write_data_section(data, bool(comments))
+        written += len(chunk.encode('utf-8'))
+        yield chunk
+
+
+def write_dump(path: Path, questions: Optional[int] = None, target_bytes: Optional[int] = None,
+               seed: int = 0, comments: int = 0, exams: Optional[List[Exam]] = None) -> int:
+    """
+    Write a synthetic raw dump to path.
+
+    Args:
+        path: Output .md file
+        questions: Number of questions to generate
+        target_bytes: Alternatively, approximate file size to reach
+        seed: Random seed
+        comments: Comments per question
+        exams: Exams to cycle through
+
+    Returns:
+        Number of questions written
+    """
+    count = -1
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        for chunk in iter_dump(questions, target_bytes, seed, comments, exams):
+            fh.write(chunk)
+            count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Generate a synthetic ExamTopics raw dump.")
+    p.add_argument("output", type=Path, help="output .md file")
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument("--questions", type=int, help="number of questions (100 to 1,000,000+)")
+    g.add_argument("--size", help="approximate file size instead, e.g. 64M or 2G")
+    p.add_argument("--comments", type=int, default=0,
+                   help="comments per question, as with the downloader's -c flag (default: 0)")
+    p.add_argument("--exams", type=int, default=1,
+                   help=f"number of exams to interleave (1-{len(DEFAULT_EXAMS)}, default: 1)")
+    p.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = p.parse_args(argv)
+
+    target = parse_size(args.size) if args.size else None
+    count = write_dump(args.output, args.questions, target, args.seed, args.comments,
+                       DEFAULT_EXAMS[:max(1, args.exams)])
+    print(f"✓ Wrote {count} question(s) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
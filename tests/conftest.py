@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""Shared pytest setup: the tools in src/ are flat scripts that import each other directly."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
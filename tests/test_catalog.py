@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Tests for catalog.py."""
+import csv
+import logging
+import shutil
+from pathlib import Path
+
+import pytest
+
+import catalog
+
+INPUT = Path(__file__).resolve().parent.parent / "input"
+
+
+def read_rows(path):
+    with open(path, newline='', encoding="utf-8-sig") as fh:
+        return list(csv.reader(fh))
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    """A copy of input/ in tmp_path, built once into db.sqlite and out/."""
+    monkeypatch.chdir(tmp_path)
+    shutil.copytree(INPUT, tmp_path / "input")
+    assert build() == 0
+    return tmp_path
+
+
+def build(*extra):
+    return catalog.main(["--db", "db.sqlite", "build", "input", "--out", "out", *extra])
+
+
+def snapshot(out):
+    return {p.name: p.stat().st_mtime_ns for p in out.iterdir()}
+
+
+def test_certification_csv_is_reproduced(sources):
+    assert read_rows(sources / "out" / "microsoft_cert.csv") == read_rows(INPUT / "microsoft_cert.csv")
+    providers = {catalog.source_kind(p)[1] for p in INPUT.iterdir()}
+    assert {p.name for p in (sources / "out").iterdir()} == {f"{p}_cert.csv" for p in providers}
+
+
+def test_exam_list_codes_and_links(sources):
+    rows = read_rows(sources / "out" / "google_cert.csv")
+    assert rows[0] == list(catalog.CSV_HEADER)
+    (row,) = [r for r in rows if r[3] == "professional-cloud-devops-engineer"]
+    assert row[0] == "Google"
+    assert row[4] == "https://www.examtopics.com/exams/google/professional-cloud-devops-engineer/"
+
+
+def test_unchanged_rerun_writes_nothing(sources, caplog):
+    before = snapshot(sources / "out")
+    caplog.set_level(logging.INFO)
+    assert build() == 0
+    assert snapshot(sources / "out") == before
+    assert "0 CSV file(s) written" in caplog.text
+
+
+def test_edited_list_rewrites_only_its_provider(sources):
+    before = snapshot(sources / "out")
+    with open(sources / "input" / "google_exams.txt", 'a', encoding="utf-8") as fh:
+        fh.write("\nnew-google-exam:NGE-1\n")
+    assert build() == 0
+
+    after = snapshot(sources / "out")
+    assert {name for name in after if after[name] != before[name]} == {"google_cert.csv"}
+    assert read_rows(sources / "out" / "google_cert.csv")[-1] == [
+        "Google", "Google NGE-1", "NGE-1", "new-google-exam",
+        "https://www.examtopics.com/exams/google/new-google-exam/"]
+
+
+def test_deleted_list_removes_only_its_provider(sources):
+    before = snapshot(sources / "out")
+    (sources / "input" / "nvidia_exams.txt").unlink()
+    assert build() == 0
+
+    after = snapshot(sources / "out")
+    assert set(before) - set(after) == {"nvidia_cert.csv"}
+    assert after == {name: mtime for name, mtime in before.items() if name != "nvidia_cert.csv"}
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Tests for classify_links.py."""
+import random
+from pathlib import Path
+
+import classify_links
+from classify_links import SlugMatcher, naive_match, tokens
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+INPUT = Path(__file__).resolve().parent.parent / "input"
+
+
+def link(slug, n=1):
+    return f"https://www.examtopics.com/discussions/microsoft/view/{n}-exam-{slug}-topic-1-question-{n}-discussion/"
+
+
+def test_slug_matches_whole_tokens_only():
+    matcher = SlugMatcher(["az-104", "az-1040"])
+    assert matcher.match(link("az-104")) == "az-104"
+    assert matcher.match(link("az-1040")) == "az-1040"
+    assert matcher.match(link("az-10400")) is None
+    assert SlugMatcher(["az-104"]).match(link("az-1040")) is None
+
+
+def test_longest_then_leftmost_slug_wins():
+    matcher = SlugMatcher(["terraform-associate", "terraform-associate-003", "aws", "az-104"])
+    assert matcher.match(link("terraform-associate-003")) == "terraform-associate-003"
+    assert matcher.match(link("terraform-associate-004")) == "terraform-associate"
+    # More tokens win wherever they are; among equal lengths the leftmost does
+    assert matcher.match("https://x/aws-vs-az-104-question-1/") == "az-104"
+    assert matcher.match("https://x/az-104-vs-aws-question-1/") == "az-104"
+    assert SlugMatcher(["aws", "gcp"]).match("https://x/gcp-then-aws/") == "gcp"
+    assert SlugMatcher(["aws", "gcp"]).match("https://x/aws-then-gcp/") == "aws"
+
+
+def test_slugs_with_the_same_tokens_share_the_first():
+    assert SlugMatcher(["az-104", "AZ_104"]).match(link("az-104")) == "az-104"
+    assert SlugMatcher(["", "--"]).match(link("az-104")) is None
+
+
+def test_match_agrees_with_naive_match():
+    rng = random.Random(11)
+    words = ["az", "aws", "sap", "104", "1040", "c02", "associate", "003", "pro"]
+    # Short slugs over few tokens, so links hold overlapping and nested matches
+    slugs = list(dict.fromkeys("-".join(rng.choices(words, k=rng.randint(1, 3))) for _ in range(60)))
+    matcher = SlugMatcher(slugs)
+    slug_tokens = [(tokens(slug), slug) for slug in slugs]
+    for _ in range(3000):
+        url = "https://x/" + "-".join(rng.choices(words + ["exam", "q"], k=rng.randint(0, 8)))
+        assert matcher.match(url) == naive_match(url, slug_tokens), url
+
+
+def test_duplicates_are_written_once():
+    lines = [link("az-104", 1), link("az-1040", 2), "", link("az-104", 1), link("zz-9", 3),
+             f"  {link('az-1040', 2)}  \n"]
+    buckets, unmatched, duplicates = classify_links.classify(lines, SlugMatcher(["az-104", "az-1040"]))
+    assert buckets == {"az-104": [link("az-104", 1)], "az-1040": [link("az-1040", 2)]}
+    assert (unmatched, duplicates) == ([link("zz-9", 3)], 2)
+
+
+def test_writes_code_link_files(tmp_path):
+    out = tmp_path / "links"
+    args = [str(EXAMPLES / "google_devops_links.txt"), str(INPUT / "google_exams.txt"),
+            "--links-dir", str(out), "--unmatched", str(tmp_path / "unmatched.txt")]
+    assert classify_links.main(args) == 0
+
+    assert [p.name for p in out.iterdir()] == ["professional-cloud-devops-engineer-link.txt"]
+    source = [line.strip() for line in
+              (EXAMPLES / "google_devops_links.txt").read_text(encoding="utf-8").splitlines()]
+    written = (out / "professional-cloud-devops-engineer-link.txt").read_text(encoding="utf-8")
+    assert written.splitlines() == list(dict.fromkeys(line for line in source if line))
+    assert written.endswith("\n")
+    assert (tmp_path / "unmatched.txt").read_text(encoding="utf-8") == ""
+
+    # An unchanged re-run leaves the file alone
+    mtime = (out / "professional-cloud-devops-engineer-link.txt").stat().st_mtime_ns
+    assert classify_links.main(args) == 0
+    assert (out / "professional-cloud-devops-engineer-link.txt").stat().st_mtime_ns == mtime
+
+
+def test_code_from_exam_list_names_the_file(tmp_path):
+    (tmp_path / "microsoft_exams.txt").write_text("az-104:AZ-104\naz-1040\n", encoding="utf-8")
+    (tmp_path / "links.txt").write_text(f"{link('az-1040', 2)}\n{link('az-104', 1)}\n", encoding="utf-8")
+    assert classify_links.main([str(tmp_path / "links.txt"), str(tmp_path / "microsoft_exams.txt"),
+                                "--links-dir", str(tmp_path / "out")]) == 0
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["AZ-104-link.txt", "az-1040-link.txt"]
+    assert (tmp_path / "out" / "AZ-104-link.txt").read_text(encoding="utf-8") == f"{link('az-104', 1)}\n"
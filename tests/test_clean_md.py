@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Tests for clean_md.py: every engine must write what the buffered one writes."""
+import pytest
+
+import clean_md
+from synth_corpus import DEFAULT_EXAMS, write_dump
+
+
+@pytest.fixture
+def raw(tmp_path):
+    """A dump with comments and repeated question numbers (one per topic), in number order."""
+    path = tmp_path / "raw.md"
+    write_dump(path, questions=90, comments=3, seed=11)
+    return path
+
+
+def clean(raw, out, remove_topic=False, **options):
+    assert clean_md.process_single_file(raw, out, remove_topic, **options)
+    return out.read_bytes()
+
+
+@pytest.mark.parametrize("remove_topic", [False, True])
+def test_stream_matches_buffered(tmp_path, raw, remove_topic):
+    buffered = clean(raw, tmp_path / "buffered.md", remove_topic)
+    assert clean(raw, tmp_path / "stream.md", remove_topic, stream=True) == buffered
+
+
+def test_stream_preamble_only(tmp_path):
+    raw = tmp_path / "raw.md"
+    raw.write_text("# Exam Topics Questions\n\n@thatonecodes\n\n", encoding="utf-8")
+    buffered = clean(raw, tmp_path / "buffered.md")
+    assert clean(raw, tmp_path / "stream.md", stream=True) == buffered
+
+
+@pytest.mark.parametrize("memory_budget", [1, 4096, None])
+def test_external_sort_by_number_matches_buffered(tmp_path, raw, memory_budget):
+    buffered = clean(raw, tmp_path / "buffered.md")
+    sorted_ = clean(raw, tmp_path / "sorted.md", sort_by="number",
+                    memory_budget=memory_budget or clean_md.DEFAULT_MEMORY_BUDGET)
+    assert sorted_ == buffered
+
+
+@pytest.mark.parametrize("memory_budget", [1, 4096, clean_md.DEFAULT_MEMORY_BUDGET])
+def test_external_sort_by_exam(tmp_path, memory_budget):
+    raw = tmp_path / "raw.md"
+    write_dump(raw, questions=90, comments=3, seed=11, exams=DEFAULT_EXAMS)
+    text = raw.read_text(encoding="utf-8")
+    # Expected: the buffered blocks, stably sorted by (exam, topic, question)
+    sections = list(clean_md.iter_raw_sections(text))
+    keyed = [(clean_md.title_key(text[start:text.index('\n', start)], qnum),
+              clean_md.clean_raw_section(text, qnum, start, end, False))
+             for qnum, start, end in sections]
+    keyed.sort(key=lambda item: item[0])
+    preamble = text[:sections[0][1]].rstrip()
+    expected = preamble + "\n\n" + "\n\n".join(block for _, block in keyed) + "\n"
+
+    out = clean(raw, tmp_path / "sorted.md", sort_by="exam", memory_budget=memory_budget)
+    assert out.decode("utf-8") == expected
+    assert len({key[0] for key, _ in keyed}) == len(DEFAULT_EXAMS)
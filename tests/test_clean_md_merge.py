@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Tests for clean_md.py --merge: a merge must give the same file as a full clean."""
+import json
+import random
+
+import pytest
+
+import clean_md
+from synth_corpus import iter_dump
+
+
+@pytest.fixture(scope="module")
+def dump():
+    """(preamble, raw sections in question-number order) of a small synthetic dump."""
+    # One topic, so question numbers are unique and the full clean's order is unambiguous
+    text = ''.join(iter_dump(questions=60, comments=2, seed=3, topics=1))
+    bounds = [(start, end) for _, start, end in clean_md.iter_raw_sections(text)]
+    return text[:bounds[0][0]], [text[start:end] for start, end in bounds]
+
+
+def write_raw(path, preamble, sections):
+    path.write_text(preamble + ''.join(sections), encoding="utf-8")
+    return path
+
+
+def merge(raw, silver):
+    assert clean_md.merge_single_file(raw, silver, False)
+
+
+def assert_clean_equal(tmp_path, silver, raw):
+    """silver must equal a full clean of raw, and its sidecar must describe it."""
+    expect = tmp_path / "expect.md"
+    assert clean_md.process_single_file(raw, expect, False)
+    assert silver.read_bytes() == expect.read_bytes()
+    index = json.loads(clean_md.merge_index_path(silver).read_text(encoding="utf-8"))
+    data = silver.read_bytes()
+    assert [s[:4] for s in index["sections"]] == [s[:4] for s in clean_md.scan_silver(data)]
+    assert index["size"] == len(data)
+
+
+def test_append(tmp_path, dump):
+    preamble, sections = dump
+    silver = tmp_path / "silver.md"
+    merge(write_raw(tmp_path / "a.md", preamble, sections[:45]), silver)
+    full = write_raw(tmp_path / "b.md", preamble, sections)
+    merge(full, silver)
+    assert_clean_equal(tmp_path, silver, full)
+
+
+def test_change_and_insert_in_any_order(tmp_path, dump):
+    preamble, sections = dump
+    rng = random.Random(0)
+    silver = tmp_path / "silver.md"
+    merge(write_raw(tmp_path / "a.md", preamble, sections[::2]), silver)
+
+    changed = list(sections)
+    for i in rng.sample(range(0, len(sections), 2), 5):
+        changed[i] = changed[i].replace('\n\n', '\n\nEdited line.\n\n', 1)
+    rng.shuffle(changed)
+    full = write_raw(tmp_path / "b.md", preamble, changed)
+    merge(full, silver)
+    assert_clean_equal(tmp_path, silver, full)
+
+
+def test_keep_questions_missing_from_the_dump(tmp_path, dump):
+    preamble, sections = dump
+    silver = tmp_path / "silver.md"
+    full = write_raw(tmp_path / "a.md", preamble, sections)
+    merge(full, silver)
+    merge(write_raw(tmp_path / "b.md", preamble, sections[10:20]), silver)
+    assert_clean_equal(tmp_path, silver, full)
+
+
+def test_unchanged_dump_does_not_rewrite(tmp_path, dump):
+    preamble, sections = dump
+    silver = tmp_path / "silver.md"
+    full = write_raw(tmp_path / "a.md", preamble, sections)
+    merge(full, silver)
+    mtime = silver.stat().st_mtime_ns
+    merge(full, silver)
+    assert silver.stat().st_mtime_ns == mtime
+
+
+def test_stale_sidecar_is_rescanned(tmp_path, dump):
+    preamble, sections = dump
+    silver = tmp_path / "silver.md"
+    full = write_raw(tmp_path / "a.md", preamble, sections)
+    merge(full, silver)
+    data = silver.read_bytes()
+    at = data.index(b'## question 5\n')
+    silver.write_bytes(data[:at] + data[at:].replace(b'\n\n', b'\n\nHand edit.\n\n', 3))
+    merge(full, silver)
+    assert_clean_equal(tmp_path, silver, full)
+
+
+@pytest.mark.parametrize("existing", ["", "# Exam Topics Questions\n\n@thatonecodes\n"])
+def test_merge_into_silver_without_questions(tmp_path, dump, existing):
+    preamble, sections = dump
+    silver = tmp_path / "silver.md"
+    silver.write_text(existing, encoding="utf-8")
+    full = write_raw(tmp_path / "a.md", existing, sections)
+    merge(full, silver)
+    assert_clean_equal(tmp_path, silver, full)
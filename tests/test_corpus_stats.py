@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Tests for corpus_stats.py."""
+import csv
+import json
+
+import pytest
+
+import corpus_stats
+import export_questions
+from synth_corpus import DEFAULT_EXAMS, write_data_section, write_dump
+
+pytest.importorskip("numpy")
+
+
+def test_mixed_exam_dump_is_counted_per_exam(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_dump(tmp_path / "multi.md", questions=30, exams=DEFAULT_EXAMS)
+    assert export_questions.main(["multi.md", "--db", "q.sqlite"]) == 0
+
+    assert corpus_stats.main(["--db", "q.sqlite", "--now", "2025-01-01", "-o", "stats.json"]) == 0
+    report = json.loads((tmp_path / "stats.json").read_text(encoding="utf-8"))
+    by_exam = {row["exam"]: row for row in report["exams"]}
+    assert set(by_exam) == {exam.code.lower() for exam in DEFAULT_EXAMS}
+    for row in by_exam.values():
+        # 10 questions per exam, numbered from 1 in each of 3 topics
+        assert (row["questions"], row["topics"], row["missing"], row["duplicates"]) == (10, 3, 0, 0)
+    assert report["totals"]["questions"] == 30
+
+
+# (suggested, answer, timestamp) of each question of the fixture dump
+ANSWERS = [
+    ("CD", "C", "Dec. 1, 2024, 1:00 p.m."),       # disagree; under a year old on 2025-01-01
+    ("B", "B", "June 1, 2023, 9:15 a.m."),        # agree; 1-2 years
+    ("AB", "AB", "Jan. 5, 2019, noon"),           # agree with two letters; over 5 years
+    ("D", "A", "soon"),                           # disagree; no date
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Export a dump of the ANSWERS questions to q.sqlite in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    with open(tmp_path / "az-104.md", 'w', encoding='utf-8') as fh:
+        fh.write("# Exam Topics Questions\n\n@thatonecodes\n\n")
+        for num, (suggested, answer, timestamp) in enumerate(ANSWERS, 1):
+            fh.write(write_data_section({
+                "Title": f"Exam AZ-104 topic 1 question {num} discussion",
+                "Header": "Actual exam question from\n\nMicrosoft's\nAZ-104\n\n"
+                          f"Question #: {num}\nTopic #: 1\n\n[All AZ-104 Questions]",
+                "Content": f"Which option is number {num}? \nSuggested Answer: {suggested} 🗳️ ",
+                "Questions": ["A. One.", "B. Two.", "C. Three.", "D. Four."],
+                "Answer": answer, "Timestamp": timestamp,
+                "QuestionLink": f"https://example.com/q{num}"}, False))
+    assert export_questions.main(["az-104.md", "--db", "q.sqlite"]) == 0
+    return tmp_path
+
+
+def check_report(tmp_path, source):
+    assert corpus_stats.main([*source, "--now", "2025-01-01", "-o", "stats.json",
+                              "--mismatches", "mismatches.csv"]) == 0
+    report = json.loads((tmp_path / "stats.json").read_text(encoding="utf-8"))
+    (row,) = report["exams"]
+    assert (row["exam"], row["questions"], row["compared"], row["mismatches"]) == ("az-104", 4, 4, 2)
+    assert row["mismatch_rate"] == report["totals"]["mismatch_rate"] == 0.5
+    assert (row["answered"], row["multi_answer"], row["multi_answer_ratio"]) == (4, 1, 0.25)
+    assert row["age"] == {"<1y": 1, "1-2y": 1, "2-3y": 0, "3-5y": 0, "5y+": 1, "unknown": 1}
+    assert (row["oldest"], row["newest"]) == ("2019-01-05", "2024-12-01")
+
+    with open(tmp_path / "mismatches.csv", newline='', encoding="utf-8") as fh:
+        rows = list(csv.reader(fh))
+    assert rows == [list(corpus_stats.MISMATCH_FIELDS),
+                    ["az-104", "1", "1", "CD", "C", "https://example.com/q1"],
+                    ["az-104", "1", "4", "D", "A", "https://example.com/q4"]]
+
+
+def test_answers_and_ages_from_sqlite(store):
+    check_report(store, ["--db", "q.sqlite"])
+
+
+def test_answers_and_ages_from_parquet(store):
+    pytest.importorskip("pyarrow")
+    assert export_questions.main(["az-104.md", "--db", "q.sqlite", "--parquet", "q.parquet"]) == 0
+    check_report(store, ["--parquet", "q.parquet"])
+
+
+def test_age_bins(store):
+    assert corpus_stats.main(["--db", "q.sqlite", "--now", "2025-01-01", "--bins", "4,2",
+                              "--format", "csv", "-o", "stats.csv"]) == 0
+    with open(store / "stats.csv", newline='', encoding="utf-8") as fh:
+        (row,) = csv.DictReader(fh)
+    ages = {k: v for k, v in row.items() if k.startswith("age ")}
+    assert ages == {"age <2y": "2", "age 2-4y": "0", "age 4y+": "1", "age unknown": "1"}
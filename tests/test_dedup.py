@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Tests for dedup.py."""
+import subprocess
+import sys
+from pathlib import Path
+
+import clean_md
+import dedup
+from synth_corpus import write_dump
+
+
+def test_raw_dump_matches_its_cleaned_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_dump(tmp_path / "raw.md", questions=20, seed=5)
+    assert clean_md.process_single_file(tmp_path / "raw.md", tmp_path / "silver.md", False)
+
+    raw = dedup.parse_input((tmp_path / "raw.md").read_text(encoding="utf-8"))
+    silver = dedup.parse_input((tmp_path / "silver.md").read_text(encoding="utf-8"))
+    assert len(raw) == len(silver) == 20
+    # Cleaning sorts by question number, so compare regardless of order
+    assert (sorted(dedup.normalize_words(q) for q in raw)
+            == sorted(dedup.normalize_words(q) for q in silver))
+
+    index = dedup.DedupIndex(":memory:")
+    try:
+        assert dedup.run_dedup([tmp_path / "raw.md", tmp_path / "silver.md"], index) == (2, 2)
+        totals = index.totals()
+    finally:
+        index.close()
+    assert (totals["questions"], totals["exact"]) == (40, 20)
+
+
+def test_file_keys_do_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    write_dump(tmp_path / "rv" / "dd" / "a.md", questions=20, seed=5)
+    index = dedup.DedupIndex(":memory:")
+    try:
+        monkeypatch.chdir(tmp_path / "rv")
+        assert dedup.run_dedup([Path("dd/a.md")], index) == (1, 1)
+        monkeypatch.chdir(tmp_path)
+        assert dedup.run_dedup([Path("rv/dd/a.md")], index) == (1, 1)
+        assert (index.totals()["questions"], index.totals()["exact"]) == (20, 0)
+    finally:
+        index.close()
+
+
+def test_store_tools_do_not_import_the_cleaner():
+    # file_key lives in build_manifest, so these tools start without clean_md
+    code = ("import sys, catalog, search_index, practice_exam; "
+            "print(sorted({'clean_md', 'dedup'} & set(sys.modules)))")
+    src = Path(__file__).resolve().parent.parent / "src"
+    out = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Tests for export_questions.py."""
+import sqlite3
+
+import clean_md
+import export_questions
+from synth_corpus import DEFAULT_EXAMS, write_dump
+
+EXAM_KEYS = {exam.code.lower() for exam in DEFAULT_EXAMS}
+
+
+def exported(db):
+    conn = sqlite3.connect(str(db))
+    try:
+        return conn.execute("SELECT exam, topic, number FROM questions").fetchall()
+    finally:
+        conn.close()
+
+
+def test_raw_mixed_exam_dump_keeps_exams_apart(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_dump(tmp_path / "multi.md", questions=30, exams=DEFAULT_EXAMS)
+
+    assert export_questions.main(["multi.md", "--db", "q.sqlite"]) == 0
+    rows = exported(tmp_path / "q.sqlite")
+    assert len(rows) == 30
+    assert {exam for exam, _, _ in rows} == EXAM_KEYS
+    # Every exam numbers its questions from 1, so only the exam tells them apart
+    assert len(set(rows)) == 30
+
+
+def test_silver_mixed_exam_file_uses_discussion_header(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_dump(tmp_path / "raw.md", questions=30, exams=DEFAULT_EXAMS)
+    assert clean_md.process_single_file(tmp_path / "raw.md", tmp_path / "multi.md", False)
+
+    assert export_questions.main(["multi.md", "--db", "q.sqlite"]) == 0
+    rows = exported(tmp_path / "q.sqlite")
+    assert {exam for exam, _, _ in rows} == EXAM_KEYS
+    assert len(set(rows)) == 30
+
+
+def test_question_without_exam_falls_back_to_default():
+    text = "## question 1\nWhich option?\n\nA. one\n\nB. two\n\n**Answer: A**\n"
+    (q,) = export_questions.parse_questions(text, clean_md.HEADER_RE)
+    assert export_questions.question_row(q, "az-104")[0] == "az-104"
+
+
+def test_folder_pruning_from_another_directory(tmp_path, monkeypatch):
+    folder = tmp_path / "rv" / "silver"
+    write_dump(folder / "a.md", questions=6)
+    write_dump(folder / "b.md", questions=4)
+    db = str(tmp_path / "q.sqlite")
+    monkeypatch.chdir(tmp_path / "rv")
+    assert export_questions.main(["silver", "--db", db]) == 0
+
+    (folder / "a.md").unlink()
+    monkeypatch.chdir(tmp_path)
+    assert export_questions.main(["rv/silver", "--db", db]) == 0
+    assert len(exported(db)) == 4
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Tests for json_ingest.py."""
+import json
+
+import pytest
+
+import json_ingest
+import pipeline
+from synth_corpus import iter_question_data, write_data_section
+
+OUTPUTS = ["silver/az-104.md", "exam/az-104-exam.md", "answers/az-104-answers.md"]
+
+# QuestionData records at the edges of the direct path: removed and topic
+# lines, a cut and "**Answer:" inside fields, options over several lines or
+# without a space, question text that looks like an option, a discussion
+# header without its "[All ...]" line, multi-line answers, and records that
+# only look irregular (padded markers, a stem-less question, "S." options)
+EDGE_CASES = [
+    {"Title": "Exam X topic 1 question 3 discussion", "Header": "",
+     "Content": "Question 3\nTopic #: 2\nU.S. thing\n\nA. looks like an option\n**Answer: B** inline",
+     "Questions": ["A. a", "B.", "C.x"], "Answer": "A"},
+    {"Title": "topic 1 question 4", "Header": "Actual exam question from X's\n[All X Questions]",
+     "Content": "stem\r\nSuggested Answer: \nSuggested Answer: CD 🗳️",
+     "Questions": ["A. a\r", "B. b\n\nC. c"], "Answer": "C\nD"},
+    {"Title": "question 5", "Header": "Actual exam question from X's\n[All X Questions]",
+     "Content": "  Topic #: 3 \n**Timestamp: early\nafter", "Questions": ["A. a"], "Answer": "A"},
+    {"Title": "question 6", "Header": "Actual exam question from X's\n\n[All X Questions]\n",
+     "Content": "", "Questions": ["A.   ", "Question 5", "E. e"], "Answer": "E"},
+    {"Title": "question 7", "Header": "##question inside", "Questions": ["A. a"], "Answer": "A"},
+    {"Title": "question 8", "Header": "Actual exam question from X's",
+     "Content": "[All X Questions]\nstem", "Questions": [], "Answer": "A"},
+    {"Title": "question 9", "Header": "", "Content": "", "Questions": ["A. a", "B. b"], "Answer": "B"},
+    {"Title": "question 2", "Header": "Actual exam question from X's\n[All X Questions]",
+     "Content": " Topic #: 4\n  S\nSuggested Answer:B", "Questions": ["S. s", "T. t"], "Answer": "S"},
+    {"Title": "question 12", "Header": "  Actual exam question from X's\n[All   X Questions]  ",
+     "Content": "stem", "Questions": ["A. a", "B.\tb"], "Answer": "AB"},
+    {"Title": "question 13", "Header": "Actual exam question fromage\n[All X Questions]",
+     "Content": "stem", "Questions": ["A. a"], "Answer": "A"},
+]
+
+
+def write_exports(folder, records):
+    """Write records as the raw dump WriteData makes of them and as NDJSON."""
+    folder.mkdir(parents=True, exist_ok=True)
+    with open(folder / "az-104.md", 'w', encoding='utf-8') as md, \
+            open(folder / "az-104.ndjson", 'w', encoding='utf-8') as nd:
+        md.write("# Exam Topics Questions\n\n@thatonecodes\n\n")
+        for record in records:
+            data = {"Content": "", "Questions": [], "Timestamp": "2024-01-02 03:04:05",
+                    "QuestionLink": "https://example.com/q", **record}
+            md.write(write_data_section(data, False))
+            nd.write(json.dumps(data, ensure_ascii=False))
+            nd.write('\n')
+    return folder / "az-104.md", folder / "az-104.ndjson"
+
+
+def assert_same_outputs(tmp_path, records, remove_topic=False):
+    raw, export = write_exports(tmp_path / "in", records)
+    fused, direct = tmp_path / "fused", tmp_path / "direct"
+    pipeline.run_file(raw, fused / "silver" / raw.name, fused / "exam", fused / "answers", remove_topic)
+    counts = json_ingest.ingest_file(export, direct / "silver" / raw.name, direct / "exam",
+                                     direct / "answers", remove_topic)
+    assert counts["records"] == len(records)
+    for name in OUTPUTS:
+        assert (direct / name).read_bytes() == (fused / name).read_bytes(), name
+
+
+@pytest.mark.parametrize("remove_topic", [False, True])
+def test_outputs_match_markdown_path(tmp_path, remove_topic):
+    assert_same_outputs(tmp_path, list(iter_question_data(90, seed=4, comments=2)), remove_topic)
+
+
+@pytest.mark.parametrize("remove_topic", [False, True])
+def test_irregular_records_match_markdown_path(tmp_path, remove_topic):
+    records = list(iter_question_data(12, seed=5)) + EDGE_CASES
+    assert_same_outputs(tmp_path, records, remove_topic)
+
+
+@pytest.mark.parametrize("record", [
+    {"Title": "no number here", "Header": "joins the previous section"},
+    {"Title": "question 20", "Header": "", "Content": "## Question 21\nstarts another section"},
+])
+def test_section_breaks_fall_back_to_markdown_path(tmp_path, record):
+    records = list(iter_question_data(6, seed=6))
+    records.insert(3, {"Questions": ["A. a"], "Answer": "A", **record})
+    with pytest.raises(json_ingest.SectionBreak):
+        json_ingest.build_silver(iter(records), "az 104", False)
+    assert_same_outputs(tmp_path, records)
+
+
+def question_fields(q):
+    return (q.number, q.topic, q.suggested, q.answer, q.start, q.body_start, q.answer_start, q.end,
+            q.stem, q.exam, q.options, q.option_spans(), q.timestamp, q.link)
+
+
+def test_questions_match_parsed_questions():
+    records = (list(iter_question_data(30, seed=7)) + EDGE_CASES
+               + [{"question_text": "What?\n\nB. no", "choices": {"B": "y", "A": "x"},
+                   "answer": "B", "question_images": ["img.png"]},
+                  {"question_text": "Actual exam question from Z", "choices": {}, "answer": ""}])
+    silver, questions = json_ingest.build_silver(iter(records), "az 104", False)
+    expected_silver, expected = pipeline.clean_and_parse_lines(
+        json_ingest.iter_dump_lines(iter(records), "az 104"), False)
+    assert silver == expected_silver
+    assert [question_fields(q) for q in questions] == [question_fields(q) for q in expected]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Tests for pipeline.py."""
+import pytest
+
+import clean_md
+import pipeline
+from synth_corpus import write_dump
+
+
+def test_watch_survives_dump_deleted_while_processed(tmp_path, monkeypatch):
+    raw, silver, exam, answers = (tmp_path / name for name in ("raw", "silver", "exam", "answers"))
+    write_dump(raw / "az-104.md", questions=5)
+    run_file = pipeline.run_file
+
+    def run_and_delete(input_path, *args, **kwargs):
+        counts = run_file(input_path, *args, **kwargs)
+        input_path.unlink()  # the downloader rotated the dump
+        return counts
+
+    monkeypatch.setattr(pipeline, "run_file", run_and_delete)
+    assert pipeline.watch_pipeline(raw, silver, exam, answers, interval=0.01, settle=0,
+                                   idle_exit=0.2) == (1, 1)
+    assert (silver / "az-104.md").is_file()
+
+
+def run_chain(raw, out, html):
+    """The four scripts one after another, each reading the previous output."""
+    import dum_gen
+    import exam_gen
+    silver = out / "silver" / raw.name
+    assert clean_md.process_single_file(raw, silver, False)
+    exam_gen.process_exam_file(str(silver), str(out / "exam"))
+    dum_gen.process_exam_with_answers(str(silver), str(out / "answers"))
+    if html:
+        import convert_md_to_html
+        convert_md_to_html.convert_md_to_html(str(out / "answers" / f"{raw.stem}-answers.md"))
+
+
+@pytest.mark.parametrize("html", [False, True])
+def test_fused_matches_chain(tmp_path, html):
+    md = pytest.importorskip("markdown") if html else None
+    raw = tmp_path / "raw" / "az-104.md"
+    write_dump(raw, questions=60, comments=3, seed=2)
+    run_chain(raw, tmp_path / "chain", html)
+    chain = tmp_path / "chain"
+    fused = tmp_path / "fused"
+    pipeline.run_file(raw, fused / "silver" / raw.name, fused / "exam", fused / "answers", md=md)
+
+    names = ["silver/az-104.md", "exam/az-104-exam.md", "answers/az-104-answers.md"]
+    if html:
+        names.append("answers/az-104-answers.html")
+    for name in names:
+        assert (fused / name).read_bytes() == (chain / name).read_bytes(), name
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Tests for practice_exam.py."""
+import random
+import re
+
+import pytest
+
+import clean_md
+import practice_exam
+from question_ir import parse_questions
+from synth_corpus import write_dump
+
+KEY_LINE_RE = re.compile(r'^(\d+)\. ([A-Z]+)')
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """A cleaned 100-question exam (34/33/33 questions in topics 1-3) in tmp_path/pe/silver."""
+    raw = tmp_path / "raw.md"
+    write_dump(raw, questions=100, seed=4)
+    silver = tmp_path / "pe" / "silver" / "az-104.md"
+    assert clean_md.process_single_file(raw, silver, False)
+    return silver
+
+
+def build(corpus, monkeypatch):
+    monkeypatch.chdir(corpus.parent.parent)
+    assert practice_exam.main(["build", "silver", "--index", "idx.json"]) == 0
+    return practice_exam.PracticeIndex(corpus.parent.parent / "idx.json")
+
+
+def correct_texts(q, answer):
+    options = q.option_map()
+    return sorted(options[letter] for letter in answer)
+
+
+def test_generate_from_another_directory(tmp_path, corpus, monkeypatch):
+    build(corpus, monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    assert practice_exam.main(["generate", "--index", "pe/idx.json", "-o", "out", "-q", "10"]) == 0
+    assert (tmp_path / "out" / "az-104-practice-0-0001.md").is_file()
+    assert (tmp_path / "out" / "az-104-practice-0-0001-answers.md").is_file()
+
+
+def test_shuffled_options_keep_the_correct_answers(tmp_path, corpus, monkeypatch):
+    index = build(corpus, monkeypatch)
+    expected = {}
+    for q in parse_questions(corpus.read_text(encoding="utf-8")):
+        if q.answer:
+            expected.setdefault(q.stem, (q.answer, correct_texts(q, q.answer)))
+    out = tmp_path / "out"
+    assert practice_exam.generate(index, ["az-104"], out, count=5, size=40, seed=3,
+                                  shuffle_options=True, stratify=False) == (1, 1)
+
+    moved = 0
+    for variant in range(1, 6):
+        stem = out / f"az-104-practice-3-{variant:04d}"
+        sheet = parse_questions(stem.with_suffix(".md").read_text(encoding="utf-8"))
+        answers = stem.with_name(stem.name + "-answers.md").read_text(encoding="utf-8")
+        keys = [m.groups() for m in map(KEY_LINE_RE.match, answers.splitlines()) if m]
+        assert len(sheet) == len(keys) == 40
+        for q, (number, answer) in zip(sheet, keys):
+            assert q.number == int(number)
+            source_answer, texts = expected[q.stem]
+            assert correct_texts(q, answer) == texts
+            moved += answer != source_answer
+    # Shuffling must actually move answers, or the remapping is not exercised
+    assert moved > 50
+
+
+def test_stratified_quotas(corpus, monkeypatch):
+    index = build(corpus, monkeypatch)
+    keys = index.exams()["az-104"]
+    source = practice_exam.ExamSource("az-104", [(index.source(k), index.files[k]) for k in keys])
+    assert [len(group) for group in source.strata] == [34, 33, 33]
+    topic_of = {i: t for t, group in enumerate(source.strata) for i in group}
+
+    for seed in range(20):
+        picks = source.draw(random.Random(seed), 10, stratify=True)
+        assert len(set(picks)) == 10
+        # Shares 3.4 / 3.3 / 3.3: the largest remainder gets the extra question
+        assert [sum(topic_of[i] == t for i in picks) for t in range(3)] == [4, 3, 3]
+        picks = source.draw(random.Random(seed), 50, stratify=True)
+        assert [sum(topic_of[i] == t for i in picks) for t in range(3)] == [17, 17, 16]
+
+
+def test_same_seed_same_variants(tmp_path, corpus, monkeypatch):
+    index = build(corpus, monkeypatch)
+
+    def run(name, seed, count):
+        out = tmp_path / name
+        assert practice_exam.generate(index, [], out, count=count, size=20, seed=seed,
+                                      shuffle_options=True, stratify=True) == (1, 1)
+        return {p.name: p.read_bytes() for p in sorted(out.iterdir())}
+
+    first = run("a", 7, 3)
+    assert run("b", 7, 3) == first
+    # A variant depends only on (exam, seed, variant), not on how many were generated
+    single = run("c", 7, 1)
+    assert single == {name: data for name, data in first.items() if "-0001" in name}
+    other = run("d", 8, 3)
+    assert set(other.values()).isdisjoint(first.values())
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Tests for question_ir.py."""
+import time
+
+import pytest
+
+import dum_gen
+import exam_gen
+from clean_md import HEADER_RE
+from exam_gen import QUESTION_SEPARATOR
+from parse_oracles import CASES, legacy_answers, legacy_exam, silver_text
+from question_ir import ParseTimeout, parse_questions
+
+SECTION = """## question 12
+
+Actual exam question from
+
+Microsoft's
+AZ-104
+
+Topic #: 2
+
+[All AZ-104 Questions]
+
+You need to restore the storage account. What should you do?
+Suggested Answer: BD
+
+A. Enable soft delete.
+
+B. Configure geo-redundant storage.
+
+C.
+
+D. Add a lock.
+
+**Answer: BD**
+
+**Timestamp: Oct. 21, 2021, 11:35 p.m.**
+
+[View on ExamTopics](https://www.examtopics.com/discussions/microsoft/view/1/)
+"""
+
+
+def test_fields():
+    text = "# Title\n\n" + SECTION
+    (q,) = parse_questions(text)
+    assert (q.number, q.topic, q.suggested, q.answer) == (12, 2, "BD", "BD")
+    assert q.title == "question 12"
+    assert q.exam == "AZ-104"
+    assert q.stem == "You need to restore the storage account. What should you do?"
+    assert q.options == (("A", "Enable soft delete."), ("B", "Configure geo-redundant storage."),
+                         ("C", ""), ("D", "Add a lock."))
+    assert q.timestamp == "Oct. 21, 2021, 11:35 p.m."
+    assert q.link == "https://www.examtopics.com/discussions/microsoft/view/1/"
+    assert q.start == len("# Title\n\n")
+    assert q.text() == SECTION
+    assert q.prompt().endswith("D. Add a lock.\n")
+
+
+def test_raw_header_and_offsets_only():
+    raw = SECTION.replace("## question 12", "## Exam AZ-104 topic 2 question 12 discussion")
+    (q,) = parse_questions(raw + raw, HEADER_RE, with_fields=False)[1:]
+    assert q.number == 12
+    assert q.start == len(raw) and q.end == 2 * len(raw)
+    assert q.answer == "" and q.options == ()
+
+
+def test_no_headers():
+    assert parse_questions("# Title\n\nNo questions here.\n") == []
+
+
+@pytest.fixture(scope="module")
+def silver():
+    return silver_text(300)
+
+
+def test_exam_sheet_matches_legacy_parser(silver):
+    questions = parse_questions(silver, with_fields=False)
+    expected = "# Exam Topics Questions - AZ-104\n\n" + QUESTION_SEPARATOR.join(legacy_exam(silver))
+    assert exam_gen.render_exam("az-104", silver, questions) == expected
+
+
+def test_answers_match_legacy_parser(silver):
+    questions = parse_questions(silver)
+    legacy = list(legacy_answers(silver))
+    assert len(questions) == len(legacy) == 300
+    for q, expected in zip(questions, legacy):
+        assert q.title == expected["title"]
+        assert dum_gen.extract_answers(q.answer, q.option_map()) == expected["correct_answers"]
+
+
+@pytest.mark.parametrize("case", ["blank-lines", "space-lines", "padded-comments", "option-flood"])
+def test_tokenizer_matches_legacy_on_adversarial_input(case):
+    content = CASES[case](300)
+    questions = parse_questions(content)
+    expected = "# Exam Topics Questions - X\n\n" + QUESTION_SEPARATOR.join(legacy_exam(content))
+    assert exam_gen.render_exam("x", content, parse_questions(content, with_fields=False)) == expected
+    (q,), (legacy,) = questions, legacy_answers(content)
+    assert dum_gen.extract_answers(q.answer, q.option_map()) == legacy["correct_answers"]
+
+
+@pytest.mark.parametrize("case", ["blank-lines", "space-lines", "padded-comments"])
+def test_tokenizer_is_linear_on_whitespace_runs(case):
+    # 200,000 lines: minutes for the legacy regexes, well under a second here
+    content = CASES[case](200_000)
+    start = time.perf_counter()
+    (q,) = parse_questions(content)
+    assert time.perf_counter() - start < 5
+    assert q.answer == "B"
+
+
+def test_parse_deadline():
+    text = SECTION * 3
+    with pytest.raises(ParseTimeout):
+        parse_questions(text, deadline=time.monotonic() - 1)
+    assert len(parse_questions(text, deadline=time.monotonic() + 60)) == 3
+
+
+def test_answer_key_time_budget_writes_nothing(tmp_path):
+    silver = tmp_path / "az-104.md"
+    silver.write_text(SECTION * 3, encoding="utf-8")
+    with pytest.raises(ParseTimeout):
+        dum_gen.process_exam_with_answers(str(silver), str(tmp_path / "answers"), time_budget=-1)
+    assert not (tmp_path / "answers").exists()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Tests for remove_url.py."""
+import remove_url
+
+DUMP = ("## question 1\nText\n\n**Answer: A**\n\n**Timestamp: Oct. 21, 2021, 11:35 p.m.**\n\n"
+        "[View on ExamTopics](https://www.examtopics.com/discussions/microsoft/view/1/)\n")
+STRIPPED = "## question 1\nText\n\n**Answer: A**\n\n\n"
+
+
+def test_recursive_glob_keeps_relative_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("a", "b"):
+        (tmp_path / "data" / name).mkdir(parents=True)
+        (tmp_path / "data" / name / "x.md").write_text(name + DUMP, encoding="utf-8")
+
+    assert remove_url.main(["data/**/*.md", "-o", "out"]) == 0
+    for name in ("a", "b"):
+        assert (tmp_path / "out" / name / "x.md").read_text(encoding="utf-8") == name + STRIPPED
+    assert not (tmp_path / "out" / "x.md").exists()
+
+
+def test_single_file_into_new_folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "x.md").write_text(DUMP, encoding="utf-8")
+
+    assert remove_url.main(["x.md", "-o", "out/stripped"]) == 0
+    assert (tmp_path / "out" / "stripped" / "x.md").read_text(encoding="utf-8") == STRIPPED
+
+
+def test_single_file_to_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "x.md").write_text(DUMP, encoding="utf-8")
+
+    assert remove_url.main(["x.md", "-o", "out/y.md"]) == 0
+    assert (tmp_path / "out" / "y.md").read_text(encoding="utf-8") == STRIPPED
+    assert (tmp_path / "x.md").read_text(encoding="utf-8") == DUMP
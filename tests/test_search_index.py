@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Tests for search_index.py."""
+import shutil
+from pathlib import Path
+
+import clean_md
+import search_index
+from synth_corpus import write_dump
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def test_raw_dump_is_indexed_like_its_cleaned_file(tmp_path):
+    write_dump(tmp_path / "raw" / "az-104.md", questions=30, seed=3)
+    assert clean_md.process_single_file(tmp_path / "raw" / "az-104.md",
+                                        tmp_path / "silver" / "az-104.md", False)
+
+    hits = {}
+    for name in ("raw", "silver"):
+        index = search_index.SearchIndex(":memory:")
+        try:
+            assert search_index.build_index([tmp_path / name], index) == (1, 1)
+            assert index.totals() == {"files": 1, "questions": 30}
+            hits[name] = sorted((h["number"], h["topic"], h["answer"], h["snippet"])
+                                for h in index.search("resource", limit=100))
+        finally:
+            index.close()
+    assert hits["raw"] and hits["raw"] == hits["silver"]
+
+
+def test_build_indexes_the_example_dump(tmp_path, caplog):
+    shutil.copy(EXAMPLES / "google_devops.md", tmp_path / "google_devops.md")
+    db = tmp_path / "search.sqlite"
+    assert search_index.main(["build", str(tmp_path / "google_devops.md"), "--index", str(db)]) == 0
+    index = search_index.SearchIndex(str(db))
+    try:
+        assert index.totals()["questions"] > 0
+    finally:
+        index.close()
+    assert "no questions found" not in caplog.text
+
+
+def test_file_without_questions_is_reported(tmp_path, caplog):
+    (tmp_path / "notes.md").write_text("# Notes\n\nNothing to index.\n", encoding="utf-8")
+    index = search_index.SearchIndex(":memory:")
+    try:
+        search_index.build_index([tmp_path / "notes.md"], index)
+    finally:
+        index.close()
+    assert "no questions found" in caplog.text